@@ -9,8 +9,10 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.append(str(SRC))
 
+from agentic_forecast.cache import ArtifactCache  # noqa: E402
 from agentic_forecast.config import SystemConfig  # noqa: E402
-from agentic_forecast.orchestrator import run_pipeline  # noqa: E402
+from agentic_forecast.orchestrator import build_pipeline, run_pipeline  # noqa: E402
+from agentic_forecast.utils.io import load_sales  # noqa: E402
 
 
 st.set_page_config(page_title="Agentic Forecasting + Decision Demo", layout="wide")
@@ -19,27 +21,48 @@ st.caption("Forecast → Uncertainty → Decision → Critic loop")
 
 
 def load_data(path: pathlib.Path) -> pd.DataFrame:
-    return pd.read_csv(path)
+    return load_sales(path, SystemConfig().data)
+
+
+# one pipeline per cache directory for the whole session, so reruns that only move the
+# horizon skip loading, STL, backtests and fitting.
+@st.cache_resource
+def stage_pipeline(cache_dir: str):
+    cfg = SystemConfig()
+    cache = ArtifactCache(cache_dir, max_bytes=cfg.cache.max_bytes) if cache_dir else None
+    return build_pipeline(cache, max_workers=cfg.pipeline.max_workers)
 
 
 data_path = st.sidebar.text_input(
     "Data CSV path", value=str(ROOT / "sales.csv")
 )
 horizon = st.sidebar.slider("Horizon (days)", min_value=7, max_value=60, value=14, step=7)
+cache_dir = st.sidebar.text_input("Model cache directory", value=str(ROOT / ".af_cache"))
 
 if st.sidebar.button("Run pipeline"):
     try:
         cfg = SystemConfig()
-        artifacts = run_pipeline(data_path=data_path, config=cfg, horizon=horizon)
+        cfg.cache.directory = cache_dir or None
+        artifacts = run_pipeline(
+            data_path=data_path,
+            config=cfg,
+            horizon=horizon,
+            pipeline=stage_pipeline(cache_dir),
+        )
 
         st.subheader("Backtest metrics (avg)")
         st.json(artifacts["backtest"])
+        if artifacts["cache"] is not None:
+            st.caption(
+                f"Model cache: {artifacts['cache']['hits']} hits, "
+                f"{artifacts['cache']['misses']} misses"
+            )
 
         st.subheader("Forecast and intervals")
         st.line_chart(
-            artifacts["forecast"].set_index(cfg.data.time_col)[
-                ["forecast", "lower", "upper"]
-            ]
+            artifacts["forecast"]
+            .groupby(cfg.data.time_col)[["forecast", "lower", "upper"]]
+            .sum()
         )
 
         st.subheader("Decision allocations")
@@ -55,6 +78,10 @@ if st.sidebar.button("Run pipeline"):
         for rec in artifacts["critic"]["recommendations"]:
             st.write(f"- {rec}")
 
+        st.subheader("Stage timings")
+        st.caption(", ".join(f"{k}: {v}" for k, v in artifacts["stages"].items()))
+        st.dataframe(artifacts["profile"])
+
     except Exception as e:
         st.error(f"Run failed: {e}")
 else:
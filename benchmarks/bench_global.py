@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import benchmarks  # noqa: F401
+from agentic_forecast.config import BacktestConfig, DataConfig, ModelConfig
+from agentic_forecast.evaluation import wape
+from agentic_forecast.model_portfolio import ModelPortfolioAgent
+from agentic_forecast.models.boosted import GradientBoostedRegressor
+from agentic_forecast.signal import SignalAgent
+
+
+def make_panel(n_series: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_days)
+    level = rng.lognormal(3, 1, size=(n_series, 1))
+    weekly = 1 + 0.3 * np.sin(2 * np.pi * (t + rng.integers(0, 7, size=(n_series, 1))) / 7)
+    y = rng.poisson(level * weekly).astype(float)
+    return pd.DataFrame(
+        {
+            "date": np.tile(pd.date_range("2023-01-01", periods=n_days, freq="D"), n_series),
+            "item_id": np.repeat([f"item_{i}" for i in range(n_series)], n_days),
+            "store_id": np.repeat([f"store_{i % 10}" for i in range(n_series)], n_days),
+            "y": y.ravel(),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Global vs per-series training benchmark")
+    parser.add_argument("--series", type=int, default=500)
+    parser.add_argument("--days", type=int, default=200)
+    parser.add_argument("--holdout", type=int, default=14)
+    args = parser.parse_args()
+
+    config = DataConfig()
+    signal = SignalAgent(config)
+    decomposed, _ = signal.decompose(make_panel(args.series, args.days))
+    features = signal.build_features(decomposed)
+    cutoff = features["date"].max() - pd.Timedelta(days=args.holdout)
+    train, test = features[features["date"] <= cutoff], features[features["date"] > cutoff]
+
+    results = {}
+    for mode, partition_col in (("global", None), ("partitioned", "store_id")):
+        portfolio = ModelPortfolioAgent(
+            config,
+            BacktestConfig(),
+            models=[GradientBoostedRegressor()],
+            model_config=ModelConfig(
+                training_mode=mode, partition_col=partition_col, partition_workers=4
+            ),
+        )
+        portfolio.best_model = portfolio.models[0]
+        start = time.perf_counter()
+        portfolio.fit_best(train)
+        fit_seconds = time.perf_counter() - start
+        preds = portfolio.predict(test)
+        results[mode] = {"fit_seconds": fit_seconds, "wape": wape(test["y"].values, preds)}
+
+    # naive baseline: one local model per series, fitted in a Python loop.
+    local = ModelPortfolioAgent(config, BacktestConfig())
+    feature_cols = local._feature_cols(train)
+    base = GradientBoostedRegressor()
+    preds = np.empty(len(test))
+    start = time.perf_counter()
+    fitted = {}
+    for key, rows in train.groupby(config.id_cols, observed=True):
+        fitted[key] = copy.deepcopy(base).fit(rows[feature_cols], rows["y"])
+    fit_seconds = time.perf_counter() - start
+    for key, rows in test.groupby(config.id_cols, observed=True):
+        preds[test.index.get_indexer(rows.index)] = fitted[key].predict(rows[feature_cols])
+    results["per_series_loop"] = {"fit_seconds": fit_seconds, "wape": wape(test["y"].values, preds)}
+
+    print(json.dumps({"series": args.series, "days": args.days, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Each loader runs in a fresh interpreter so peak RSS is attributable to it alone.
+LOADERS = {
+    "read_csv+ensure_datetime": (
+        "import pandas as pd; from agentic_forecast.utils.data import ensure_datetime; "
+        "df = ensure_datetime(pd.read_csv({path!r}), 'date')"
+    ),
+    "load_sales(csv)": (
+        "from agentic_forecast.config import DataConfig; from agentic_forecast.utils.io import load_sales; "
+        "df = load_sales({path!r}, DataConfig())"
+    ),
+    "load_sales(parquet)": (
+        "from agentic_forecast.config import DataConfig; from agentic_forecast.utils.io import load_sales; "
+        "df = load_sales({parquet!r}, DataConfig())"
+    ),
+    "load_sales(parquet, last 28d, y only)": (
+        "import pandas as pd; from agentic_forecast.config import DataConfig; "
+        "from agentic_forecast.utils.io import load_sales; "
+        "df = load_sales({parquet!r}, DataConfig(), columns=[], start=pd.Timestamp({start!r}))"
+    ),
+}
+
+# VmHWM rather than ru_maxrss: Linux carries ru_maxrss over from the forking parent.
+RUNNER = """
+import re, sys, time
+sys.path.append({src!r})
+t0 = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - t0
+with open("/proc/self/status") as fh:
+    rss = int(re.search(r"VmHWM:\\s+(\\d+)", fh.read()).group(1))
+print(elapsed, rss, len(df), df.memory_usage(deep=True).sum())
+"""
+
+
+def write_sample(directory: pathlib.Path, n_series: int, n_days: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2022-01-01", periods=n_days, freq="D")
+    series = np.arange(n_series)
+    df = pd.DataFrame(
+        {
+            "date": np.tile(dates, n_series),
+            "item_id": np.repeat([f"item_{i % 1000}" for i in series], n_days),
+            "store_id": np.repeat([f"store_{i // 1000}" for i in series], n_days),
+            "y": rng.poisson(20, size=n_series * n_days).astype(float),
+            "price": rng.uniform(1, 10, size=n_series * n_days).round(2),
+            "promo": rng.integers(0, 2, size=n_series * n_days),
+        }
+    )
+    csv_path = directory / "sales.csv"
+    df.to_csv(csv_path, index=False)
+
+    from agentic_forecast.config import DataConfig
+    from agentic_forecast.utils.io import load_sales, write_parquet
+
+    parquet_path = directory / "sales.parquet"
+    write_parquet(load_sales(csv_path, DataConfig()), parquet_path, DataConfig(), row_group_size=250_000)
+    return csv_path, parquet_path, dates[-28]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion benchmark")
+    parser.add_argument("--series", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=730)
+    args = parser.parse_args()
+
+    import benchmarks
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, parquet_path, start = write_sample(pathlib.Path(tmp), args.series, args.days)
+        results = {}
+        for name, body in LOADERS.items():
+            code = RUNNER.format(
+                src=str(benchmarks.SRC),
+                body=body.format(path=str(csv_path), parquet=str(parquet_path), start=str(start)),
+            )
+            out = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True
+            ).stdout.split()
+            results[name] = {
+                "seconds": float(out[0]),
+                "peak_rss_mb": int(out[1]) / 1024,
+                "rows": int(out[2]),
+                "frame_mb": int(out[3]) / 1024**2,
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
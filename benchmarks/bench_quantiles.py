@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import benchmarks  # noqa: F401
+from agentic_forecast.models.multi_quantile import MultiQuantileGradientBoosting
+from agentic_forecast.models.quantile import QuantileGradientBoosting
+
+
+def make_data(n_rows: int, n_features: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, n_features)), columns=[f"x{i}" for i in range(n_features)])
+    scale = 1 + np.abs(X["x1"].to_numpy())
+    y = 3 * X["x0"].to_numpy() + scale * rng.normal(size=n_rows)
+    return X, pd.Series(y)
+
+
+def pinball(y: np.ndarray, preds: np.ndarray, quantiles) -> float:
+    diff = y[:, None] - preds
+    q = np.asarray(quantiles)[None, :]
+    return float(np.mean(np.maximum(q * diff, (q - 1) * diff)))
+
+
+def score(model, X_train, y_train, X_test, y_test) -> dict:
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    preds = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    quantiles = sorted(preds)
+    matrix = np.column_stack([preds[q] for q in quantiles])
+    return {
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "pinball": pinball(y_test.to_numpy(), matrix, quantiles),
+        "crossing_rate": float((np.diff(matrix, axis=1) < 0).any(axis=1).mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-quantile vs joint quantile model benchmark")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--quantiles", type=int, default=9)
+    args = parser.parse_args()
+
+    quantiles = list(np.round(np.linspace(0.05, 0.95, args.quantiles), 4))
+    X, y = make_data(args.rows, args.features)
+    cut = int(0.8 * len(X))
+    split = (X.iloc[:cut], y.iloc[:cut], X.iloc[cut:], y.iloc[cut:])
+
+    results = {
+        "per_quantile": score(QuantileGradientBoosting(quantiles=quantiles), *split),
+        "joint": score(MultiQuantileGradientBoosting(quantiles=quantiles), *split),
+    }
+    print(json.dumps({"rows": args.rows, "quantiles": quantiles, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
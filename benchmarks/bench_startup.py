@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import benchmarks
+
+# interpreter arguments per case; every run is a cold start in a fresh process.
+CASES = {
+    "import_package": ["-c", "import agentic_forecast"],
+    "import_orchestrator": ["-c", "import agentic_forecast.orchestrator"],
+    "orchestrator_help": ["-m", "agentic_forecast.orchestrator", "--help"],
+    "iteration_help": ["-m", "agentic_forecast.iteration", "--help"],
+    "serving_help": ["-m", "agentic_forecast.serving", "--help"],
+}
+# backends that must stay unloaded until a run selects them (models registry, quantile models,
+# newsvendor allocation, sparse reconciliation, STL decomposition).
+DEFERRED = ("sklearn", "xgboost", "statsmodels", "scipy")
+CHECK = (
+    "import json, sys; import agentic_forecast.orchestrator; "
+    f"print(json.dumps(sorted(m for m in {DEFERRED!r} if m in sys.modules)))"
+)
+
+
+def environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(benchmarks.SRC), env.get("PYTHONPATH")]))
+    return env
+
+
+def run(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    out = subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, cwd=benchmarks.ROOT, env=env
+    )
+    if out.returncode:
+        sys.exit(f"{' '.join(args)} failed:\n{out.stderr}")
+    return out
+
+
+def time_case(args: List[str], repeats: int, env: Dict[str, str]) -> Dict[str, float]:
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(args, env)
+        seconds.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(seconds), "max_s": max(seconds)}
+
+
+# the modules with the largest cumulative import time, from python -X importtime.
+def slowest_imports(env: Dict[str, str], top: int) -> List[Dict]:
+    stderr = run(["-X", "importtime", *CASES["import_orchestrator"]], env).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append({"module": parts[2].strip(), "cumulative_ms": int(parts[1]) / 1e3})
+    return sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import and CLI startup budget")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds per case (median).")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to report.")
+    args = parser.parse_args()
+
+    env = environment()
+    # one throwaway start so .pyc compilation is not timed
+    run(CASES["orchestrator_help"], env)
+    results = {name: time_case(CASES[name], args.repeats, env) for name in args.cases}
+    for row in results.values():
+        row["over_budget"] = row["median_s"] > args.budget
+    loaded = json.loads(run(["-c", CHECK], env).stdout)
+    report = {
+        "budget_s": args.budget,
+        "results": results,
+        "deferred_loaded": loaded,
+        "slowest_imports": slowest_imports(env, args.top),
+    }
+    print(json.dumps(report, indent=2))
+    if loaded or any(row["over_budget"] for row in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import benchmarks
+from benchmarks.synthetic import RetailSpec, make_retail, write_retail
+
+CASES = (
+    "validate",
+    "decompose",
+    "build_features",
+    "backtest",
+    "uncertainty",
+    "simulate_outcomes",
+    "run_pipeline",
+)
+# earlier cases whose output a case consumes; they run (untimed in the report) when skipped.
+DEPENDS = {
+    "decompose": ["validate"],
+    "build_features": ["decompose"],
+    "backtest": ["build_features"],
+    "uncertainty": ["backtest"],
+    "simulate_outcomes": ["uncertainty"],
+}
+BASELINE = pathlib.Path(__file__).resolve().parent / "baseline.json"
+
+
+# Linux only: writing 5 to clear_refs resets VmHWM, so each case reports its own peak.
+def _reset_peak() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+    except OSError:
+        pass
+
+
+def _measure(records: Dict, name: str, rows: int, fn: Callable):
+    from agentic_forecast.profiling import memory_mb
+
+    _reset_peak()
+    rss_before, _ = memory_mb()
+    start = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - start
+    rss_after, peak = memory_mb()
+    records[name] = {
+        "seconds": seconds,
+        "rows": rows,
+        "rows_per_s": rows / seconds if seconds > 0 else float("inf"),
+        "peak_rss_mb": peak,
+        "rss_delta_mb": rss_after - rss_before,
+    }
+    return out
+
+
+def _needed(cases: List[str]) -> List[str]:
+    needed = set(cases)
+    for case in reversed(CASES):
+        if case in needed:
+            needed.update(DEPENDS.get(case, []))
+    return [c for c in CASES if c in needed]
+
+
+# one panel size in the current process; returns per-case timings and memory.
+def run_cases(spec: RetailSpec, cases: List[str], samples: int) -> Dict:
+    from agentic_forecast.config import DecisionConfig, SystemConfig
+    from agentic_forecast.data_quality import DataQualityAgent
+    from agentic_forecast.decision import DecisionAgent
+    from agentic_forecast.model_portfolio import ModelPortfolioAgent
+    from agentic_forecast.orchestrator import run_pipeline
+    from agentic_forecast.signal import SignalAgent
+    from agentic_forecast.uncertainty import UncertaintyAgent
+
+    config = SystemConfig()
+    raw = make_retail(spec)
+    timed: Dict = {}
+    state: Dict = {}
+    signal = SignalAgent(config.data)
+
+    def uncertainty():
+        agent = UncertaintyAgent(config=config.uncertainty)
+        result = state["backtest"][state["best"]]
+        agent.fit_residuals(result.residuals, result.keys)
+        point = result.keys["forecast"].to_numpy()
+        lower, upper = agent.intervals_from_point(point, result.keys)
+        return result.keys.assign(lower=lower, upper=upper)
+
+    def backtest():
+        portfolio = ModelPortfolioAgent(config.data, config.backtest, model_config=config.model)
+        results = portfolio.backtest(state["build_features"])
+        state["best"] = portfolio.best_model.name
+        return results
+
+    def simulate():
+        # allocations come from a one-draw propose(); only the simulation itself is timed.
+        agent = DecisionAgent(DecisionConfig(sim_samples=1))
+        plan, _ = agent.propose(state["uncertainty"])
+        return lambda: agent.simulate_outcomes(plan, samples=samples)
+
+    steps = {
+        "validate": (lambda: len(raw), lambda: DataQualityAgent(config.data).validate(raw)[0]),
+        "decompose": (
+            lambda: len(state["validate"]),
+            lambda: signal.decompose(state["validate"])[0],
+        ),
+        "build_features": (
+            lambda: len(state["decompose"]),
+            lambda: signal.build_features(state["decompose"]),
+        ),
+        "backtest": (lambda: len(state["build_features"]), backtest),
+        "uncertainty": (lambda: len(state["backtest"][state["best"]].residuals), uncertainty),
+    }
+    for case in _needed(cases):
+        sink = timed if case in cases else {}
+        if case in steps:
+            rows, fn = steps[case]
+            state[case] = _measure(sink, case, rows(), fn)
+        elif case == "simulate_outcomes":
+            run = simulate()
+            _measure(sink, case, len(state["uncertainty"]) * samples, run)
+        elif case == "run_pipeline":
+            with tempfile.TemporaryDirectory() as tmp:
+                path = write_retail(tmp, raw)
+                _measure(sink, case, len(raw), lambda: run_pipeline(str(path), SystemConfig()))
+    return timed
+
+
+def machine() -> Dict:
+    import numpy as np
+    import pandas as pd
+
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def size_key(n_series: int, n_days: int) -> str:
+    return f"{n_series}x{n_days}"
+
+
+# time ratios only count as regressions for cases slower than min_seconds (timer noise).
+def compare(
+    results: Dict, baseline: Dict, tolerance: float, memory_tolerance: float, min_seconds: float
+) -> List[Dict]:
+    rows = []
+    for size, cases in results.items():
+        for case, record in cases.items():
+            base = baseline.get("results", {}).get(size, {}).get(case)
+            if base is None:
+                continue
+            time_ratio = record["seconds"] / max(base["seconds"], 1e-9)
+            memory_ratio = record["peak_rss_mb"] / max(base["peak_rss_mb"], 1e-9)
+            slower = time_ratio > 1 + tolerance and record["seconds"] >= min_seconds
+            heavier = memory_ratio > 1 + memory_tolerance
+            rows.append(
+                {
+                    "size": size,
+                    "case": case,
+                    "seconds": record["seconds"],
+                    "baseline_seconds": base["seconds"],
+                    "time_ratio": time_ratio,
+                    "peak_rss_mb": record["peak_rss_mb"],
+                    "baseline_peak_rss_mb": base["peak_rss_mb"],
+                    "memory_ratio": memory_ratio,
+                    "regression": bool(slower or heavier),
+                }
+            )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent and end-to-end pipeline benchmark suite")
+    parser.add_argument("--series", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--samples", type=int, default=1_000, help="simulate_outcomes draws")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    parser.add_argument("--min-seconds", type=float, default=0.05)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        spec = RetailSpec(n_series=args.series[0], n_days=args.days, seed=args.seed)
+        print(json.dumps(run_cases(spec, args.cases, args.samples)))
+        return
+
+    # each size runs in a fresh interpreter so memory from one size never leaks into the next.
+    results = {}
+    for n_series in args.series:
+        command = [sys.executable, "-m", "benchmarks.bench_suite", "--worker"]
+        command += ["--series", str(n_series), "--days", str(args.days), "--seed", str(args.seed)]
+        command += ["--samples", str(args.samples), "--cases", *args.cases]
+        out = subprocess.run(command, capture_output=True, text=True, cwd=benchmarks.ROOT)
+        if out.returncode:
+            sys.exit(f"{size_key(n_series, args.days)} failed:\n{out.stderr}")
+        results[size_key(n_series, args.days)] = json.loads(out.stdout.splitlines()[-1])
+
+    report = {"machine": machine(), "results": results}
+    baseline_path = pathlib.Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    if baseline:
+        report["same_machine"] = baseline.get("machine") == report["machine"]
+        report["comparison"] = compare(
+            results, baseline, args.tolerance, args.memory_tolerance, args.min_seconds
+        )
+    if args.save_baseline:
+        merged = {**baseline.get("results", {}), **results}
+        baseline_path.write_text(
+            json.dumps({"machine": report["machine"], "results": merged}, indent=2) + "\n"
+        )
+    print(json.dumps(report, indent=2))
+    if any(row["regression"] for row in report.get("comparison", [])):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
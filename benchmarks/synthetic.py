@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pathlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class RetailSpec:
+    n_series: int = 1_000
+    n_days: int = 120
+    n_stores: int = 10
+    start: str = "2023-01-01"
+    # amplitude of the weekly / yearly multiplicative cycles
+    weekly: float = 0.3
+    yearly: float = 0.15
+    # daily trend drawn per series from N(0, trend)
+    trend: float = 0.002
+    # share of days on promotion, uplift while promoted and the accompanying price cut
+    promo_rate: float = 0.05
+    promo_lift: float = 0.6
+    promo_discount: float = 0.2
+    # per-day probability of a level shift and its log-scale size
+    shift_rate: float = 0.003
+    shift_scale: float = 0.4
+    seed: int = 0
+
+
+# long-format item x store panel (date, item_id, store_id, y, price, promo), sorted by series
+# then date (ids are zero-padded so string order matches). Demand is Poisson around
+# level * trend * weekly * yearly * promo uplift * regime, where regime is a random walk of
+# occasional level shifts.
+def make_retail(spec: RetailSpec | None = None, **overrides) -> pd.DataFrame:
+    spec = spec or RetailSpec(**overrides)
+    rng = np.random.default_rng(spec.seed)
+    n, t = spec.n_series, np.arange(spec.n_days)
+    dates = pd.date_range(spec.start, periods=spec.n_days, freq="D")
+
+    level = rng.lognormal(2.5, 1.0, size=(n, 1))
+    trend = np.exp(rng.normal(0, spec.trend, size=(n, 1)) * t)
+    phase = rng.integers(0, 7, size=(n, 1))
+    weekly = 1 + spec.weekly * np.sin(2 * np.pi * (t + phase) / 7)
+    yearly = 1 + spec.yearly * np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365.25)
+    promo = rng.random((n, spec.n_days)) < spec.promo_rate
+    shifts = np.where(
+        rng.random((n, spec.n_days)) < spec.shift_rate,
+        rng.normal(0, spec.shift_scale, size=(n, spec.n_days)),
+        0.0,
+    )
+    regime = np.exp(np.cumsum(shifts, axis=1))
+
+    rate = level * trend * weekly * yearly * regime * (1 + spec.promo_lift * promo)
+    base_price = rng.uniform(1, 20, size=(n, 1))
+    price = np.broadcast_to(base_price, rate.shape) * (1 - spec.promo_discount * promo)
+
+    series = np.arange(n)
+    items = np.array([f"item_{i:06d}" for i in range(-(-n // spec.n_stores))], dtype=object)
+    stores = np.array([f"store_{i:04d}" for i in range(spec.n_stores)], dtype=object)
+    return pd.DataFrame(
+        {
+            "date": np.tile(dates.to_numpy(), n),
+            "item_id": np.repeat(items[series // spec.n_stores], spec.n_days),
+            "store_id": np.repeat(stores[series % spec.n_stores], spec.n_days),
+            "y": rng.poisson(rate).astype(np.float64).ravel(),
+            "price": price.round(2).ravel(),
+            "promo": promo.astype(np.int8).ravel(),
+        }
+    )
+
+
+# writes the panel as parquet when pyarrow is available, else csv; returns the path.
+def write_retail(directory: str | pathlib.Path, df: pd.DataFrame) -> pathlib.Path:
+    directory = pathlib.Path(directory)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        path = directory / "sales.csv"
+        df.to_csv(path, index=False)
+        return path
+    path = directory / "sales.parquet"
+    df.to_parquet(path, index=False)
+    return path
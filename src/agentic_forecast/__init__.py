@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import importlib
+from typing import Any, List
+
+# public name -> submodule. Submodules are imported on first attribute access, so
+# `import agentic_forecast` stays cheap and each CLI only loads what its command uses.
+_EXPORTS = {
+    "SystemConfig": "config",
+    "run_pipeline": "orchestrator",
+    "build_pipeline": "orchestrator",
+    "run_iterations": "iteration",
+    "Pipeline": "pipeline",
+    "Stage": "pipeline",
+    "DataQualityAgent": "data_quality",
+    "SignalAgent": "signal",
+    "ModelPortfolioAgent": "model_portfolio",
+    "UncertaintyAgent": "uncertainty",
+    "Reconciler": "reconciliation",
+    "DecisionAgent": "decision",
+    "CriticAgent": "critic",
+    "ServingBundle": "serving",
+    "build_bundle": "serving",
+    "create_model": "models",
+    "register_model": "models",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import contextvars
+import copy
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .profiling import record_span, span
+
+
+@dataclass
+class BacktestResult:
+    metrics: Dict[str, float]
+    residuals: np.ndarray
+    model_name: str
+    # per-residual id columns, horizon "step" and "forecast", aligned with residuals
+    keys: Optional[pd.DataFrame] = None
+    # aggregated results only: metrics per series and per hierarchy level node
+    series_metrics: Optional[pd.DataFrame] = None
+    level_metrics: Optional[pd.DataFrame] = None
+
+
+@dataclass
+class BacktestJob:
+    split_idx: int
+    model_idx: int
+    model: object
+    train: slice
+    val: slice
+
+
+# feature matrix written once to a .npy memmap so process workers map it instead of unpickling it.
+class SharedMatrix:
+
+    def __init__(self, X: pd.DataFrame, y: np.ndarray):
+        self.directory = tempfile.mkdtemp(prefix="af_backtest_")
+        self.columns = list(X.columns)
+        self.x_path = os.path.join(self.directory, "X.npy")
+        self.y_path = os.path.join(self.directory, "y.npy")
+        X_map = np.lib.format.open_memmap(
+            self.x_path, mode="w+", dtype=np.float32, shape=X.shape
+        )
+        X_map[:] = X.to_numpy(dtype=np.float32)
+        X_map.flush()
+        del X_map
+        np.save(self.y_path, np.asarray(y, dtype=np.float64))
+
+    def handle(self) -> Tuple[str, str, List[str]]:
+        return self.x_path, self.y_path, self.columns
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_MAPPED: Dict[str, np.ndarray] = {}
+
+
+def _mapped(path: str) -> np.ndarray:
+    if path not in _MAPPED:
+        _MAPPED[path] = np.load(path, mmap_mode="r")
+    return _MAPPED[path]
+
+
+def _fit_and_score(job: BacktestJob, X: pd.DataFrame, y: np.ndarray) -> BacktestResult:
+    X_train = X.iloc[job.train]
+    with span("model.fit", rows=len(X_train), model=job.model.name, split=job.split_idx):
+        fitted = job.model.fit(X_train, pd.Series(y[job.train], index=X_train.index))
+    X_val = X.iloc[job.val]
+    with span("model.predict", rows=len(X_val), model=job.model.name, split=job.split_idx):
+        preds = np.asarray(fitted.predict(X_val))
+    # metrics are filled in by ModelPortfolioAgent.backtest in one pass over all jobs.
+    return BacktestResult(
+        metrics={},
+        residuals=y[job.val] - preds,
+        model_name=job.model.name,
+    )
+
+
+def _run_shared(job: BacktestJob, handle: Tuple[str, str, List[str]]) -> Tuple[BacktestResult, float]:
+    x_path, y_path, columns = handle
+    start = time.perf_counter()
+    X = pd.DataFrame(_mapped(x_path), columns=columns, copy=False)
+    return _fit_and_score(job, X, _mapped(y_path)), time.perf_counter() - start
+
+
+def _run_local(job: BacktestJob, X: pd.DataFrame, y: np.ndarray) -> Tuple[BacktestResult, float]:
+    start = time.perf_counter()
+    return _fit_and_score(job, X, y), time.perf_counter() - start
+
+
+# fans (split, model) jobs out to a pool; every job fits its own copy of the model on the same
+# float32 feature matrix whatever the backend. job_timeout is a deadline measured from submit
+# time for every job; it needs the process backend, whose workers are terminated when a job
+# misses it (threads cannot be stopped).
+class BacktestExecutor:
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        backend: str = "thread",
+        job_timeout: float | None = None,
+    ):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Unknown backtest backend: {backend}")
+        if job_timeout is not None and backend != "process":
+            raise ValueError("job_timeout needs the process backend; threads cannot be stopped.")
+        self.max_workers = max_workers
+        self.backend = backend
+        self.job_timeout = job_timeout
+        self.failures: List[Dict] = []
+        self.timings: List[Dict] = []
+
+    def run(
+        self,
+        models: List,
+        X: pd.DataFrame,
+        y: np.ndarray,
+        splits: List[Tuple[slice, slice]],
+        skip: Set[Tuple[int, int]] | None = None,
+    ) -> List[Tuple[int, int, BacktestResult]]:
+        self.failures, self.timings = [], []
+        skip = skip or set()
+        jobs = [
+            BacktestJob(split_idx, model_idx, copy.deepcopy(model), train, val)
+            for split_idx, (train, val) in enumerate(splits)
+            for model_idx, model in enumerate(models)
+            if (split_idx, model_idx) not in skip
+        ]
+        try:
+            X = X.astype(np.float32)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Backtest features must be numeric: {exc}") from exc
+        y = np.asarray(y, dtype=np.float64)
+
+        if not jobs or (self.max_workers <= 1 and self.job_timeout is None):
+            outcomes = []
+            for job in jobs:
+                result, seconds = _run_local(job, X, y)
+                self._record(job, seconds)
+                outcomes.append((job.split_idx, job.model_idx, result))
+            return outcomes
+
+        shared = None
+        pool: Executor
+        if self.backend == "process":
+            shared = SharedMatrix(X, y)
+            pool = ProcessPoolExecutor(max_workers=max(self.max_workers, 1))
+            futures = [pool.submit(_run_shared, job, shared.handle()) for job in jobs]
+        else:
+            pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            # each job runs in a copy of the caller's context so profiling spans nest under it.
+            futures = [
+                pool.submit(contextvars.copy_context().run, _run_local, job, X, y) for job in jobs
+            ]
+
+        outcomes = []
+        timed_out = False
+        try:
+            # every job was submitted just now, so one wait enforces all deadlines.
+            done = wait(futures, timeout=self.job_timeout).done
+            for job, future in zip(jobs, futures):
+                if future not in done:
+                    timed_out = True
+                    self.failures.append(self._failure(job, "timeout"))
+                    continue
+                try:
+                    result, seconds = future.result()
+                except Exception as exc:
+                    self.failures.append(self._failure(job, repr(exc)))
+                    continue
+                self._record(job, seconds)
+                outcomes.append((job.split_idx, job.model_idx, result))
+        finally:
+            if timed_out:
+                _terminate(pool)
+            pool.shutdown(wait=not timed_out, cancel_futures=True)
+            if shared is not None:
+                shared.close()
+        outcomes.sort(key=lambda o: (o[0], o[1]))
+        return outcomes
+
+    def _record(self, job: BacktestJob, seconds: float) -> None:
+        self.timings.append(
+            {"split": job.split_idx, "model": job.model.name, "seconds": seconds}
+        )
+        record_span(
+            "backtest.job",
+            seconds,
+            rows=job.val.stop - job.val.start,
+            model=job.model.name,
+            split=job.split_idx,
+            backend=self.backend,
+        )
+
+    @staticmethod
+    def _failure(job: BacktestJob, reason: str) -> Dict:
+        return {"split": job.split_idx, "model": job.model.name, "reason": reason}
+
+
+# stops the workers of a process pool that are still running late jobs.
+def _terminate(pool: Executor) -> None:
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import pickle
+import tempfile
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+
+def _update(h, obj: Any) -> None:
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr(list(obj.columns)).encode())
+        for col in obj.columns:
+            _update(h, obj[col])
+    elif isinstance(obj, pd.Series):
+        if pd.api.types.is_numeric_dtype(obj.dtype) and not isinstance(
+            obj.dtype, pd.CategoricalDtype
+        ):
+            _update(h, obj.to_numpy())
+        else:
+            _update(h, pd.util.hash_pandas_object(obj, index=False).to_numpy())
+    elif isinstance(obj, np.ndarray):
+        h.update(str(obj.dtype).encode())
+        h.update(repr(obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for item in obj:
+            _update(h, item)
+        h.update(b"]")
+    else:
+        h.update(repr(obj).encode())
+
+
+# content hash of frames, arrays and plain values; equal inputs give equal keys across runs.
+def fingerprint(*parts: Any) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        _update(h, part)
+    return h.hexdigest()
+
+
+def model_signature(model: Any) -> str:
+    if hasattr(model, "get_params"):
+        params = model.get_params()
+    elif hasattr(model, "metadata"):
+        params = model.metadata()
+    else:
+        params = {k: v for k, v in vars(model).items() if not k.startswith("_")}
+    return f"{type(model).__module__}.{type(model).__qualname__}:{sorted(params.items())!r}"
+
+
+# content-addressed pickle store on local disk with size-bounded LRU eviction.
+class ArtifactCache:
+
+    def __init__(self, directory: str | pathlib.Path, max_bytes: int = 2 * 1024**3):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except Exception:
+            # truncated files, and pickles of classes that were since renamed or moved
+            # (ModuleNotFoundError, AttributeError, ImportError, ...): drop the entry.
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return default
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = [(p.stat(), p) for p in self.directory.glob("*.pkl")]
+        total = sum(st.st_size for st, _ in entries)
+        for st, path in sorted(entries, key=lambda e: e[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+
+    def stats(self) -> Dict[str, int]:
+        sizes = [p.stat().st_size for p in self.directory.glob("*.pkl")]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(sizes),
+            "bytes": int(sum(sizes)),
+        }
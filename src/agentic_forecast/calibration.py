@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .features import segment_positions
+from .profiling import span
+from .utils.data import series_index
+
+VOLUME_BUCKET_COL = "volume_bucket"
+
+
+# 1-based horizon step of each row: dense rank of its timestamp within the frame.
+def horizon_steps(times: np.ndarray) -> np.ndarray:
+    return np.unique(times, return_inverse=True)[1].astype(np.int64) + 1
+
+
+# split conformal bands per segment (e.g. horizon step, series, volume bucket). Each segment
+# keeps a bounded uniform reservoir sample of its |residuals| and a cached band, so an update
+# only re-ranks the touched segments and intervals are one gather from the band table. Segment 0
+# holds all residuals and is the fallback for unseen or thin segments.
+class ConformalCalibrator:
+
+    def __init__(
+        self,
+        alpha: float = 0.1,
+        segment_by: Sequence[str] = ("step",),
+        window: int = 500,
+        min_count: int = 30,
+        volume_buckets: int = 4,
+        band_scale: float = 1.0,
+        random_state: int = 0,
+    ):
+        self.alpha = alpha
+        self.segment_by = list(segment_by)
+        self.window = window
+        self.min_count = min_count
+        self.volume_buckets = volume_buckets
+        self.band_scale = band_scale
+        self.keys: pd.Index | None = None
+        self.volume_edges: np.ndarray | None = None
+        self.buffer = np.full((1, window), np.nan, dtype=np.float32)
+        self.rng = np.random.default_rng(random_state)
+        # residuals seen per segment; the reservoir holds min(seen, window) of them
+        self.seen = np.zeros(1, dtype=np.int64)
+        self.count = np.zeros(1, dtype=np.int64)
+        self.band = np.zeros(1)
+
+    def _segment_frame(self, keys: pd.DataFrame) -> pd.DataFrame:
+        if VOLUME_BUCKET_COL not in self.segment_by:
+            return keys
+        level = np.abs(keys["forecast"].to_numpy(dtype=np.float64))
+        if self.volume_edges is None:
+            qs = np.linspace(0, 1, self.volume_buckets + 1)[1:-1]
+            self.volume_edges = np.unique(np.quantile(level, qs))
+        return keys.assign(**{VOLUME_BUCKET_COL: np.searchsorted(self.volume_edges, level)})
+
+    # row codes into the band table (0 = global); unseen keys are added when grow=True.
+    def _codes(self, keys: pd.DataFrame | None, grow: bool) -> np.ndarray:
+        if not self.segment_by or keys is None:
+            return np.zeros(0 if keys is None else len(keys), dtype=np.int64)
+        index = series_index(self._segment_frame(keys), self.segment_by)
+        if self.keys is None:
+            if not grow:
+                return np.zeros(len(index), dtype=np.int64)
+            self.keys = index[:0]
+        codes = self.keys.get_indexer(index)
+        if grow and (codes < 0).any():
+            new = index[codes < 0].unique()
+            self.keys = self.keys.append(new)
+            self._grow(len(self.keys) + 1)
+            codes = self.keys.get_indexer(index)
+        return np.where(codes >= 0, codes + 1, 0)
+
+    def _grow(self, n_segments: int) -> None:
+        extra = n_segments - len(self.band)
+        if extra <= 0:
+            return
+        self.buffer = np.vstack(
+            [self.buffer, np.full((extra, self.window), np.nan, dtype=np.float32)]
+        )
+        self.seen = np.concatenate([self.seen, np.zeros(extra, dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.band = np.concatenate([self.band, np.zeros(extra)])
+
+    # adds residuals (and their segment keys) to the reservoirs; cost scales with the new
+    # residuals plus window * touched segments, never with the full history.
+    def update(self, residuals: np.ndarray, keys: pd.DataFrame | None = None) -> None:
+        with span("calibration.update", rows=len(residuals)):
+            self._update(residuals, keys)
+
+    def _update(self, residuals: np.ndarray, keys: pd.DataFrame | None) -> None:
+        values = np.abs(np.asarray(residuals, dtype=np.float32))
+        if not len(values):
+            return
+        codes = self._codes(keys, grow=True)
+        if len(codes):
+            values = np.concatenate([values, values])
+            codes = np.concatenate([np.zeros(len(codes), dtype=np.int64), codes])
+        else:
+            codes = np.zeros(len(values), dtype=np.int64)
+
+        order = np.argsort(codes, kind="stable")
+        codes, values = codes[order], values[order]
+        touched, starts, sizes = np.unique(codes, return_index=True, return_counts=True)
+        positions = segment_positions(np.append(starts, len(codes)))
+        # reservoir sampling (algorithm R): the t-th residual of a segment fills slot t while
+        # the reservoir is short, then replaces a random slot with probability window / (t + 1),
+        # so every residual seen is equally likely to be kept, not just the last rows of a
+        # series-sorted batch. Later duplicates of a slot win, as in the sequential algorithm.
+        t = self.seen[codes] + positions
+        slots = np.where(t < self.window, t, self.rng.integers(0, t + 1))
+        keep = slots < self.window
+        self.buffer[codes[keep], slots[keep]] = values[keep]
+        self.seen[touched] += sizes
+        self.count[touched] = np.minimum(self.seen[touched], self.window)
+        self._refresh(touched)
+
+    # finite-sample conformal quantile: the ceil((n + 1)(1 - alpha))-th smallest |residual|.
+    def _refresh(self, segments: np.ndarray) -> None:
+        ranked = np.sort(self.buffer[segments], axis=1)
+        n = self.count[segments]
+        k = np.minimum(np.ceil((n + 1) * (1 - self.alpha)).astype(np.int64), n) - 1
+        self.band[segments] = ranked[np.arange(len(segments)), np.maximum(k, 0)]
+
+    def bands(self, keys: pd.DataFrame | None = None, n_rows: int | None = None) -> np.ndarray:
+        table = np.where(self.count >= self.min_count, self.band, self.band[0]) * self.band_scale
+        codes = self._codes(keys, grow=False)
+        if not len(codes):
+            return np.full(n_rows if n_rows is not None else 1, table[0])
+        return table[codes]
+
+    def intervals(
+        self,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        keys: pd.DataFrame | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        band = self.bands(keys, n_rows=len(lower))
+        return np.asarray(lower) - band, np.asarray(upper) + band
+
+    @property
+    def fitted(self) -> bool:
+        return bool(self.count[0])
+
+    def table(self) -> pd.DataFrame:
+        rows = pd.DataFrame({"count": self.count[1:], "band": self.band[1:] * self.band_scale})
+        if self.keys is None:
+            return rows
+        names = self.segment_by if len(self.segment_by) > 1 else self.segment_by[0]
+        return pd.concat([self.keys.to_frame(index=False, name=names), rows], axis=1)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -11,6 +11,16 @@ class DataConfig:
     freq: str = "D"
     min_train_points: int = 60
     expected_columns: Optional[List[str]] = None
+    decompose_workers: int = 1
+    decompose_chunk_size: int = 256
+    lags: List[int] = field(default_factory=lambda: [7, 14, 28])
+    # rolling window -> min_periods
+    rolling_windows: Dict[int, int] = field(default_factory=lambda: {7: 3, 28: 7})
+    # trailing rows per series kept by the incremental state store; update() refits STL on
+    # them, and 84 rows left a visible trend discontinuity against a full recompute
+    state_context: int = 168
+    # robust z (|y - median| / (1.4826 * MAD), per series) above which a row is an anomaly
+    anomaly_threshold: float = 4.0
 
 
 @dataclass
@@ -21,6 +31,16 @@ class DecisionConfig:
     stockout_cost: float = 5.0
     holding_cost: float = 1.0
     unit_cost: float = 2.0
+    # "proportional" scales the service-level allocation down to fit capacity/budget;
+    # "newsvendor" solves the cost-optimal allocation under per-group and global limits
+    allocation_method: str = "proportional"
+    group_col: Optional[str] = None
+    group_capacity: Optional[Dict[str, float]] = None
+    group_budget: Optional[Dict[str, float]] = None
+    sim_samples: int = 1000
+    seed: int = 7
+    # demand draws are generated in sample chunks that fit this budget
+    sim_memory_mb: float = 256.0
 
 
 @dataclass
@@ -28,6 +48,108 @@ class BacktestConfig:
     splits: int = 3
     step_size: int = 14
     val_size: int = 14
+    # (split, model) jobs run on a "thread" or "process" pool when max_workers > 1
+    max_workers: int = 1
+    backend: str = "thread"
+    # seconds from submission for every job (so queued jobs count); process backend only.
+    # A model with any failed or timed-out split is left out of selection.
+    job_timeout: Optional[float] = None
+    # pinball loss levels; quantile forecasts come from residuals of the other splits
+    pinball_quantiles: List[float] = field(default_factory=lambda: [0.1, 0.5, 0.9])
+    # per-level metrics, each level a list of series-constant columns ([] is the total);
+    # None: the total plus every id column on its own
+    metric_levels: Optional[List[List[str]]] = None
+
+
+@dataclass
+class ModelConfig:
+    # "pooled": one fit over the raw frame; "global": encoded series ids plus
+    # per-series target scaling; "partitioned": a global model per partition_col value
+    training_mode: str = "pooled"
+    partition_col: Optional[str] = None
+    partition_workers: int = 1
+    # default portfolio, by models.MODEL_REGISTRY name; only these backends get imported
+    models: List[str] = field(default_factory=lambda: ["seasonal_naive", "gbr"])
+    # add the matrix-form statistical baselines (models/statistical.py) to the default portfolio
+    statistical_baselines: bool = False
+    # serve this portfolio model instead of the lowest backtest WAPE one
+    selected_model: Optional[str] = None
+    # dimension attributes (--dimensions-dir) and other non-numeric columns to use as model
+    # features: numeric ones as they are, the rest as integer codes in "<col>_code". Unlisted
+    # dimension attributes and non-numeric columns are never model features.
+    attribute_features: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CacheConfig:
+    # fitted models and per-split backtest results; disabled when None
+    directory: Optional[str] = None
+    max_bytes: int = 2 * 1024**3
+
+
+@dataclass
+class UncertaintyConfig:
+    alpha: float = 0.1
+    # conformal bands per segment: "step", any id column, or "volume_bucket"
+    segment_by: List[str] = field(default_factory=lambda: ["step"])
+    # |residuals| kept per segment (uniform reservoir sample); thinner segments use the global band
+    window: int = 500
+    min_count: int = 30
+    volume_buckets: int = 4
+    band_scale: float = 1.0
+    # "per_quantile": one booster per quantile; "joint": one booster plus shared
+    # leaf residual quantiles for the whole fan (models/multi_quantile.py)
+    quantile_mode: str = "per_quantile"
+    quantiles: List[float] = field(default_factory=lambda: [0.05, 0.1, 0.5, 0.9, 0.95])
+
+
+@dataclass
+class ReconciliationConfig:
+    # "none", "bottom_up", "top_down" (historical proportions), "ols", "wls" or "mint_shrink"
+    method: str = "none"
+    # aggregate levels above the id_cols series; [] is the grand total. Columns may come from
+    # the joined dimension tables (e.g. a category column from categories.csv)
+    levels: List[List[str]] = field(default_factory=lambda: [[], ["store_id"]])
+    # models/statistical.py baseline that forecasts the aggregate series
+    aggregate_model: str = "theta"
+    # clip reconciled bottom forecasts at zero and re-aggregate
+    nonnegative: bool = True
+
+
+@dataclass
+class CriticConfig:
+    wape_threshold: float = 0.2
+    coverage_tolerance: float = 0.05
+
+
+@dataclass
+class IterationConfig:
+    # the critic loop stops after max_iterations or once time_budget seconds have elapsed
+    max_iterations: int = 3
+    time_budget: Optional[float] = None
+    # recalibrate multiplies / divides UncertaintyConfig.band_scale by (1 + band_step)
+    band_step: float = 0.25
+    service_level_step: float = 0.05
+    max_service_level: float = 0.99
+    # training modes explored by switch_model once no scored (mode, model) beats the served one
+    training_modes: List[str] = field(default_factory=lambda: ["global"])
+
+
+@dataclass
+class PipelineConfig:
+    # run_pipeline stages whose inputs are ready run concurrently on this many threads
+    max_workers: int = 2
+
+
+@dataclass
+class ServingConfig:
+    host: str = "127.0.0.1"
+    port: int = 8765
+    # serve on this Unix socket instead of TCP when set
+    socket_path: Optional[str] = None
+    # a micro-batch closes max_wait_ms after its first request or at max_batch_series series
+    max_wait_ms: float = 5.0
+    max_batch_series: int = 10_000
 
 
 @dataclass
@@ -35,4 +157,12 @@ class SystemConfig:
     data: DataConfig = field(default_factory=DataConfig)
     decision: DecisionConfig = field(default_factory=DecisionConfig)
     backtest: BacktestConfig = field(default_factory=BacktestConfig)
+    model: ModelConfig = field(default_factory=ModelConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    uncertainty: UncertaintyConfig = field(default_factory=UncertaintyConfig)
+    reconciliation: ReconciliationConfig = field(default_factory=ReconciliationConfig)
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    critic: CriticConfig = field(default_factory=CriticConfig)
+    iteration: IterationConfig = field(default_factory=IterationConfig)
+    serving: ServingConfig = field(default_factory=ServingConfig)
 
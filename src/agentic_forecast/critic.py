@@ -16,16 +16,38 @@ class CriticAgent:
         decision_info: Dict,
     ) -> Dict:
         recommendations: List[str] = []
+        # machine-readable counterparts of the recommendations, applied by iteration.py
+        actions: List[Dict] = []
 
-        if forecast_metrics.get("wape", 1.0) > self.wape_threshold:
+        wape = forecast_metrics.get("wape", 1.0)
+        if wape > self.wape_threshold:
             recommendations.append("Improve features or switch to boosted model; WAPE above threshold.")
+            actions.append(
+                {"action": "switch_model", "metric": "wape", "value": wape, "target": self.wape_threshold}
+            )
 
-        coverage_gap = abs(interval_eval.get("coverage", 0) - interval_eval.get("nominal", 0))
+        coverage = interval_eval.get("coverage", 0)
+        nominal = interval_eval.get("nominal", 0)
+        coverage_gap = abs(coverage - nominal)
         if coverage_gap > self.coverage_tolerance:
             recommendations.append("Recalibrate intervals (conformal) to tighten coverage.")
-
-        if decision_info.get("stockout_rate", 0) > (1 - decision_info.get("config", {}).get("service_level", 0.9)):
+            actions.append(
+                {"action": "recalibrate", "metric": "coverage", "value": coverage, "target": nominal}
+            )
+
+        # per-row rate: the any-row-short rate per draw saturates at 1 on realistic panels
+        stockout_rate = decision_info.get("row_stockout_rate", 0)
+        stockout_target = 1 - decision_info.get("config", {}).get("service_level", 0.9)
+        if stockout_rate > stockout_target:
             recommendations.append("Increase service level or safety factor to reduce stockouts.")
+            actions.append(
+                {
+                    "action": "raise_service_level",
+                    "metric": "row_stockout_rate",
+                    "value": stockout_rate,
+                    "target": stockout_target,
+                }
+            )
 
         if decision_info.get("budget_violation", 0) > 0:
             recommendations.append("Tighten allocation or unit costs to avoid budget breach.")
@@ -33,5 +55,4 @@ class CriticAgent:
         if not recommendations:
             recommendations.append("Continue current policy; metrics within targets.")
 
-        return {"recommendations": recommendations}
-
+        return {"recommendations": recommendations, "actions": actions}
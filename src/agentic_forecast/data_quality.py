@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import pathlib
 from dataclasses import asdict
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
 
 import numpy as np
 import pandas as pd
 
 from .config import DataConfig
-from .utils.data import ensure_datetime
+from .state import merge_moments
+from .utils.data import (
+    bounds_from_codes,
+    period_ordinals,
+    series_codes,
+    series_index,
+    series_time_order,
+)
+from .utils.sketch import BloomFilter, ExactKeySet
 
 # Validating.
 class DataQualityAgent:
@@ -16,9 +25,61 @@ class DataQualityAgent:
         self.config = config
 
     def validate(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
-        df = ensure_datetime(df, self.config.time_col)
-        report: Dict = {"config": asdict(self.config)}
+        cfg = self.config
+        report: Dict = {"config": asdict(cfg)}
 
+        self._check_columns(df, report)
+
+        # one sort by (series, time) serves every check; the frame is copied once at the end.
+        report["rows"] = len(df)
+        report["missingness"] = (df.isna().sum() / max(len(df), 1)).to_dict()
+        times = df[cfg.time_col]
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            times = pd.to_datetime(times)
+        times = times.to_numpy()
+        codes = series_codes(df, cfg.id_cols)
+        ordinals = period_ordinals(times, cfg.freq) if len(df) else np.zeros(0, dtype=np.int64)
+        order = series_time_order(codes, times, ordinals)
+        times, codes, ordinals = times[order], codes[order], ordinals[order]
+        target = df[cfg.target_col].to_numpy(dtype=np.float64)[order]
+
+        # duplicate keys are adjacent after the sort; the first occurrence is kept.
+        dup = np.zeros(len(order), dtype=bool)
+        dup[1:] = (codes[1:] == codes[:-1]) & (times[1:] == times[:-1])
+        report["duplicates"] = int(dup.sum())
+
+        bounds = bounds_from_codes(codes)
+        n_series = len(bounds) - 1
+        seg = np.repeat(np.arange(n_series), np.diff(bounds))
+        present = ~np.isnan(target)
+        quality = df.iloc[order[bounds[:-1]]][cfg.id_cols].reset_index(drop=True)
+        quality["rows"] = np.diff(bounds)
+        quality["duplicates"] = np.bincount(seg, weights=dup, minlength=n_series).astype(np.int64)
+        quality["target_missing"] = np.bincount(
+            seg, weights=~present, minlength=n_series
+        ).astype(np.int64)
+
+        unique = ~dup
+        quality["start"] = times[bounds[:-1]]
+        quality["end"] = times[bounds[1:] - 1]
+        quality["missing_periods"] = _missing_periods(ordinals[unique], seg[unique], n_series)
+
+        keep = unique & present
+        center, scale = robust_center_scale(target[keep], seg[keep], n_series)
+        z = np.abs(target[keep] - center[seg[keep]]) / scale[seg[keep]]
+        anomalies = z > cfg.anomaly_threshold
+        df = df.take(order[keep])
+        df[cfg.time_col] = times[keep]
+        df["is_anomaly"] = anomalies.astype(int)
+        quality["center"] = center
+        quality["scale"] = scale
+        quality["anomalies"] = np.bincount(seg[keep], weights=anomalies, minlength=n_series).astype(
+            np.int64
+        )
+
+        return df, _finish_report(report, quality)
+
+    def _check_columns(self, df: pd.DataFrame, report: Dict) -> None:
         if self.config.expected_columns:
             missing_cols = [
                 c for c in self.config.expected_columns if c not in df.columns
@@ -27,22 +88,94 @@ class DataQualityAgent:
                 report["missing_columns"] = missing_cols
                 raise ValueError(f"Missing columns: {missing_cols}")
 
-        report["rows"] = len(df)
-        report["duplicates"] = int(df.duplicated().sum())
-        if report["duplicates"] > 0:
-            df = df.drop_duplicates()
+    # validate() for data larger than memory: chunks are checked one at a time against
+    # mergeable per-series running statistics (counts, Welford mean/variance, first/last
+    # timestamp) and a key set ("exact", or a fixed-size "bloom" filter sized by
+    # expected_keys, whose rare false positives drop a row as a duplicate). Cleaned chunks go
+    # to an optional Parquet sink. The report has the same schema as validate(); center/scale
+    # are the running mean/std, not median/MAD.
+    def validate_stream(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        sink: str | pathlib.Path | None = None,
+        duplicate_check: str = "exact",
+        expected_keys: int = 10_000_000,
+        error_rate: float = 1e-3,
+    ) -> Dict:
+        cfg = self.config
+        if duplicate_check == "exact":
+            seen = ExactKeySet()
+        elif duplicate_check == "bloom":
+            seen = BloomFilter(expected_keys, error_rate)
+        else:
+            raise ValueError(f"Unknown duplicate check: {duplicate_check}")
+        report: Dict = {"config": asdict(cfg), "duplicate_check": duplicate_check}
+        stats = _StreamStats()
+        nulls: pd.Series | None = None
+        writer = None
+        if sink is not None:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        try:
+            for chunk in chunks:
+                if nulls is None:
+                    self._check_columns(chunk, report)
+                    nulls = chunk.isna().sum()
+                else:
+                    nulls = nulls.add(chunk.isna().sum(), fill_value=0)
+                cleaned = self._validate_chunk(chunk, seen, stats)
+                if sink is not None and len(cleaned):
+                    table = pa.Table.from_pandas(cleaned, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(str(sink), table.schema)
+                    writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
 
-        report["missingness"] = df.isna().mean().to_dict()
-        df = df.dropna(subset=[self.config.target_col])
+        report["rows"] = int(stats.rows.sum())
+        report["missingness"] = (
+            (nulls / max(report["rows"], 1)).to_dict() if nulls is not None else {}
+        )
+        report["duplicates"] = int(stats.duplicates.sum())
+        return _finish_report(report, stats.quality(cfg))
 
-        # Simple anomaly flag: z-score threshold on target
-        target = df[self.config.target_col]
-        z = (target - target.mean()) / (target.std() + 1e-8)
-        df["is_anomaly"] = (np.abs(z) > 4).astype(int)
-        report["anomaly_rate"] = float(df["is_anomaly"].mean())
+    def _validate_chunk(
+        self, chunk: pd.DataFrame, seen, stats: "_StreamStats"
+    ) -> pd.DataFrame:
+        cfg = self.config
+        if not pd.api.types.is_datetime64_any_dtype(chunk[cfg.time_col]):
+            chunk = chunk.assign(**{cfg.time_col: pd.to_datetime(chunk[cfg.time_col])})
+        codes = stats.codes(chunk, cfg.id_cols)
+        n = len(stats.rows)
+        hashes = pd.util.hash_pandas_object(
+            chunk[cfg.id_cols + [cfg.time_col]], index=False
+        ).to_numpy()
+        # repeats inside the chunk are found by unique(); earlier chunks by the key set.
+        first = np.zeros(len(chunk), dtype=bool)
+        first[np.unique(hashes, return_index=True)[1]] = True
+        dup = ~first
+        dup[first] = seen.check_and_add(hashes[first])
+        target = chunk[cfg.target_col].to_numpy(dtype=np.float64)
+        present = ~np.isnan(target)
+        unique = ~dup
+        times = chunk[cfg.time_col].to_numpy()
 
-        return df, report
+        stats.rows += np.bincount(codes, minlength=n)
+        stats.duplicates += np.bincount(codes, weights=dup, minlength=n).astype(np.int64)
+        stats.target_missing += np.bincount(codes, weights=~present, minlength=n).astype(np.int64)
+        stats.update_times(codes[unique], times[unique])
 
+        keep = unique & present
+        kept_codes, kept = codes[keep], target[keep]
+        stats.update_moments(kept_codes, kept)
+        center, scale = stats.center_scale()
+        z = np.abs(kept - center[kept_codes]) / scale[kept_codes]
+        anomalies = z > cfg.anomaly_threshold
+        stats.anomalies += np.bincount(kept_codes, weights=anomalies, minlength=n).astype(np.int64)
+        cleaned = chunk[keep].copy()
+        cleaned["is_anomaly"] = anomalies.astype(int)
+        return cleaned
 
 # Ensure validation set is strictly after train set in time.
     def check_leakage(self, train: pd.DataFrame, val: pd.DataFrame) -> None:
@@ -53,3 +186,143 @@ class DataQualityAgent:
                 f"Leakage detected: validation starts {min_val} before/at train end {max_train}"
             )
 
+
+def _finish_report(report: Dict, quality: pd.DataFrame) -> Dict:
+    kept = quality["rows"] - quality["duplicates"] - quality["target_missing"]
+    report["anomaly_rate"] = float(quality["anomalies"].sum() / max(kept.sum(), 1))
+    report["series"] = len(quality)
+    expected = quality["rows"] - quality["duplicates"] + quality["missing_periods"]
+    report["gap_rate"] = float(quality["missing_periods"].sum() / max(expected.sum(), 1))
+    report["series_quality"] = quality
+    return report
+
+
+# per-series running totals for validate_stream; arrays grow as new series appear.
+class _StreamStats:
+    COUNTERS = ("rows", "duplicates", "target_missing", "unique_rows", "anomalies")
+
+    def __init__(self):
+        self.keys: pd.Index | None = None
+        for name in self.COUNTERS:
+            setattr(self, name, np.zeros(0, dtype=np.int64))
+        self.start = np.zeros(0, dtype="datetime64[ns]")
+        self.end = np.zeros(0, dtype="datetime64[ns]")
+        self.moments = pd.DataFrame({"count": [], "mean": [], "m2": []})
+
+    def codes(self, chunk: pd.DataFrame, id_cols: List[str]) -> np.ndarray:
+        index = series_index(chunk, id_cols)
+        if self.keys is None:
+            self.keys = index[:0]
+        codes = self.keys.get_indexer(index)
+        if (codes < 0).any():
+            self.keys = self.keys.append(index[codes < 0].unique())
+            codes = self.keys.get_indexer(index)
+            self._grow(len(self.keys) - len(self.rows))
+        return codes
+
+    def _grow(self, extra: int) -> None:
+        for name in self.COUNTERS:
+            setattr(self, name, np.append(getattr(self, name), np.zeros(extra, dtype=np.int64)))
+        nat = np.full(extra, np.datetime64("NaT", "ns"))
+        self.start = np.append(self.start, nat)
+        self.end = np.append(self.end, nat)
+        self.moments = pd.concat(
+            [self.moments, pd.DataFrame(np.zeros((extra, 3)), columns=self.moments.columns)],
+            ignore_index=True,
+        )
+
+    def update_times(self, codes: np.ndarray, times: np.ndarray) -> None:
+        if len(codes):
+            times = times.astype("datetime64[ns]")
+            order = np.argsort(codes, kind="stable")
+            codes, times = codes[order], times[order]
+            starts = bounds_from_codes(codes)[:-1]
+            touched = codes[starts]
+            self.start[touched] = np.fmin(self.start[touched], np.minimum.reduceat(times, starts))
+            self.end[touched] = np.fmax(self.end[touched], np.maximum.reduceat(times, starts))
+        self.unique_rows += np.bincount(codes, minlength=len(self.rows))
+
+    # Chan merge of this chunk's per-series moments into the running ones.
+    def update_moments(self, codes: np.ndarray, values: np.ndarray) -> None:
+        n = len(self.rows)
+        count = np.bincount(codes, minlength=n).astype(np.float64)
+        total = np.bincount(codes, weights=values, minlength=n)
+        mean = np.divide(total, count, out=np.zeros(n), where=count > 0)
+        m2 = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=n)
+        chunk = pd.DataFrame({"count": count, "mean": mean, "m2": m2})
+        self.moments = merge_moments(self.moments, chunk)
+
+    def center_scale(self) -> Tuple[np.ndarray, np.ndarray]:
+        count = self.moments["count"].to_numpy()
+        m2 = self.moments["m2"].to_numpy()
+        var = np.divide(m2, count - 1, out=np.zeros(len(count)), where=count > 1)
+        std = np.sqrt(var)
+        return self.moments["mean"].to_numpy(), np.where(std > 0, std, np.inf)
+
+    def quality(self, config: DataConfig) -> pd.DataFrame:
+        names = config.id_cols if len(config.id_cols) > 1 else config.id_cols[0]
+        keys = self.keys if self.keys is not None else pd.Index([])
+        quality = keys.to_frame(index=False, name=names)
+        quality["rows"] = self.rows
+        quality["duplicates"] = self.duplicates
+        quality["target_missing"] = self.target_missing
+        quality["start"] = self.start
+        quality["end"] = self.end
+        # one period grid for every series: span minus the distinct timestamps seen.
+        n = len(self.rows)
+        ordinals = period_ordinals(np.concatenate([self.start, self.end]), config.freq) if n else self.rows
+        span = ordinals[n:] - ordinals[:n] + 1
+        quality["missing_periods"] = np.maximum(span - self.unique_rows, 0)
+        quality["center"], quality["scale"] = self.center_scale()
+        quality["anomalies"] = self.anomalies
+        return quality
+
+
+# periods absent between each series' first and last timestamp, from sorted period ordinals.
+def _missing_periods(ordinals: np.ndarray, seg: np.ndarray, n_series: int) -> np.ndarray:
+    if len(ordinals) < 2:
+        return np.zeros(n_series, dtype=np.int64)
+    step = np.diff(ordinals)
+    same = seg[1:] == seg[:-1]
+    gaps = np.where(same, np.maximum(step - 1, 0), 0)
+    return np.bincount(seg[1:], weights=gaps, minlength=n_series).astype(np.int64)
+
+
+# per-segment median and MAD-based scale (1.4826 * MAD, i.e. sigma for normal data) from one
+# sort per statistic; segments with MAD = 0 (e.g. intermittent demand) fall back to the mean
+# absolute deviation, and fully constant segments get scale inf (nothing is anomalous).
+def robust_center_scale(
+    values: np.ndarray, seg: np.ndarray, n_segments: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    counts = np.bincount(seg, minlength=n_segments)
+    center = _segment_median(values, seg, counts)
+    deviation = np.abs(values - center[seg])
+    scale = 1.4826 * _segment_median(deviation, seg, counts)
+    mean_dev = np.bincount(seg, weights=deviation, minlength=n_segments) / np.maximum(counts, 1)
+    scale = np.where(scale > 0, scale, 1.2533 * mean_dev)
+    return center, np.where(scale > 0, scale, np.inf)
+
+
+# medians of float32-rounded values per non-decreasing segment id: (segment, value) is packed
+# into one uint64 key (the float bits mapped to an order-preserving integer), so a single
+# np.sort ranks every segment at once.
+def _segment_median(values: np.ndarray, seg: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    if not len(values):
+        return np.full(len(counts), np.nan)
+    bits = values.astype(np.float32).view(np.uint32).astype(np.uint64)
+    negative = bits >> np.uint64(31) == 1
+    bits = np.where(negative, bits ^ np.uint64(0xFFFFFFFF), bits | np.uint64(0x80000000))
+    keys = np.sort((seg.astype(np.uint64) << np.uint64(32)) | bits)
+    low = keys & np.uint64(0xFFFFFFFF)
+    positive = low >> np.uint64(31) == 1
+    ranked = (
+        np.where(positive, low ^ np.uint64(0x80000000), low ^ np.uint64(0xFFFFFFFF))
+        .astype(np.uint32)
+        .view(np.float32)
+        .astype(np.float64)
+    )
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    last = len(ranked) - 1
+    lo = np.minimum(starts + (counts - 1) // 2, last)
+    hi = np.minimum(starts + counts // 2, last)
+    return np.where(counts > 0, (ranked[lo] + ranked[hi]) / 2, np.nan)
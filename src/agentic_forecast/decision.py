@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import asdict
-from typing import Dict, Tuple
+import itertools
+from dataclasses import asdict, replace
+from typing import Dict, Iterator, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
+from .allocation import newsvendor_allocation
 from .config import DecisionConfig
+from .profiling import span
+from .utils.sketch import QuantileSketch
 
 
 # converting forecasts to constrained allocations to simulate outcomes.
@@ -21,22 +25,12 @@ class DecisionAgent:
         df = forecast_df.copy()
         df["base_need"] = df["forecast"]
         df["safety"] = self.config.service_level * (df["upper"] - df["forecast"])
-        df["allocation"] = np.maximum(0, df["base_need"] + df["safety"])
-
-        total_allocation = df["allocation"].sum()
-        if total_allocation > self.config.capacity:
-            scale = self.config.capacity / (total_allocation + 1e-8)
-            df["allocation"] *= scale
+        df["allocation"], solver_info = self._allocate(df, self.config)
 
         cost = df["allocation"] * self.config.unit_cost
-        total_cost = cost.sum()
-        if total_cost > self.config.budget:
-            scale = self.config.budget / (total_cost + 1e-8)
-            df["allocation"] *= scale
-            cost = df["allocation"] * self.config.unit_cost
-
         df["cost"] = cost
         policy_info = {
+            **solver_info,
             "config": asdict(self.config),
             "capacity_utilization": float(df["allocation"].sum() / (self.config.capacity + 1e-8)),
             "budget_utilization": float(cost.sum() / (self.config.budget + 1e-8)),
@@ -46,35 +40,231 @@ class DecisionAgent:
         policy_info.update(sim["summary"])
         return df, policy_info
 
+    def _allocate(self, df: pd.DataFrame, config: DecisionConfig) -> Tuple[np.ndarray, Dict]:
+        if config.allocation_method == "newsvendor":
+            return self._newsvendor(df, config)
+        if config.allocation_method == "proportional":
+            return self._proportional(df, config), {}
+        raise ValueError(f"Unknown allocation method: {config.allocation_method}")
+
+    def _proportional(self, df: pd.DataFrame, config: DecisionConfig) -> np.ndarray:
+        allocation = np.maximum(
+            0, df["forecast"].to_numpy() + config.service_level * (df["upper"] - df["forecast"]).to_numpy()
+        )
+        total_allocation = allocation.sum()
+        if total_allocation > config.capacity:
+            allocation = allocation * config.capacity / (total_allocation + 1e-8)
+        total_cost = (allocation * config.unit_cost).sum()
+        if total_cost > config.budget:
+            allocation = allocation * config.budget / (total_cost + 1e-8)
+        return allocation
+
+    # unit limits per group: min(group capacity, group budget / unit cost); unlisted groups are unbounded.
+    def _group_limits(
+        self, df: pd.DataFrame, config: DecisionConfig
+    ) -> Tuple[np.ndarray | None, np.ndarray | None]:
+        if not config.group_col:
+            return None, None
+        codes, groups = pd.factorize(df[config.group_col])
+        capacity = config.group_capacity or {}
+        budget = config.group_budget or {}
+        limits = np.array(
+            [
+                min(
+                    capacity.get(g, np.inf),
+                    budget.get(g, np.inf) / max(config.unit_cost, 1e-8),
+                )
+                for g in groups
+            ]
+        )
+        return codes.astype(np.int64), limits
 
-# samples demand from a truncated normal centered at forecast with spread informed by the interval width.
-    def simulate_outcomes(self, df: pd.DataFrame, samples: int = 1000) -> Dict:
-        allocations = df["allocation"].values
-        mean = df["forecast"].values
-        spread = (df["upper"] - df["lower"]).values / 2 + 1e-3
+    def _newsvendor(self, df: pd.DataFrame, config: DecisionConfig) -> Tuple[np.ndarray, Dict]:
+        codes, limits = self._group_limits(df, config)
+        allocation, info = newsvendor_allocation(
+            mean=df["forecast"].to_numpy(dtype=np.float64),
+            sigma=_spread(df).astype(np.float64),
+            stockout_cost=config.stockout_cost,
+            holding_cost=config.holding_cost,
+            unit_cost=config.unit_cost,
+            group_codes=codes,
+            group_limits=limits,
+            total_limit=min(config.capacity, config.budget / max(config.unit_cost, 1e-8)),
+        )
+        return allocation, {
+            "binding_groups": info["binding_groups"],
+            "total_binding": info["total_binding"],
+        }
+
+    # draws per chunk so one float32 (draws, n_rows) buffer fits sim_memory_mb; callers work in
+    # that buffer (or count their temporaries in n_rows) to stay inside the budget.
+    def _chunk_size(self, n_rows: int, samples: int) -> int:
+        budget = int(self.config.sim_memory_mb * 1024**2)
+        return int(max(1, min(samples, budget // max(1, 4 * n_rows))))
 
-        rng = np.random.default_rng(7)
-        demand = rng.normal(loc=mean, scale=spread, size=(samples, len(df)))
-        demand = np.clip(demand, 0, None)
+    # yields float32 (rows, n) demand draws, clipped at zero, reusing one buffer; the stream
+    # depends only on the seed, so every caller sees the same scenarios (common random numbers).
+    def _demand_chunks(self, df: pd.DataFrame, samples: int, chunk: int) -> Iterator[np.ndarray]:
+        mean = df["forecast"].to_numpy(dtype=np.float32)
+        spread = _spread(df)
+        rng = np.random.default_rng(self.config.seed)
+        buffer = np.empty((chunk, len(df)), dtype=np.float32)
+        for start in range(0, samples, chunk):
+            demand = buffer[: min(chunk, samples - start)]
+            with span("decision.demand_chunk", rows=demand.size):
+                rng.standard_normal(dtype=np.float32, out=demand)
+                demand *= spread
+                demand += mean
+                np.maximum(demand, 0, out=demand)
+            yield demand
 
-        unmet = np.clip(demand - allocations, 0, None)
-        over = np.clip(allocations - demand, 0, None)
+    # samples demand from a normal clipped at zero, centered at forecast with spread informed by
+    # the interval width; samples are streamed in float32 chunks sized to sim_memory_mb.
+    def simulate_outcomes(self, df: pd.DataFrame, samples: int | None = None) -> Dict:
+        samples = samples or self.config.sim_samples
+        allocations = df["allocation"].to_numpy(dtype=np.float32)
+        allocated = float(allocations.sum(dtype=np.float64))
 
-        stockout_cost = unmet.sum(axis=1) * self.config.stockout_cost
-        holding_cost = over.sum(axis=1) * self.config.holding_cost
-        total_cost = stockout_cost + holding_cost + allocations.sum() * self.config.unit_cost
+        sketch = QuantileSketch()
+        cost_sum = 0.0
+        stockouts = 0
+        short_rows = 0
+        unmet_sum = 0.0
+
+        for demand in self._demand_chunks(df, samples, self._chunk_size(len(df), samples)):
+            with span("decision.sim_chunk", rows=demand.size):
+                # the clipped gap overwrites the draws, so the chunk needs no second buffer.
+                unmet, over = _shortfalls(demand, allocations, in_place=True)
+                short_rows += int(np.count_nonzero(demand))
+                unmet_sum += float(unmet.sum())
+                total_cost = (
+                    unmet * self.config.stockout_cost
+                    + over * self.config.holding_cost
+                    + allocated * self.config.unit_cost
+                )
+                cost_sum += float(total_cost.sum())
+                stockouts += int((unmet > 0).sum())
+                sketch.update(total_cost)
 
         violations = {
-            "capacity_violation": float(allocations.sum() > self.config.capacity),
-            "budget_violation": float((allocations * self.config.unit_cost).sum() > self.config.budget),
+            "capacity_violation": float(allocated > self.config.capacity),
+            "budget_violation": float(allocated * self.config.unit_cost > self.config.budget),
         }
 
         summary = {
-            "sim_mean_cost": float(np.mean(total_cost)),
-            "sim_p95_cost": float(np.quantile(total_cost, 0.95)),
-            "stockout_rate": float((unmet.sum(axis=1) > 0).mean()),
+            "sim_mean_cost": cost_sum / samples,
+            "sim_p95_cost": sketch.quantile(0.95),
+            # share of draws with any unmet unit anywhere; saturates at 1 on large panels
+            "stockout_rate": stockouts / samples,
+            # share of (draw, row) pairs short of demand, comparable with 1 - service_level
+            "row_stockout_rate": short_rows / (samples * max(len(df), 1)),
+            "mean_unmet": unmet_sum / samples,
             **violations,
         }
 
         return {"summary": summary}
 
+    # evaluates every (service_level, stockout_cost, holding_cost) policy against one shared set of
+    # demand draws: allocations are broadcast against each chunk and costs against the cost grid.
+    def policy_sweep(
+        self,
+        forecast_df: pd.DataFrame,
+        service_levels: Sequence[float],
+        stockout_costs: Sequence[float] | None = None,
+        holding_costs: Sequence[float] | None = None,
+        samples: int | None = None,
+    ) -> pd.DataFrame:
+        samples = samples or self.config.sim_samples
+        grid = pd.DataFrame(
+            list(
+                itertools.product(
+                    service_levels,
+                    stockout_costs or [self.config.stockout_cost],
+                    holding_costs or [self.config.holding_cost],
+                )
+            ),
+            columns=["service_level", "stockout_cost", "holding_cost"],
+        )
+        # the allocation depends on service level (proportional) or on the cost pair (newsvendor).
+        alloc_keys = (
+            ["stockout_cost", "holding_cost"]
+            if self.config.allocation_method == "newsvendor"
+            else ["service_level"]
+        )
+        alloc_codes, alloc_index = pd.MultiIndex.from_frame(grid[alloc_keys]).factorize()
+        allocations = np.stack(
+            [
+                self._allocate(
+                    forecast_df, replace(self.config, **dict(zip(alloc_keys, key)))
+                )[0]
+                for key in alloc_index
+            ]
+        ).astype(np.float32)
+        allocated = allocations.sum(axis=1, dtype=np.float64)
+
+        stockout = grid["stockout_cost"].to_numpy()[:, None]
+        holding = grid["holding_cost"].to_numpy()[:, None]
+        fixed = (allocated[alloc_codes] * self.config.unit_cost)[:, None]
+        sketches = [QuantileSketch(seed=i) for i in range(len(grid))]
+        cost_sum = np.zeros(len(grid))
+        stockouts = np.zeros(len(grid))
+        unmet_sum = np.zeros(len(grid))
+
+        chunk = self._chunk_size(len(forecast_df) * (len(allocations) + 1), samples)
+        for demand in self._demand_chunks(forecast_df, samples, chunk):
+            with span("decision.sweep_chunk", rows=demand.size, policies=len(grid)):
+                unmet, over = _shortfalls(demand[None], allocations[:, None])
+                unmet, over = unmet[alloc_codes], over[alloc_codes]
+                total_cost = unmet * stockout + over * holding + fixed
+                cost_sum += total_cost.sum(axis=1)
+                stockouts += (unmet > 0).sum(axis=1)
+                unmet_sum += unmet.sum(axis=1)
+                for sketch, costs in zip(sketches, total_cost):
+                    sketch.update(costs)
+
+        frontier = grid.assign(
+            allocated=allocated[alloc_codes],
+            capacity_utilization=allocated[alloc_codes] / (self.config.capacity + 1e-8),
+            mean_cost=cost_sum / samples,
+            p95_cost=[sketch.quantile(0.95) for sketch in sketches],
+            stockout_rate=stockouts / samples,
+            mean_unmet=unmet_sum / samples,
+        )
+        # costs are only comparable under the same cost assumptions, so dominance is per cost pair;
+        # expected unmet units is the risk axis (the stockout rate saturates on large panels).
+        frontier["pareto"] = False
+        for _, rows in frontier.groupby(["stockout_cost", "holding_cost"]).groups.items():
+            frontier.loc[rows, "pareto"] = pareto_mask(
+                frontier.loc[rows, "mean_cost"].to_numpy(),
+                frontier.loc[rows, "mean_unmet"].to_numpy(),
+            )
+        return frontier
+
+
+def _spread(df: pd.DataFrame) -> np.ndarray:
+    return ((df["upper"] - df["lower"]).to_numpy(dtype=np.float32) / 2 + 1e-3).astype(np.float32)
+
+
+# per-draw unmet and excess units summed over the last axis; allocations broadcast against demand.
+# in_place=True writes the gap into `demand` (which must have the result's shape) and leaves the
+# clipped unmet units there, instead of allocating a second draw-sized array.
+def _shortfalls(
+    demand: np.ndarray, allocations: np.ndarray, in_place: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    gap = np.subtract(demand, allocations, out=demand if in_place else None)
+    net = gap.sum(axis=-1, dtype=np.float64)
+    np.maximum(gap, 0, out=gap)
+    unmet = gap.sum(axis=-1, dtype=np.float64)
+    return unmet, unmet - net
+
+
+# True where no other point has lower-or-equal cost and risk with at least one strictly lower.
+def pareto_mask(cost: np.ndarray, risk: np.ndarray) -> np.ndarray:
+    order = np.lexsort((risk, cost))
+    mask = np.zeros(len(cost), dtype=bool)
+    best = np.inf
+    for i in order:
+        if risk[i] < best:
+            mask[i] = True
+            best = risk[i]
+    return mask
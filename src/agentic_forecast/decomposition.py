@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def regime_shift_flag(trend: pd.Series, window: int = 14, threshold: float = 2.0) -> pd.Series:
+    roll = trend.diff().rolling(window=window, min_periods=5).mean()
+    z = (roll - roll.mean()) / (roll.std() + 1e-8)
+    return (np.abs(z) > threshold).astype(int)
+
+
+# STL on a single series, falling back to a rolling mean when the fit fails.
+def decompose_series(
+    y: np.ndarray, period: Optional[int], robust: bool = True
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, str]:
+    from statsmodels.tsa.seasonal import STL
+
+    try:
+        res = STL(y, period=period, robust=robust).fit()
+        return (
+            np.asarray(res.trend),
+            np.asarray(res.seasonal),
+            np.asarray(res.resid),
+            "stl",
+        )
+    except Exception:
+        trend = pd.Series(y).rolling(window=period or 7, min_periods=3).mean()
+        remainder = y - trend.bfill().to_numpy()
+        return trend.to_numpy(), np.zeros(len(y)), remainder, "rolling"
+
+
+def _decompose_chunk(
+    args: Tuple[np.ndarray, np.ndarray, Optional[int], bool]
+) -> Tuple[np.ndarray, List[str], List[int]]:
+    values, bounds, period, robust = args
+    out = np.empty((4, len(values)), dtype=np.float64)
+    methods: List[str] = []
+    shifts: List[int] = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        trend, seasonal, remainder, method = decompose_series(
+            values[start:stop], period, robust
+        )
+        flag = regime_shift_flag(pd.Series(trend)).to_numpy()
+        out[0, start:stop] = trend
+        out[1, start:stop] = seasonal
+        out[2, start:stop] = remainder
+        out[3, start:stop] = flag
+        methods.append(method)
+        shifts.append(int(flag.sum()))
+    return out, methods, shifts
+
+
+# fits every series of an id-sorted target array, fanning chunks of series out to a process pool.
+def decompose_panel(
+    values: np.ndarray,
+    bounds: np.ndarray,
+    period: Optional[int],
+    n_workers: int = 1,
+    chunk_size: int = 256,
+    robust: bool = True,
+) -> Tuple[np.ndarray, List[str], List[int]]:
+    values = np.asarray(values, dtype=np.float64)
+    n_series = len(bounds) - 1
+    chunk_size = max(1, chunk_size)
+    offsets: List[int] = []
+    jobs = []
+    for first in range(0, n_series, chunk_size):
+        last = min(first + chunk_size, n_series)
+        lo, hi = bounds[first], bounds[last]
+        offsets.append(int(lo))
+        jobs.append((values[lo:hi], bounds[first:last + 1] - lo, period, robust))
+
+    if n_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            parts = list(pool.map(_decompose_chunk, jobs))
+    else:
+        parts = [_decompose_chunk(job) for job in jobs]
+
+    out = np.empty((4, len(values)), dtype=np.float64)
+    methods: List[str] = []
+    shifts: List[int] = []
+    for lo, (arr, chunk_methods, chunk_shifts) in zip(offsets, parts):
+        out[:, lo:lo + arr.shape[1]] = arr
+        methods.extend(chunk_methods)
+        shifts.extend(chunk_shifts)
+    return out, methods, shifts
+
+
+def summarize_methods(methods: List[str]) -> Dict:
+    counts = pd.Series(methods, dtype=object).value_counts().to_dict()
+    if len(counts) == 1:
+        overall = next(iter(counts))
+    elif counts:
+        overall = "mixed"
+    else:
+        overall = "none"
+    return {"decompose_method": overall, "method_counts": {k: int(v) for k, v in counts.items()}}
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple
+from typing import Dict, Iterable, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
@@ -41,3 +41,117 @@ def regret_vs_oracle(costs: pd.Series, oracle_cost: float) -> float:
 
 def violation_rate(violations: pd.Series) -> float:
     return float((violations > 0).mean())
+
+
+# additive per-row terms behind the grouped metrics. Every metric is a ratio of group sums, so
+# sums computed once per (model, split, series) roll up exactly to splits, models or any
+# hierarchy level with another bincount.
+COMPONENTS = (
+    "rows",
+    "abs_error",
+    "abs_actual",
+    "smape",
+    "scaled_error",
+    "scaled_rows",
+    "pinball",
+    "crps",
+)
+# quantile grid for the CRPS approximation below.
+CRPS_QUANTILES = tuple(np.round(np.linspace(0.05, 0.95, 19), 2))
+
+
+# mean pinball loss per row over quantile forecasts, given one column per quantile.
+def quantile_loss(
+    y_true: np.ndarray, columns: Iterable[np.ndarray], quantiles: Sequence[float]
+) -> np.ndarray:
+    loss = np.zeros(len(y_true))
+    for q, pred in zip(quantiles, columns):
+        diff = y_true - pred
+        loss += np.maximum(q * diff, (q - 1) * diff)
+    return loss / len(quantiles)
+
+
+# CRPS = 2 * integral of the pinball loss over quantile levels; on an even grid this is twice
+# the mean pinball loss (exact as the grid gets finer).
+def crps_from_quantiles(
+    y_true: np.ndarray, columns: Iterable[np.ndarray], quantiles: Sequence[float]
+) -> np.ndarray:
+    return 2 * quantile_loss(y_true, columns, quantiles)
+
+
+def segment_sums(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    columns = [np.bincount(codes, weights=col, minlength=n_groups) for col in values.T]
+    return np.column_stack(columns)
+
+
+# per-series MASE denominator: mean |y[t] - y[t - period]| over rows sorted by series then time;
+# series without a seasonal difference get NaN.
+def seasonal_scale(
+    y: np.ndarray, codes: np.ndarray, n_groups: int, period: int
+) -> np.ndarray:
+    same = codes[period:] == codes[:-period]
+    diff = np.abs(y[period:] - y[:-period])[same]
+    total = np.bincount(codes[period:][same], weights=diff, minlength=n_groups)
+    count = np.bincount(codes[period:][same], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = total / count
+    return np.where(scale > 0, scale, np.nan)
+
+
+# (n_groups, len(COMPONENTS)) sums. `scale` is the per-row MASE denominator; `pinball` and
+# `crps` are per-row losses (quantile_loss / crps_from_quantiles), absolute error when omitted.
+def metric_sums(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    scale: np.ndarray | None = None,
+    pinball: np.ndarray | None = None,
+    crps: np.ndarray | None = None,
+) -> np.ndarray:
+    y_true = np.asarray(y_true, dtype=np.float64)
+    abs_error = np.abs(y_true - y_pred)
+    abs_actual = np.abs(y_true)
+    smape_term = abs_error / ((abs_actual + np.abs(y_pred)) / 2 + 1e-8)
+    if scale is None:
+        scale = np.full(len(y_true), np.nan)
+    valid = np.isfinite(scale)
+    scaled = np.where(valid, abs_error / np.where(valid, scale, 1.0), 0.0)
+    terms = np.column_stack(
+        [
+            np.ones(len(y_true)),
+            abs_error,
+            abs_actual,
+            smape_term,
+            scaled,
+            valid,
+            abs_error / 2 if pinball is None else pinball,
+            abs_error if crps is None else crps,
+        ]
+    )
+    return segment_sums(terms, codes, n_groups)
+
+
+# metrics from COMPONENTS sums (any leading shape); matches evaluate_forecast on one group.
+def finish_metrics(sums: np.ndarray) -> Dict[str, np.ndarray]:
+    part = dict(zip(COMPONENTS, np.moveaxis(sums, -1, 0)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "rows": part["rows"],
+            "mae": part["abs_error"] / part["rows"],
+            "smape": part["smape"] / part["rows"],
+            "wape": part["abs_error"] / (part["abs_actual"] + 1e-8),
+            "mase": part["scaled_error"] / part["scaled_rows"],
+            "pinball": part["pinball"] / part["rows"],
+            "crps": part["crps"] / part["rows"],
+        }
+
+
+def grouped_metrics(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    **losses: np.ndarray,
+) -> pd.DataFrame:
+    return pd.DataFrame(finish_metrics(metric_sums(y_true, y_pred, codes, n_groups, **losses)))
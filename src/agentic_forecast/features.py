@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+# offset of every row within its series, given segment bounds from utils.data.segment_bounds.
+def segment_positions(bounds: np.ndarray) -> np.ndarray:
+    lengths = np.diff(bounds)
+    return np.arange(bounds[-1], dtype=np.int64) - np.repeat(bounds[:-1], lengths)
+
+
+def grouped_lag(
+    values: np.ndarray,
+    positions: np.ndarray,
+    lag: int,
+    dtype=np.float32,
+) -> np.ndarray:
+    out = np.full(len(values), np.nan, dtype=dtype)
+    if lag < len(values):
+        out[lag:] = values[:-lag] if lag > 0 else values
+    out[positions < lag] = np.nan
+    return out
+
+
+# STL components at t add up to y[t]; regime flags come from the two-sided STL trend and the
+# anomaly flag from y[t]. None has a known future value (the recursive forecaster would have to
+# zero them), so they stay in the frame for diagnostics but are never model features.
+NON_FEATURE_COLS = (
+    "trend",
+    "seasonal",
+    "remainder",
+    "regime_shift",
+    "regime_shift_lag",
+    "is_anomaly",
+)
+
+
+# trailing mean per series from global cumulative sums; NaNs are skipped like pandas rolling.
+# closed="right" ends the window at the current row, "left" at the row before it.
+def grouped_rolling_mean(
+    values: np.ndarray,
+    positions: np.ndarray,
+    window: int,
+    min_periods: int,
+    dtype=np.float32,
+    closed: str = "right",
+) -> np.ndarray:
+    if closed not in ("right", "left"):
+        raise ValueError(f"Unknown rolling window closure: {closed}")
+    valid = ~np.isnan(values)
+    csum = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(np.where(valid, values, 0.0), out=csum[1:])
+    ccount = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(valid, out=ccount[1:])
+
+    idx = np.arange(1, len(values) + 1)
+    if closed == "left":
+        idx = idx - 1
+        lo = idx - np.minimum(window, positions)
+    else:
+        lo = idx - 1 - np.minimum(window - 1, positions)
+    total = csum[idx] - csum[lo]
+    count = ccount[idx] - ccount[lo]
+    out = np.full(len(values), np.nan, dtype=dtype)
+    ok = count >= min_periods
+    out[ok] = total[ok] / count[ok]
+    return out
+
+
+# adds lag_<k> and rolling_mean_<w> columns in place on an id-sorted frame. Rolling means
+# cover the `w` rows before each row, the same window recursive_forecast reads from its
+# buffer, so y[t] never leaks into its own features.
+def add_lag_features(
+    df: pd.DataFrame,
+    target_col: str,
+    bounds: np.ndarray,
+    lags: List[int],
+    rolling_windows: Dict[int, int],
+) -> pd.DataFrame:
+    values = df[target_col].to_numpy(dtype=np.float64)
+    positions = segment_positions(bounds)
+    for lag in lags:
+        df[f"lag_{lag}"] = grouped_lag(values, positions, lag)
+    for window, min_periods in rolling_windows.items():
+        df[f"rolling_mean_{window}"] = grouped_rolling_mean(
+            values, positions, window, min_periods, closed="left"
+        )
+    return df
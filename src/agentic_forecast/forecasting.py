@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .features import segment_positions
+from .profiling import span
+from .utils.data import add_time_features, segment_bounds, sort_by_series
+
+# columns with no known future value (features.NON_FEATURE_COLS, so no model reads them);
+# forecast frames show them as "no event" rather than the last observed row's flags.
+ZERO_FUTURE_COLS = ("regime_shift", "regime_shift_lag", "is_anomaly")
+
+
+# (n_series, horizon) matrix of future timestamps following each series' last timestamp.
+def future_calendar(last_times: np.ndarray, freq: str, horizon: int) -> np.ndarray:
+    uniques, codes = np.unique(last_times, return_inverse=True)
+    grid = np.stack(
+        [pd.date_range(u, periods=horizon + 1, freq=freq)[1:].to_numpy() for u in uniques]
+    )
+    return grid[codes]
+
+
+def last_rows(df: pd.DataFrame, bounds: np.ndarray) -> pd.DataFrame:
+    return df.iloc[bounds[1:] - 1].reset_index(drop=True)
+
+
+# right-aligned (n_series, width) matrix of the trailing values of `col` per series.
+def trailing_matrix(df: pd.DataFrame, col: str, bounds: np.ndarray, width: int) -> np.ndarray:
+    values = df[col].to_numpy(dtype=np.float64)
+    positions = segment_positions(bounds)
+    lengths = np.repeat(np.diff(bounds), np.diff(bounds))
+    keep = positions >= lengths - width
+    rows = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds))[keep]
+    cols = width - (lengths - positions)[keep]
+    out = np.full((len(bounds) - 1, width), np.nan)
+    out[rows, cols] = values[keep]
+    return out
+
+
+def _window_mean(window: np.ndarray, min_periods: int) -> np.ndarray:
+    valid = ~np.isnan(window)
+    count = valid.sum(axis=1)
+    total = np.where(valid, window, 0.0).sum(axis=1)
+    out = np.full(len(window), np.nan)
+    ok = count >= min_periods
+    out[ok] = total[ok] / count[ok]
+    return out
+
+
+def _step_frame(
+    template: pd.DataFrame,
+    times: np.ndarray,
+    step: int,
+    time_col: str,
+    future_covariates: Optional[pd.DataFrame],
+    id_cols: List[str],
+) -> pd.DataFrame:
+    frame = template.copy()
+    frame[time_col] = times
+    for col in ZERO_FUTURE_COLS:
+        if col in frame.columns:
+            frame[col] = 0
+    if step == 0 and "regime_shift_lag" in frame.columns and "regime_shift" in template.columns:
+        frame["regime_shift_lag"] = template["regime_shift"].to_numpy()
+    if future_covariates is not None:
+        known = frame[id_cols + [time_col]].merge(
+            future_covariates, on=id_cols + [time_col], how="left"
+        )
+        for col in future_covariates.columns.difference(id_cols + [time_col]):
+            if col in frame.columns:
+                frame[col] = known[col].fillna(frame[col]).to_numpy()
+    add_time_features(frame, time_col, copy=False)
+    return frame
+
+
+# recursive multi-step forecast: one predict call per step for all series, feeding
+# predictions back into the lag/rolling features through a (n_series, context + horizon) buffer.
+def recursive_forecast(
+    history: pd.DataFrame,
+    predict_fn: Callable[[pd.DataFrame], np.ndarray],
+    horizon: int,
+    time_col: str,
+    target_col: str,
+    id_cols: List[str],
+    freq: str,
+    lags: List[int],
+    rolling_windows: Dict[int, int],
+    future_covariates: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    history = sort_by_series(history, id_cols, time_col)
+    bounds = segment_bounds(history, id_cols)
+    template = last_rows(history, bounds)
+    calendar = future_calendar(template[time_col].to_numpy(), freq, horizon)
+
+    context = max(list(lags) + list(rolling_windows) + [1])
+    buffer = np.full((len(template), context + horizon), np.nan)
+    buffer[:, :context] = trailing_matrix(history, target_col, bounds, context)
+
+    steps = []
+    for h in range(horizon):
+        frame = _step_frame(template, calendar[:, h], h, time_col, future_covariates, id_cols)
+        now = context + h
+        for lag in lags:
+            frame[f"lag_{lag}"] = buffer[:, now - lag].astype(np.float32)
+        for window, min_periods in rolling_windows.items():
+            frame[f"rolling_mean_{window}"] = _window_mean(
+                buffer[:, now - window:now], min_periods
+            ).astype(np.float32)
+
+        with span("forecast.predict_step", rows=len(frame), step=h + 1):
+            preds = np.asarray(predict_fn(frame), dtype=np.float64)
+        buffer[:, now] = preds
+        out = frame[id_cols + [time_col]].copy()
+        out["step"] = h + 1
+        out["forecast"] = preds
+        steps.append(out)
+
+    result = pd.concat(steps, ignore_index=True)
+    return sort_by_series(result, id_cols, time_col).reset_index(drop=True)
+
+
+# direct multi-horizon forecast: the step-h model maps features at the last observation to y[t + h].
+def direct_forecast(
+    history: pd.DataFrame,
+    step_predict_fns: List[Callable[[pd.DataFrame], np.ndarray]],
+    time_col: str,
+    id_cols: List[str],
+    freq: str,
+) -> pd.DataFrame:
+    history = sort_by_series(history, id_cols, time_col)
+    bounds = segment_bounds(history, id_cols)
+    template = last_rows(history, bounds)
+    calendar = future_calendar(template[time_col].to_numpy(), freq, len(step_predict_fns))
+
+    steps = []
+    for h, predict_fn in enumerate(step_predict_fns):
+        out = template[id_cols].copy()
+        out[time_col] = calendar[:, h]
+        out["step"] = h + 1
+        out["forecast"] = np.asarray(predict_fn(template), dtype=np.float64)
+        steps.append(out)
+    result = pd.concat(steps, ignore_index=True)
+    return sort_by_series(result, id_cols, time_col).reset_index(drop=True)
+
+
+def grouped_lead(values: np.ndarray, bounds: np.ndarray, steps: int) -> np.ndarray:
+    positions = segment_positions(bounds)
+    lengths = np.repeat(np.diff(bounds), np.diff(bounds))
+    out = np.full(len(values), np.nan)
+    out[:-steps] = values[steps:]
+    out[positions >= lengths - steps] = np.nan
+    return out
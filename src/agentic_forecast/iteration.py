@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import time
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cache import ArtifactCache
+from .config import IterationConfig, SystemConfig
+from .orchestrator import build_pipeline, run_pipeline
+from .pipeline import Pipeline
+
+# cheapest first: raising the service level reruns decision + critic, recalibrating starts at
+# calibrate, switching the model refits (or, for a new training mode, re-backtests).
+ACTION_ORDER = ("raise_service_level", "recalibrate", "switch_model")
+LOOP_METRICS = ("wape", "coverage_gap", "row_stockout_rate", "mean_unmet", "sim_mean_cost")
+
+
+# backtest WAPE of every portfolio model, keyed by (training mode, model name).
+def model_scores(mode: str, artifacts: Dict) -> Dict[Tuple[str, str], float]:
+    return {(mode, name): m.get("wape", np.inf) for name, m in artifacts["backtest"].items()}
+
+
+def loop_metrics(artifacts: Dict) -> Dict[str, float]:
+    interval_eval = artifacts["interval_eval"]
+    return {
+        "wape": artifacts["backtest"][artifacts["selected_model"]].get("wape", np.nan),
+        "coverage_gap": abs(interval_eval["coverage"] - interval_eval["nominal"]),
+        "row_stockout_rate": artifacts["decision_info"]["row_stockout_rate"],
+        "mean_unmet": artifacts["decision_info"]["mean_unmet"],
+        "sim_mean_cost": artifacts["decision_info"]["sim_mean_cost"],
+    }
+
+
+# the metric an action has to lower for its config change to be kept.
+TARGET_METRIC = {
+    "raise_service_level": "row_stockout_rate",
+    "recalibrate": "coverage_gap",
+    "switch_model": "wape",
+}
+
+
+# Closes the critic loop on one stage pipeline. Each iteration turns the cheapest open critic
+# action into a config change, reruns run_pipeline (only stages downstream of the change
+# recompute; the rest come from memory or the artifact cache) and keeps the change only if the
+# metric it targets went down. Stops when the critic has no actions, none can be applied, or
+# the iteration / wall-clock budget is spent; the time budget is checked between iterations.
+def run_iterations(
+    data_path: str,
+    config: SystemConfig | None = None,
+    pipeline: Pipeline | None = None,
+    dimensions_dir: str | None = None,
+) -> Dict:
+    config = copy.deepcopy(config) if config is not None else SystemConfig()
+    budget = config.iteration
+    if pipeline is None:
+        cache = None
+        if config.cache.directory:
+            cache = ArtifactCache(config.cache.directory, max_bytes=config.cache.max_bytes)
+        # two slots per stage keep the accepted outputs alive next to a rejected trial.
+        pipeline = build_pipeline(cache, config.pipeline.max_workers, memory_slots=2)
+
+    start = time.perf_counter()
+    artifacts = run_pipeline(data_path, config, dimensions_dir=dimensions_dir, pipeline=pipeline)
+    log = [_entry(0, None, {}, True, artifacts, None, time.perf_counter() - start, pipeline)]
+    tried: Set[Tuple[str, str]] = {(config.model.training_mode, artifacts["selected_model"])}
+    # every (training mode, model) scored so far, accepted run or not, for switch_model
+    scores = model_scores(config.model.training_mode, artifacts)
+    exhausted: Set[str] = set()
+    stop = "max_iterations"
+
+    iteration = 0
+    while iteration < budget.max_iterations:
+        if budget.time_budget is not None and time.perf_counter() - start >= budget.time_budget:
+            stop = "time_budget"
+            break
+        actions = {a["action"]: a for a in artifacts["critic"]["actions"]}
+        if not actions:
+            stop = "within_thresholds"
+            break
+        open_actions = [name for name in ACTION_ORDER if name in actions and name not in exhausted]
+        if not open_actions:
+            stop = "no_actions_left"
+            break
+        action = actions[open_actions[0]]
+        candidate = copy.deepcopy(config)
+        changes = apply_action(action, candidate, artifacts, budget, tried, scores)
+        if not changes:
+            exhausted.add(action["action"])
+            continue
+
+        iteration += 1
+        began = time.perf_counter()
+        trial = run_pipeline(data_path, candidate, dimensions_dir=dimensions_dir, pipeline=pipeline)
+        seconds = time.perf_counter() - began
+        scores.update(model_scores(candidate.model.training_mode, trial))
+        metric = TARGET_METRIC[action["action"]]
+        accepted = bool(loop_metrics(trial)[metric] < loop_metrics(artifacts)[metric])
+        log.append(_entry(iteration, action, changes, accepted, trial, artifacts, seconds, pipeline))
+        if accepted:
+            config, artifacts = candidate, trial
+        elif action["action"] != "switch_model":
+            # switch_model may still have untried candidates; the others would repeat themselves.
+            exhausted.add(action["action"])
+
+    return {
+        **artifacts,
+        "iterations": pd.DataFrame(log),
+        "stop_reason": stop,
+        "final_config": config,
+    }
+
+
+# mutates `config` for one critic action; returns {config path: (old, new)}, empty if the
+# action has nothing left to try. switch_model moves to the lowest-WAPE untried (training mode,
+# model) in `scores` that beats the served model, whatever its mode; with none left it tries an
+# unexplored IterationConfig.training_modes entry, whose run scores that mode's models.
+def apply_action(
+    action: Dict,
+    config: SystemConfig,
+    artifacts: Dict,
+    budget: IterationConfig,
+    tried: Set[Tuple[str, str]],
+    scores: Dict[Tuple[str, str], float] | None = None,
+) -> Dict[str, Tuple]:
+    name = action["action"]
+    if name == "raise_service_level":
+        old = config.decision.service_level
+        new = round(min(budget.max_service_level, old + budget.service_level_step), 6)
+        if new <= old:
+            return {}
+        config.decision.service_level = new
+        return {"decision.service_level": (old, new)}
+
+    if name == "recalibrate":
+        old = config.uncertainty.band_scale
+        factor = 1 + budget.band_step
+        new = old * factor if action["value"] < action["target"] else old / factor
+        config.uncertainty.band_scale = new
+        return {"uncertainty.band_scale": (old, new)}
+
+    if name == "switch_model":
+        mode = config.model.training_mode
+        scores = {**(scores or {}), **model_scores(mode, artifacts)}
+        current = scores[(mode, artifacts["selected_model"])]
+        better = sorted(
+            (score, key) for key, score in scores.items() if key not in tried and score < current
+        )
+        if better:
+            new_mode, model = better[0][1]
+            tried.add((new_mode, model))
+            changes = {"model.selected_model": (config.model.selected_model, model)}
+            if new_mode != mode:
+                changes["model.training_mode"] = (mode, new_mode)
+                config.model.training_mode = new_mode
+            config.model.selected_model = model
+            return changes
+        explored = {m for m, _ in tried} | {m for m, _ in scores}
+        for new_mode in budget.training_modes:
+            if new_mode not in explored:
+                tried.add((new_mode, ""))
+                changes = {"model.training_mode": (mode, new_mode)}
+                if config.model.selected_model is not None:
+                    changes["model.selected_model"] = (config.model.selected_model, None)
+                config.model.training_mode = new_mode
+                config.model.selected_model = None
+                return changes
+        return {}
+
+    raise ValueError(f"Unknown critic action: {name}")
+
+
+def _entry(
+    iteration: int,
+    action: Dict | None,
+    changes: Dict[str, Tuple],
+    accepted: bool,
+    artifacts: Dict,
+    previous: Dict | None,
+    seconds: float,
+    pipeline: Pipeline,
+) -> Dict:
+    metrics = loop_metrics(artifacts)
+    entry = {
+        "iteration": iteration,
+        "action": action["action"] if action else None,
+        "changes": "; ".join(f"{k}: {old} -> {new}" for k, (old, new) in changes.items()),
+        "accepted": accepted,
+        "seconds": seconds,
+        "stages_run": ",".join(k for k, v in pipeline.status.items() if v == "run"),
+        **metrics,
+    }
+    if previous is not None:
+        before = loop_metrics(previous)
+        entry.update({f"delta_{k}": metrics[k] - before[k] for k in LOOP_METRICS})
+    return entry
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Critic-driven pipeline iterations")
+    parser.add_argument("--data", required=True, help="Path to csv/parquet/arrow data.")
+    parser.add_argument("--horizon", type=int, default=None, help="Forecast horizon.")
+    parser.add_argument("--cache-dir", default=None, help="Reuse stage outputs across runs.")
+    parser.add_argument("--max-iterations", type=int, default=3)
+    parser.add_argument("--time-budget", type=float, default=None, help="Seconds.")
+    args = parser.parse_args()
+
+    config = SystemConfig()
+    config.cache.directory = args.cache_dir
+    config.iteration.max_iterations = args.max_iterations
+    config.iteration.time_budget = args.time_budget
+    if args.horizon:
+        config.data.horizon = args.horizon
+    result = run_iterations(args.data, config)
+    print(result["iterations"].to_string(index=False))
+    print("Stop:", result["stop_reason"])
+    print("Critic:", result["critic"])
+
+
+if __name__ == "__main__":
+    cli()
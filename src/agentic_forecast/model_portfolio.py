@@ -1,24 +1,48 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+import copy
+from functools import partial
+from typing import Dict, List, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
-from .config import BacktestConfig, DataConfig
+from .backtest import BacktestExecutor, BacktestResult
+from .cache import ArtifactCache, fingerprint, model_signature
+from .calibration import horizon_steps
+from .config import BacktestConfig, DataConfig, ModelConfig
 from .data_quality import DataQualityAgent
-from .evaluation import evaluate_forecast
-from .models.baselines import BaseForecastModel, SeasonalNaive
-from .models.boosted import GradientBoostedRegressor
-from .utils.data import rolling_origin_splits
-
-
-@dataclass
-class BacktestResult:
-    metrics: Dict[str, float]
-    residuals: np.ndarray
-    model_name: str
+from .evaluation import (
+    CRPS_QUANTILES,
+    crps_from_quantiles,
+    finish_metrics,
+    metric_sums,
+    quantile_loss,
+    seasonal_scale,
+    segment_sums,
+)
+from .features import NON_FEATURE_COLS
+from .forecasting import direct_forecast, grouped_lead, recursive_forecast
+from .models import model_class
+from .models.baselines import BaseForecastModel
+from .models.global_model import (
+    PARTITION_ID_COL,
+    SERIES_ID_COL,
+    DropColumnsModel,
+    GlobalForecastModel,
+    PartitionedForecastModel,
+)
+from .models.statistical import TIME_IDX_COL, statistical_bank, time_index
+from .utils.data import (
+    SplitPlan,
+    grouped_quantiles,
+    level_codes,
+    plan_rolling_origin,
+    segment_bounds,
+    series_codes,
+    series_index,
+    sort_by_series,
+)
 
 
 # manage multiple forecasting models and eval.
@@ -29,70 +53,299 @@ class ModelPortfolioAgent:
         data_config: DataConfig,
         backtest_config: BacktestConfig,
         models: List[BaseForecastModel] | None = None,
+        cache: ArtifactCache | None = None,
+        model_config: ModelConfig | None = None,
+        dimension_cols: Sequence[str] = (),
     ):
         self.data_config = data_config
+        # joined dimension attributes; features only when listed in attribute_features
+        self.dimension_cols = list(dimension_cols)
         self.backtest_config = backtest_config
-        self.models = models or [
-            SeasonalNaive(),
-            GradientBoostedRegressor(),
-        ]
+        self.model_config = model_config or ModelConfig()
+        if self.model_config.training_mode not in ("pooled", "global", "partitioned"):
+            raise ValueError(f"Unknown training mode: {self.model_config.training_mode}")
+        if self.model_config.training_mode == "partitioned" and not self.model_config.partition_col:
+            raise ValueError("Partitioned training requires ModelConfig.partition_col.")
+        if models is None:
+            period = 7 if data_config.freq == "D" else 1
+            models = [self._create(name, period) for name in self.model_config.models]
+            if self.model_config.statistical_baselines:
+                known = {m.name for m in models}
+                models += [m for m in statistical_bank(period=period) if m.name not in known]
+        # statistical baselines need series ids and period indices whatever the training mode
+        self.uses_panel = any(getattr(m, "uses_panel", False) for m in models)
+        self.models = [self._wrap(m) for m in models]
+        self.direct_models: List[BaseForecastModel] = []
+        self._series_keys: pd.Index | None = None
+        self._partition_keys: pd.Index | None = None
+        self._category_keys: Dict[str, pd.Index] = {}
         self.best_model: BaseForecastModel | None = None
         self.last_backtest: Dict[str, BacktestResult] = {}
+        self.split_plan: SplitPlan | None = None
+        self.executor = BacktestExecutor(
+            max_workers=backtest_config.max_workers,
+            backend=backtest_config.backend,
+            job_timeout=backtest_config.job_timeout,
+        )
         self.dq = DataQualityAgent(data_config)
+        self.cache = cache
+
+    @staticmethod
+    def _create(name: str, period: int) -> BaseForecastModel:
+        cls = model_class(name)
+        return cls(period=period) if getattr(cls, "uses_panel", False) else cls()
+
+    def _wrap(self, model: BaseForecastModel) -> BaseForecastModel:
+        mode = self.model_config.training_mode
+        if getattr(model, "uses_panel", False):
+            return model
+        if mode == "global":
+            model = GlobalForecastModel(model)
+        elif mode == "partitioned":
+            model = PartitionedForecastModel(model, max_workers=self.model_config.partition_workers)
+        if self.uses_panel:
+            # the panel columns are only for the statistical baselines; pooled models never
+            # see series codes, global/partitioned ones keep them as in a panel-free portfolio.
+            hidden = [TIME_IDX_COL] + ([SERIES_ID_COL] if mode == "pooled" else [])
+            model = DropColumnsModel(model, hidden)
+        return model
+
+    # adds encoded series/partition ids, period indices for statistical baselines and codes for
+    # non-numeric ModelConfig.attribute_features; encoders are fixed on first use so codes stay
+    # stable.
+    def _prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        extra = {}
+        for col in self.model_config.attribute_features:
+            if col not in df.columns:
+                raise ValueError(f"Attribute feature {col} is not in the frame.")
+            if pd.api.types.is_numeric_dtype(df[col]):
+                continue
+            if col not in self._category_keys:
+                self._category_keys[col] = pd.Index(df[col].unique())
+            extra[f"{col}_code"] = self._category_keys[col].get_indexer(df[col])
+        if self.model_config.training_mode == "pooled" and not self.uses_panel:
+            return df.assign(**extra) if extra else df
+        keys = series_index(df, self.data_config.id_cols)
+        if self._series_keys is None:
+            self._series_keys = keys.unique()
+        extra[SERIES_ID_COL] = self._series_keys.get_indexer(keys)
+        if self.uses_panel:
+            extra[TIME_IDX_COL] = time_index(df[self.data_config.time_col], self.data_config.freq)
+        if self.model_config.training_mode == "partitioned":
+            part = df[self.model_config.partition_col]
+            if self._partition_keys is None:
+                self._partition_keys = pd.Index(part.unique())
+            extra[PARTITION_ID_COL] = self._partition_keys.get_indexer(part)
+        return df.assign(**extra)
 
     def _feature_cols(self, df: pd.DataFrame) -> List[str]:
         ignore = set(
             self.data_config.id_cols
             + [self.data_config.time_col, self.data_config.target_col]
+            + list(NON_FEATURE_COLS)
         )
-        return [c for c in df.columns if c not in ignore]
-
-    def backtest(self, df: pd.DataFrame) -> Dict[str, BacktestResult]:
-        feature_cols = self._feature_cols(df)
-        results: Dict[str, List[BacktestResult]] = {m.name: [] for m in self.models}
+        if self.model_config.partition_col:
+            ignore.add(self.model_config.partition_col)
+        ignore.update(set(self.dimension_cols) - set(self.model_config.attribute_features))
+        # string/categorical columns only reach the models through their "<col>_code" encoding.
+        return [
+            c for c in df.columns if c not in ignore and pd.api.types.is_numeric_dtype(df[c])
+        ]
 
-        for train, val in rolling_origin_splits(
+    def plan_splits(self, df: pd.DataFrame) -> SplitPlan:
+        return plan_rolling_origin(
             df,
             time_col=self.data_config.time_col,
             val_size=self.backtest_config.val_size,
             step_size=self.backtest_config.step_size,
             min_train=self.data_config.min_train_points,
             n_splits=self.backtest_config.splits,
-        ):
-            self.dq.check_leakage(train, val)
-            X_train, y_train = train[feature_cols], train[self.data_config.target_col]
-            X_val, y_val = val[feature_cols], val[self.data_config.target_col]
-
-            for model in self.models:
-                fitted = model.fit(X_train, y_train)
-                preds = fitted.predict(X_val)
-                metrics = evaluate_forecast(y_val.values, preds)
-                residuals = y_val.values - preds
-                results[model.name].append(
-                    BacktestResult(metrics=metrics, residuals=residuals, model_name=model.name)
+        )
+
+    def backtest(
+        self, df: pd.DataFrame, plan: SplitPlan | None = None
+    ) -> Dict[str, BacktestResult]:
+        df = self._prepare(df)
+        feature_cols = self._feature_cols(df)
+        results: Dict[str, List[BacktestResult]] = {m.name: [] for m in self.models}
+
+        # sort and project once; every split below is a positional slice of these.
+        plan = plan or self.plan_splits(df)
+        self.split_plan = plan
+        ordered = plan.apply(df)
+        times = ordered[[self.data_config.time_col]]
+        X_all = ordered[feature_cols]
+        y_all = ordered[self.data_config.target_col]
+
+        for train_slice, val_slice in plan.splits:
+            self.dq.check_leakage(times.iloc[train_slice], times.iloc[val_slice])
+
+        keys: Dict[Tuple[int, int], str] = {}
+        cached: Dict[Tuple[int, int], BacktestResult] = {}
+        if self.cache is not None:
+            for split_idx, (train_slice, val_slice) in enumerate(plan.splits):
+                data_key = fingerprint(
+                    feature_cols,
+                    X_all.iloc[train_slice],
+                    y_all.iloc[train_slice],
+                    X_all.iloc[val_slice],
+                    y_all.iloc[val_slice],
                 )
+                for model_idx, model in enumerate(self.models):
+                    key = fingerprint("backtest", data_key, model.name, model_signature(model))
+                    keys[(split_idx, model_idx)] = key
+                    hit = self.cache.get(key)
+                    if hit is not None:
+                        cached[(split_idx, model_idx)] = hit
+
+        outcomes = self.executor.run(
+            self.models,
+            X_all,
+            y_all.to_numpy(dtype=np.float64),
+            plan.splits,
+            skip=set(cached),
+        )
+        if self.cache is not None:
+            for split_idx, model_idx, result in outcomes:
+                self.cache.put(keys[(split_idx, model_idx)], result)
+        outcomes += [(s, m, r) for (s, m), r in cached.items()]
+        # a model scored on only some splits is not comparable with the others: drop it.
+        failed = {f["model"] for f in self.executor.failures}
+        outcomes = [o for o in outcomes if self.models[o[1]].name not in failed]
+        if not outcomes and failed:
+            raise ValueError(f"Every model had a failed backtest job: {self.executor.failures}")
+        outcomes.sort(key=lambda o: (o[0], o[1]))
+        for split_idx, model_idx, result in outcomes:
+            val_slice = plan.splits[split_idx][1]
+            result.keys = self._residual_keys(
+                ordered.iloc[val_slice], result.residuals, split_idx
+            )
+            results[self.models[model_idx].name].append(result)
+        scores = self._score(ordered, y_all.to_numpy(dtype=np.float64), plan, outcomes)
 
         aggregated: Dict[str, BacktestResult] = {}
-        for name, res_list in results.items():
-            if not res_list:
-                continue
-            metrics_df = pd.DataFrame([r.metrics for r in res_list])
-            avg_metrics = metrics_df.mean().to_dict()
-            residuals = np.concatenate([r.residuals for r in res_list])
+        for model_idx, (avg_metrics, series_metrics, level_metrics) in scores.items():
+            name = self.models[model_idx].name
+            res_list = results[name]
             aggregated[name] = BacktestResult(
-                metrics=avg_metrics, residuals=residuals, model_name=name
+                metrics=avg_metrics,
+                residuals=np.concatenate([r.residuals for r in res_list]),
+                model_name=name,
+                keys=pd.concat([r.keys for r in res_list], ignore_index=True),
+                series_metrics=series_metrics,
+                level_metrics=level_metrics,
             )
         self.last_backtest = aggregated
         self.best_model = self._select_best()
         return aggregated
 
+    # scores every (split, model) validation row in one segment-reduction pass: sums per
+    # (model, split, series) give the split metrics (averaged per model as before), per-series
+    # tables and hierarchy levels, with no per-series Python work.
+    def _score(
+        self,
+        ordered: pd.DataFrame,
+        y: np.ndarray,
+        plan: SplitPlan,
+        outcomes: List[Tuple[int, int, BacktestResult]],
+    ) -> Dict[int, Tuple[Dict[str, float], pd.DataFrame, pd.DataFrame]]:
+        cfg = self.data_config
+        _, first, series = np.unique(
+            series_codes(ordered, cfg.id_cols), return_index=True, return_inverse=True
+        )
+        n_series, n_splits, n_models = len(first), len(plan.splits), len(self.models)
+        period = 7 if cfg.freq == "D" else 1
+        scales = []
+        for train_slice, _ in plan.splits:
+            order = np.argsort(series[train_slice], kind="stable")
+            codes = series[train_slice][order]
+            scales.append(seasonal_scale(y[train_slice][order], codes, n_series, period))
+        pin_qs = sorted(self.backtest_config.pinball_quantiles)
+        pin_tables = _residual_quantiles(outcomes, pin_qs)
+        crps_tables = _residual_quantiles(outcomes, CRPS_QUANTILES)
+
+        parts: Dict[str, List[np.ndarray]] = {
+            k: [] for k in ("y", "pred", "codes", "scale", "pinball", "crps")
+        }
+        for split_idx, model_idx, result in outcomes:
+            val_slice = plan.splits[split_idx][1]
+            y_val, codes = y[val_slice], series[val_slice]
+            pred = y_val - result.residuals
+            steps = result.keys["step"].to_numpy()
+            pin, crps = pin_tables[(split_idx, model_idx)], crps_tables[(split_idx, model_idx)]
+            parts["y"].append(y_val)
+            parts["pred"].append(pred)
+            parts["codes"].append((model_idx * n_splits + split_idx) * n_series + codes)
+            parts["scale"].append(scales[split_idx][codes])
+            parts["pinball"].append(
+                quantile_loss(y_val, (pred + pin[steps, k] for k in range(len(pin_qs))), pin_qs)
+            )
+            parts["crps"].append(
+                crps_from_quantiles(
+                    y_val,
+                    (pred + crps[steps, k] for k in range(len(CRPS_QUANTILES))),
+                    CRPS_QUANTILES,
+                )
+            )
+        flat = {k: np.concatenate(v) for k, v in parts.items()}
+        sums = metric_sums(
+            flat["y"],
+            flat["pred"],
+            flat["codes"],
+            n_models * n_splits * n_series,
+            scale=flat["scale"],
+            pinball=flat["pinball"],
+            crps=flat["crps"],
+        ).reshape(n_models, n_splits, n_series, -1)
+
+        present = np.zeros((n_models, n_splits), dtype=bool)
+        split_metrics = finish_metrics(sums.sum(axis=2))
+        split_metrics.pop("rows")
+        for split_idx, model_idx, result in outcomes:
+            present[model_idx, split_idx] = True
+            result.metrics = {k: float(v[model_idx, split_idx]) for k, v in split_metrics.items()}
+
+        attrs = ordered.iloc[first]
+        levels = self.backtest_config.metric_levels
+        if levels is None:
+            levels = [[]] + [[col] for col in cfg.id_cols]
+        levels = level_codes(attrs, levels)
+        scores = {}
+        for model_idx in np.flatnonzero(present.any(axis=1)):
+            mask = present[model_idx]
+            avg = {k: float(pd.Series(v[model_idx][mask]).mean()) for k, v in split_metrics.items()}
+            per_series = sums[model_idx].sum(axis=0)
+            series_metrics = attrs[cfg.id_cols].reset_index(drop=True).assign(
+                **finish_metrics(per_series)
+            )
+            level_metrics = pd.concat(
+                [
+                    pd.DataFrame({"level": name, "node": labels}).assign(
+                        **finish_metrics(segment_sums(per_series, codes, len(labels)))
+                    )
+                    for name, codes, labels in levels
+                ],
+                ignore_index=True,
+            )
+            scores[int(model_idx)] = (avg, series_metrics, level_metrics)
+        return scores
+
+    # segment keys for calibrating on validation residuals: ids, horizon step, predicted level,
+    # plus the split so residuals of different series can be lined up by (split, step).
+    def _residual_keys(
+        self, val: pd.DataFrame, residuals: np.ndarray, split_idx: int
+    ) -> pd.DataFrame:
+        cfg = self.data_config
+        keys = val[cfg.id_cols].reset_index(drop=True)
+        keys["split"] = split_idx
+        keys["step"] = horizon_steps(val[cfg.time_col].to_numpy())
+        keys["forecast"] = val[cfg.target_col].to_numpy(dtype=np.float64) - residuals
+        return keys
+
     def _select_best(self) -> BaseForecastModel:
         if not self.last_backtest:
             raise ValueError("Run backtest before selecting best model.")
-        sorted_models = sorted(
-            self.last_backtest.items(), key=lambda kv: kv[1].metrics.get("wape", np.inf)
-        )
-        best_name = sorted_models[0][0]
+        best_name = best_model_name(self.last_backtest, self.model_config.selected_model)
         for m in self.models:
             if m.name == best_name:
                 return m
@@ -100,15 +353,127 @@ class ModelPortfolioAgent:
 
     def fit_best(self, df: pd.DataFrame) -> BaseForecastModel:
         if self.best_model is None:
-            self._select_best()
+            self.best_model = self._select_best()
+        df = self._prepare(df)
         feature_cols = self._feature_cols(df)
         X, y = df[feature_cols], df[self.data_config.target_col]
+        key = None
+        if self.cache is not None:
+            key = fingerprint(
+                "fit", feature_cols, X, y, self.best_model.name, model_signature(self.best_model)
+            )
+            fitted = self.cache.get(key)
+            if fitted is not None:
+                self._replace_model(fitted)
+                return self.best_model
         self.best_model.fit(X, y)
+        if key is not None:
+            self.cache.put(key, self.best_model)
         return self.best_model
 
+    def _replace_model(self, fitted: BaseForecastModel) -> None:
+        self.models = [fitted if m is self.best_model else m for m in self.models]
+        self.best_model = fitted
+
     def predict(self, df: pd.DataFrame) -> np.ndarray:
         if self.best_model is None:
             raise ValueError("Model not fit. Call fit_best first.")
+        return self._predict_with(self.best_model, df)
+
+    def _predict_with(self, model: BaseForecastModel, df: pd.DataFrame) -> np.ndarray:
+        df = self._prepare(df)
         feature_cols = self._feature_cols(df)
-        return self.best_model.predict(df[feature_cols])
+        return model.predict(df[feature_cols])
 
+    # one copy of the best model per step h, trained on features at t against y[t + h].
+    def fit_direct(
+        self, df: pd.DataFrame, horizon: int | None = None
+    ) -> List[BaseForecastModel]:
+        if self.best_model is None:
+            self.best_model = self._select_best()
+        if getattr(self.best_model, "uses_panel", False):
+            raise ValueError(
+                f"{self.best_model.name} forecasts every step from one fit; "
+                "use the recursive strategy."
+            )
+        horizon = horizon or self.data_config.horizon
+        df = sort_by_series(df, self.data_config.id_cols, self.data_config.time_col)
+        bounds = segment_bounds(df, self.data_config.id_cols)
+        df = self._prepare(df)
+        X = df[self._feature_cols(df)]
+        y = df[self.data_config.target_col].to_numpy(dtype=np.float64)
+
+        self.direct_models = []
+        for h in range(1, horizon + 1):
+            lead = grouped_lead(y, bounds, h)
+            mask = ~np.isnan(lead)
+            model = copy.deepcopy(self.best_model)
+            model.fit(X[mask], pd.Series(lead[mask], index=X.index[mask]))
+            self.direct_models.append(model)
+        return self.direct_models
+
+    # future frame per series on DataConfig.freq; "recursive" feeds predictions back
+    # into lag/rolling features, "direct" uses the models from fit_direct.
+    def forecast(
+        self,
+        history: pd.DataFrame,
+        horizon: int | None = None,
+        strategy: str = "recursive",
+        future_covariates: pd.DataFrame | None = None,
+    ) -> pd.DataFrame:
+        cfg = self.data_config
+        horizon = horizon or cfg.horizon
+        if strategy == "recursive":
+            if self.best_model is None:
+                raise ValueError("Model not fit. Call fit_best first.")
+            return recursive_forecast(
+                history,
+                self.predict,
+                horizon,
+                time_col=cfg.time_col,
+                target_col=cfg.target_col,
+                id_cols=cfg.id_cols,
+                freq=cfg.freq,
+                lags=cfg.lags,
+                rolling_windows=cfg.rolling_windows,
+                future_covariates=future_covariates,
+            )
+        if strategy == "direct":
+            if len(self.direct_models) < horizon:
+                raise ValueError("Direct models not fit for this horizon. Call fit_direct first.")
+            return direct_forecast(
+                history,
+                [partial(self._predict_with, m) for m in self.direct_models[:horizon]],
+                time_col=cfg.time_col,
+                id_cols=cfg.id_cols,
+                freq=cfg.freq,
+            )
+        raise ValueError(f"Unknown forecast strategy: {strategy}")
+
+
+# lowest backtest WAPE, unless `selected` names one of the backtested models.
+def best_model_name(results: Dict[str, BacktestResult], selected: str | None = None) -> str:
+    if selected is not None:
+        if selected not in results:
+            raise ValueError(f"Selected model {selected} has no backtest results.")
+        return selected
+    return min(results, key=lambda name: results[name].metrics.get("wape", np.inf))
+
+
+# quantiles of each job's residuals per horizon step, estimated from the same model's other
+# splits (its own split when it has no other), so pinball and CRPS are scored out of sample.
+def _residual_quantiles(
+    outcomes: List[Tuple[int, int, BacktestResult]], quantiles: Sequence[float]
+) -> Dict[Tuple[int, int], np.ndarray]:
+    tables = {}
+    for split_idx, model_idx, result in outcomes:
+        others = [r for s, m, r in outcomes if m == model_idx and s != split_idx] or [result]
+        residuals = np.concatenate([r.residuals for r in others])
+        steps = np.concatenate([r.keys["step"].to_numpy() for r in others])
+        n_steps = int(max(steps.max(), result.keys["step"].max())) + 1
+        table = grouped_quantiles(residuals, steps, n_steps, quantiles)
+        # steps missing from the other splits fall back to the pooled residual quantiles.
+        tables[(split_idx, model_idx)] = np.where(
+            np.isnan(table), np.quantile(residuals, quantiles), table
+        )
+    return tables
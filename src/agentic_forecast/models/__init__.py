@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import importlib
+from typing import Any, Dict, Tuple
+
+# model name -> (module, class). Modules are imported on first use, so a run only loads the
+# backends (scikit-learn, xgboost, ...) of the models it selects. Bare module names resolve
+# inside agentic_forecast.models; register_model also takes fully qualified ones.
+MODEL_REGISTRY: Dict[str, Tuple[str, str]] = {
+    "seasonal_naive": ("baselines", "SeasonalNaive"),
+    "gbr": ("boosted", "GradientBoostedRegressor"),
+    "stat_seasonal_naive": ("statistical", "MatrixSeasonalNaive"),
+    "moving_average": ("statistical", "MovingAverage"),
+    "ses": ("statistical", "SimpleExpSmoothing"),
+    "holt": ("statistical", "HoltLinear"),
+    "theta": ("statistical", "Theta"),
+}
+
+# UncertaintyConfig.quantile_mode -> quantile model
+QUANTILE_REGISTRY: Dict[str, Tuple[str, str]] = {
+    "joint": ("multi_quantile", "MultiQuantileGradientBoosting"),
+    "per_quantile": ("quantile", "QuantileGradientBoosting"),
+}
+
+
+def register_model(name: str, module: str, cls: str) -> None:
+    MODEL_REGISTRY[name] = (module, cls)
+
+
+def model_class(name: str, registry: Dict[str, Tuple[str, str]] = MODEL_REGISTRY) -> type:
+    if name not in registry:
+        raise ValueError(f"Unknown model: {name}. Registered: {sorted(registry)}")
+    module, cls = registry[name]
+    if "." not in module:
+        module = f"{__name__}.{module}"
+    return getattr(importlib.import_module(module), cls)
+
+
+def create_model(name: str, **kwargs: Any):
+    return model_class(name)(**kwargs)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+# interface of every portfolio model: fit(X, y) returns self, predict(X) one value per row.
+class BaseForecastModel:
+    name = "base"
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "BaseForecastModel":
+        raise NotImplementedError
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        raise NotImplementedError
+
+    def get_params(self) -> Dict:
+        return {}
+
+    def metadata(self) -> Dict:
+        return {"name": self.name, **self.get_params()}
+
+
+# y[t] = y[t - period] read from the lag feature; rows without that lag get the training mean.
+class SeasonalNaive(BaseForecastModel):
+    name = "seasonal_naive"
+
+    def __init__(self, lag_col: str = "lag_7"):
+        self.lag_col = lag_col
+        self.default_ = 0.0
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "SeasonalNaive":
+        if self.lag_col not in X.columns:
+            raise ValueError(f"SeasonalNaive needs the {self.lag_col} feature column.")
+        target = np.asarray(y, dtype=np.float64)
+        self.default_ = float(np.nanmean(target)) if len(target) else 0.0
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        if self.lag_col not in X.columns:
+            raise ValueError(f"SeasonalNaive needs the {self.lag_col} feature column.")
+        lag = X[self.lag_col].to_numpy(dtype=np.float64)
+        return np.where(np.isfinite(lag), lag, self.default_)
+
+    def get_params(self) -> Dict:
+        return {"lag_col": self.lag_col}
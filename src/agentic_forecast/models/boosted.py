@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+from .baselines import BaseForecastModel
+
+
+# histogram gradient boosting on the lag/rolling/calendar features; missing lags are handled
+# natively by the histogram splits, so no imputation is needed.
+class GradientBoostedRegressor(BaseForecastModel):
+    name = "gbr"
+
+    def __init__(
+        self,
+        max_iter: int = 200,
+        learning_rate: float = 0.05,
+        max_leaf_nodes: int = 31,
+        min_samples_leaf: int = 20,
+        random_state: int = 0,
+    ):
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_samples_leaf = min_samples_leaf
+        self.random_state = random_state
+        self.model: HistGradientBoostingRegressor | None = None
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "GradientBoostedRegressor":
+        self.model = HistGradientBoostingRegressor(
+            max_iter=self.max_iter,
+            learning_rate=self.learning_rate,
+            max_leaf_nodes=self.max_leaf_nodes,
+            min_samples_leaf=self.min_samples_leaf,
+            random_state=self.random_state,
+        ).fit(_matrix(X), np.asarray(y, dtype=np.float64))
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        if self.model is None:
+            raise ValueError("Model not fit. Call fit first.")
+        return self.model.predict(_matrix(X))
+
+    def get_params(self) -> Dict:
+        return {
+            "max_iter": self.max_iter,
+            "learning_rate": self.learning_rate,
+            "max_leaf_nodes": self.max_leaf_nodes,
+            "min_samples_leaf": self.min_samples_leaf,
+            "random_state": self.random_state,
+        }
+
+
+def _matrix(X: pd.DataFrame) -> np.ndarray:
+    return np.asarray(X, dtype=np.float32)
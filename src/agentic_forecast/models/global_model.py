@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .baselines import BaseForecastModel
+
+SERIES_ID_COL = "series_id"
+PARTITION_ID_COL = "partition_id"
+LEVEL_FEATURE_PREFIXES = ("lag_", "rolling_mean_")
+
+
+# one model across all series: target and level features are divided by each series' mean |y|.
+class GlobalForecastModel(BaseForecastModel):
+
+    def __init__(
+        self,
+        base: BaseForecastModel,
+        scale_prefixes: Sequence[str] = LEVEL_FEATURE_PREFIXES,
+    ):
+        self.base = base
+        self.name = base.name
+        self.scale_prefixes = tuple(scale_prefixes)
+        self.scales_: np.ndarray | None = None
+        self.default_scale_ = 1.0
+
+    def _row_scale(self, codes: np.ndarray) -> np.ndarray:
+        scale = np.full(len(codes), self.default_scale_)
+        known = (codes >= 0) & (codes < len(self.scales_))
+        scale[known] = self.scales_[codes[known]]
+        return scale
+
+    def _transform(self, X: pd.DataFrame, scale: np.ndarray) -> pd.DataFrame:
+        cols = [c for c in X.columns if c.startswith(self.scale_prefixes)]
+        return X.assign(**{c: X[c].to_numpy(dtype=np.float64) / scale for c in cols})
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "GlobalForecastModel":
+        codes = X[SERIES_ID_COL].to_numpy(dtype=np.int64)
+        target = np.asarray(y, dtype=np.float64)
+        counts = np.bincount(codes)
+        sums = np.bincount(codes, weights=np.abs(target))
+        scales = np.divide(sums, counts, out=np.zeros(len(counts)), where=counts > 0)
+        self.default_scale_ = float(np.mean(np.abs(target))) or 1.0
+        scales[scales <= 1e-8] = self.default_scale_
+        self.scales_ = scales
+
+        scale = self._row_scale(codes)
+        self.base.fit(self._transform(X, scale), pd.Series(target / scale, index=X.index))
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        scale = self._row_scale(X[SERIES_ID_COL].to_numpy(dtype=np.int64))
+        return np.asarray(self.base.predict(self._transform(X, scale))) * scale
+
+    def get_params(self) -> Dict:
+        base = self.base.get_params() if hasattr(self.base, "get_params") else self.base.metadata()
+        return {"base": repr(sorted(base.items())), "scale_prefixes": self.scale_prefixes}
+
+    def metadata(self) -> Dict:
+        return {**self.base.metadata(), "training_mode": "global"}
+
+
+# a global model per partition (e.g. store or category), trained concurrently.
+class PartitionedForecastModel(BaseForecastModel):
+
+    def __init__(
+        self,
+        base: BaseForecastModel,
+        max_workers: int = 1,
+        scale_prefixes: Sequence[str] = LEVEL_FEATURE_PREFIXES,
+    ):
+        self.base = base
+        self.name = base.name
+        self.max_workers = max_workers
+        self.scale_prefixes = tuple(scale_prefixes)
+        self.partitions_: Dict[int, GlobalForecastModel] = {}
+
+    def _groups(self, X: pd.DataFrame) -> Dict[int, np.ndarray]:
+        codes = X[PARTITION_ID_COL].to_numpy(dtype=np.int64)
+        order = np.argsort(codes, kind="stable")
+        uniques, starts = np.unique(codes[order], return_index=True)
+        return {
+            int(u): order[a:b]
+            for u, a, b in zip(uniques, starts, list(starts[1:]) + [len(order)])
+        }
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "PartitionedForecastModel":
+        target = np.asarray(y, dtype=np.float64)
+        groups = self._groups(X)
+
+        def fit_one(rows: np.ndarray) -> GlobalForecastModel:
+            model = GlobalForecastModel(copy.deepcopy(self.base), self.scale_prefixes)
+            X_part = X.iloc[rows]
+            return model.fit(X_part, pd.Series(target[rows], index=X_part.index))
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            fitted: List[GlobalForecastModel] = list(pool.map(fit_one, groups.values()))
+        self.partitions_ = dict(zip(groups.keys(), fitted))
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        out = np.empty(len(X), dtype=np.float64)
+        for code, rows in self._groups(X).items():
+            if code not in self.partitions_:
+                raise ValueError(f"No model trained for partition code {code}.")
+            out[rows] = self.partitions_[code].predict(X.iloc[rows])
+        return out
+
+    def get_params(self) -> Dict:
+        base = self.base.get_params() if hasattr(self.base, "get_params") else self.base.metadata()
+        return {"base": repr(sorted(base.items())), "scale_prefixes": self.scale_prefixes}
+
+    def metadata(self) -> Dict:
+        return {
+            **self.base.metadata(),
+            "training_mode": "partitioned",
+            "partitions": len(self.partitions_),
+        }
+
+
+# hides portfolio bookkeeping columns (period indices, series codes) from a wrapped model, so
+# adding panel models to a portfolio does not change what the other models learn from.
+class DropColumnsModel(BaseForecastModel):
+
+    def __init__(self, base: BaseForecastModel, columns: Sequence[str]):
+        self.base = base
+        self.name = base.name
+        self.columns = tuple(columns)
+
+    def _visible(self, X: pd.DataFrame) -> pd.DataFrame:
+        return X.drop(columns=[c for c in self.columns if c in X.columns])
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "DropColumnsModel":
+        self.base.fit(self._visible(X), y)
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self.base.predict(self._visible(X))
+
+    def get_params(self) -> Dict:
+        base = self.base.get_params() if hasattr(self.base, "get_params") else self.base.metadata()
+        return {"base": repr(sorted(base.items())), "dropped": self.columns}
+
+    def metadata(self) -> Dict:
+        return self.base.metadata()
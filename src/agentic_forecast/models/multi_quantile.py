@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+from ..features import segment_positions
+from ..utils.data import grouped_quantiles
+
+
+# every quantile from one fit: a point booster plus a shallow tree that partitions rows by
+# residual scale; each leaf stores the empirical residual quantiles of held-out rows, so a
+# prediction is point + table[leaf] for the whole fan and quantiles cannot cross. The point
+# booster is refit on every row once the table is built.
+class MultiQuantileGradientBoosting:
+    name = "multi_quantile_gbr"
+
+    def __init__(
+        self,
+        quantiles: Sequence[float] = (0.05, 0.1, 0.5, 0.9, 0.95),
+        max_iter: int = 200,
+        learning_rate: float = 0.05,
+        calibration_fraction: float = 0.2,
+        max_leaf_nodes: int = 16,
+        min_leaf_rows: int = 50,
+        random_state: int = 0,
+    ):
+        self.quantiles = sorted(quantiles)
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.calibration_fraction = calibration_fraction
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_leaf_rows = min_leaf_rows
+        self.random_state = random_state
+        self.point_model = HistGradientBoostingRegressor(
+            max_iter=max_iter, learning_rate=learning_rate, random_state=random_state
+        )
+        self.leaf_model: DecisionTreeRegressor | None = None
+        self.leaf_ids_: np.ndarray | None = None
+        self.table_: np.ndarray | None = None
+
+    # the most recent calibration_fraction of each series' rows: rows are ranked by `times`
+    # (row order when None) within `series` (one series when None), so a series-sorted panel
+    # holds out the tail of every series rather than a block of whole series.
+    def _holdout(self, n_rows: int, series, times) -> np.ndarray:
+        codes = np.zeros(n_rows, dtype=np.int64) if series is None else pd.factorize(series)[0]
+        ranks = np.arange(n_rows) if times is None else np.asarray(times)
+        order = np.lexsort((ranks, codes))
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        bounds = np.append(starts, n_rows)
+        sizes = np.repeat(np.diff(bounds), np.diff(bounds))
+        held = segment_positions(bounds) >= sizes - np.floor(sizes * self.calibration_fraction)
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[order] = held
+        return mask
+
+    # the held-out rows supply the residuals of a point fit on the rest; series/times are row
+    # aligned arrays (e.g. the id and date columns of the training frame).
+    def fit(
+        self, X: pd.DataFrame, y: pd.Series, series=None, times=None
+    ) -> "MultiQuantileGradientBoosting":
+        target = np.asarray(y, dtype=np.float64)
+        held = self._holdout(len(target), series, times)
+        n_cal = int(held.sum())
+        if n_cal < self.min_leaf_rows or len(target) - n_cal < self.min_leaf_rows:
+            raise ValueError("Not enough rows to hold out a calibration set for quantiles.")
+        self.point_model.fit(X.loc[~held], target[~held])
+        X_cal = X.loc[held]
+        residuals = target[held] - self.point_model.predict(X_cal)
+
+        self.leaf_model = DecisionTreeRegressor(
+            max_leaf_nodes=self.max_leaf_nodes,
+            min_samples_leaf=self.min_leaf_rows,
+            random_state=self.random_state,
+        ).fit(X_cal, np.abs(residuals))
+        leaves = self.leaf_model.apply(X_cal)
+        self.leaf_ids_, codes = np.unique(leaves, return_inverse=True)
+        self.table_ = grouped_quantiles(residuals, codes, len(self.leaf_ids_), self.quantiles)
+        self.point_model.fit(X, target)
+        return self
+
+    # (n_rows, n_quantiles) matrix in ascending quantile order.
+    def predict_matrix(self, X: pd.DataFrame) -> np.ndarray:
+        if self.table_ is None:
+            raise ValueError("Model not fit. Call fit first.")
+        point = self.point_model.predict(X)
+        codes = np.searchsorted(self.leaf_ids_, self.leaf_model.apply(X))
+        return point[:, None] + self.table_[codes]
+
+    def predict(self, X: pd.DataFrame) -> Dict[float, np.ndarray]:
+        matrix = self.predict_matrix(X)
+        return {q: matrix[:, i] for i, q in enumerate(self.quantiles)}
+
+    def get_params(self) -> Dict:
+        return {
+            "quantiles": tuple(self.quantiles),
+            "max_iter": self.max_iter,
+            "learning_rate": self.learning_rate,
+            "calibration_fraction": self.calibration_fraction,
+            "max_leaf_nodes": self.max_leaf_nodes,
+            "min_leaf_rows": self.min_leaf_rows,
+        }
+
+    def metadata(self) -> Dict:
+        return {"name": self.name, **self.get_params()}
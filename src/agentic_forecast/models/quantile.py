@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+
+# one pinball-loss booster per quantile; quantiles are fit independently and can cross
+# (models/multi_quantile.py is the non-crossing alternative).
+class QuantileGradientBoosting:
+    name = "quantile_gbr"
+
+    def __init__(
+        self,
+        quantiles: Sequence[float] = (0.1, 0.5, 0.9),
+        max_iter: int = 200,
+        learning_rate: float = 0.05,
+        random_state: int = 0,
+    ):
+        self.quantiles = sorted(quantiles)
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.random_state = random_state
+        self.models: Dict[float, HistGradientBoostingRegressor] = {}
+
+    # series/times match MultiQuantileGradientBoosting.fit; every row is a training row here.
+    def fit(
+        self, X: pd.DataFrame, y: pd.Series, series=None, times=None
+    ) -> "QuantileGradientBoosting":
+        matrix = np.asarray(X, dtype=np.float32)
+        target = np.asarray(y, dtype=np.float64)
+        self.models = {
+            q: HistGradientBoostingRegressor(
+                loss="quantile",
+                quantile=q,
+                max_iter=self.max_iter,
+                learning_rate=self.learning_rate,
+                random_state=self.random_state,
+            ).fit(matrix, target)
+            for q in self.quantiles
+        }
+        return self
+
+    def predict(self, X: pd.DataFrame) -> Dict[float, np.ndarray]:
+        if not self.models:
+            raise ValueError("Model not fit. Call fit first.")
+        matrix = np.asarray(X, dtype=np.float32)
+        return {q: model.predict(matrix) for q, model in self.models.items()}
+
+    def get_params(self) -> Dict:
+        return {
+            "quantiles": tuple(self.quantiles),
+            "max_iter": self.max_iter,
+            "learning_rate": self.learning_rate,
+            "random_state": self.random_state,
+        }
+
+    def metadata(self) -> Dict:
+        return {"name": self.name, **self.get_params()}
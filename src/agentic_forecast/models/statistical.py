@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .baselines import BaseForecastModel
+from .global_model import SERIES_ID_COL
+
+TIME_IDX_COL = "time_idx"
+
+
+# period ordinals on `freq`, so consecutive periods differ by one whatever the calendar.
+def time_index(times: pd.Series | np.ndarray, freq: str) -> np.ndarray:
+    return pd.DatetimeIndex(times).to_period(freq).asi8.astype(np.int64)
+
+
+# classical baselines over an (n_series, n_time) matrix. fit() pivots the (series_id, time_idx)
+# rows the portfolio adds for `uses_panel` models into a matrix with NaN for missing periods and
+# runs the model's recursion for every series at once, so the cost is a loop over periods, never
+# over series. predict() returns the one-step-ahead in-sample fit for rows inside the fit window
+# and the h-step forecast from the final state for rows after it. With `period` > 1 and
+# `deseasonalize`, series are divided by multiplicative phase indices before fitting.
+class MatrixForecastModel(BaseForecastModel):
+    name = "matrix"
+    uses_panel = True
+    deseasonalize = True
+
+    def __init__(self, period: int = 1):
+        self.period = period
+        self.start_ = 0
+        self.fitted_: np.ndarray | None = None
+        self.seasonal_: np.ndarray | None = None
+        self.default_ = 0.0
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "MatrixForecastModel":
+        codes = X[SERIES_ID_COL].to_numpy(dtype=np.int64)
+        times = X[TIME_IDX_COL].to_numpy(dtype=np.int64)
+        target = np.asarray(y, dtype=np.float64)
+        if not len(target):
+            raise ValueError("Cannot fit a statistical baseline on an empty frame.")
+        start = int(times.min())
+        Y = np.full((int(codes.max()) + 1, int(times.max()) - start + 1), np.nan)
+        Y[codes, times - start] = target
+        return self.fit_matrix(Y, start)
+
+    # matrix entry point behind fit(): Y is (n_series, n_time) with NaN for missing periods and
+    # column 0 at period ordinal `start`.
+    def fit_matrix(self, Y: np.ndarray, start: int = 0) -> "MatrixForecastModel":
+        if not np.isfinite(Y).any():
+            raise ValueError("Cannot fit a statistical baseline without observations.")
+        self.start_ = start
+        self.default_ = float(np.nanmean(Y))
+        self.seasonal_ = None
+        if self.deseasonalize and self.period > 1:
+            phases = self._phases(start + np.arange(Y.shape[1]))
+            self.seasonal_ = _seasonal_indices(Y, phases, self.period)
+            Y = Y / self.seasonal_[:, phases]
+        self.fitted_ = self._fit_matrix(Y).astype(np.float32)
+        return self
+
+    # (n_series, horizon) forecasts for the periods right after the fit window.
+    def forecast_matrix(self, horizon: int) -> np.ndarray:
+        if self.fitted_ is None:
+            raise ValueError("Model not fit. Call fit first.")
+        n_series, n_time = self.fitted_.shape
+        codes = np.repeat(np.arange(n_series), horizon)
+        times = np.tile(self.start_ + n_time - 1 + np.arange(1, horizon + 1), n_series)
+        return self._predict_codes(codes, times).reshape(n_series, horizon)
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        if self.fitted_ is None:
+            raise ValueError("Model not fit. Call fit first.")
+        codes = X[SERIES_ID_COL].to_numpy(dtype=np.int64)
+        times = X[TIME_IDX_COL].to_numpy(dtype=np.int64)
+        return self._predict_codes(codes, times)
+
+    def _predict_codes(self, codes: np.ndarray, times: np.ndarray) -> np.ndarray:
+        n_series, n_time = self.fitted_.shape
+        cols = times - self.start_
+        out = np.full(len(codes), np.nan)
+        known = (codes >= 0) & (codes < n_series) & (cols >= 0)
+        inside = known & (cols < n_time)
+        ahead = known & (cols >= n_time)
+        out[inside] = self.fitted_[codes[inside], cols[inside]]
+        out[ahead] = self._forecast(codes[ahead], cols[ahead] - n_time + 1)
+        if self.seasonal_ is not None:
+            out[known] *= self.seasonal_[codes[known], self._phases(times[known])]
+        # unknown series, rows before the window and series without history: training mean.
+        return np.where(np.isfinite(out), out, self.default_)
+
+    def _phases(self, times: np.ndarray) -> np.ndarray:
+        return times % self.period
+
+    # one-step-ahead in-sample predictions; stores whatever _forecast needs.
+    def _fit_matrix(self, Y: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    # h-step forecasts (h >= 1) for the given series codes.
+    def _forecast(self, codes: np.ndarray, h: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def get_params(self) -> Dict:
+        return {"period": self.period}
+
+    def metadata(self) -> Dict:
+        return {"name": self.name, **self.get_params()}
+
+
+# y[t + h] = last observed value of the same phase; missing periods are forward filled.
+class MatrixSeasonalNaive(MatrixForecastModel):
+    name = "stat_seasonal_naive"
+    deseasonalize = False
+
+    def __init__(self, period: int = 7):
+        super().__init__(period)
+        self.tail_: np.ndarray | None = None
+
+    def _fit_matrix(self, Y: np.ndarray) -> np.ndarray:
+        filled = _forward_fill(Y)
+        lag = max(self.period, 1)
+        fitted = np.full(Y.shape, np.nan)
+        fitted[:, lag:] = filled[:, :-lag]
+        self.tail_ = filled[:, -lag:]
+        return fitted
+
+    def _forecast(self, codes: np.ndarray, h: np.ndarray) -> np.ndarray:
+        lag = self.tail_.shape[1]
+        return self.tail_[codes, (h - 1) % lag]
+
+
+# mean of the last `window` periods, with the window picked per series from a grid.
+class MovingAverage(MatrixForecastModel):
+    name = "moving_average"
+
+    def __init__(self, windows: Sequence[int] = (7, 14, 28), period: int = 7):
+        super().__init__(period)
+        self.windows = tuple(windows)
+        self.level_: np.ndarray | None = None
+        self.window_: np.ndarray | None = None
+
+    def _fit_matrix(self, Y: np.ndarray) -> np.ndarray:
+        observed = np.isfinite(Y)
+        zero = np.zeros((len(Y), 1))
+        sums = np.concatenate([zero, np.cumsum(np.where(observed, Y, 0.0), axis=1)], axis=1)
+        counts = np.concatenate([zero, np.cumsum(observed, axis=1)], axis=1)
+        best_mse = np.full(len(Y), np.inf)
+        fitted = np.full(Y.shape, np.nan)
+        self.level_ = np.full(len(Y), np.nan)
+        self.window_ = np.zeros(len(Y), dtype=np.int64)
+        # column t of `means` averages periods [t - w, t): the fit for t, or the forecast at T.
+        for window in self.windows:
+            lagged = np.maximum(np.arange(sums.shape[1]) - window, 0)
+            n = counts - counts[:, lagged]
+            means = np.divide(
+                sums - sums[:, lagged], n, out=np.full(sums.shape, np.nan), where=n > 0
+            )
+            mse = _mse(Y, means[:, :-1])
+            better = mse < best_mse
+            best_mse[better] = mse[better]
+            fitted[better] = means[better, :-1]
+            self.level_[better] = means[better, -1]
+            self.window_[better] = window
+        return fitted
+
+    def _forecast(self, codes: np.ndarray, h: np.ndarray) -> np.ndarray:
+        return self.level_[codes]
+
+    def get_params(self) -> Dict:
+        return {"windows": self.windows, "period": self.period}
+
+
+# simple exponential smoothing; alpha picked per series by in-sample one-step MSE over a grid.
+class SimpleExpSmoothing(MatrixForecastModel):
+    name = "ses"
+
+    def __init__(
+        self, alphas: Sequence[float] = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9), period: int = 7
+    ):
+        super().__init__(period)
+        self.alphas = tuple(alphas)
+        self.level_: np.ndarray | None = None
+        self.alpha_: np.ndarray | None = None
+
+    def _fit_matrix(self, Y: np.ndarray) -> np.ndarray:
+        grid = np.asarray(self.alphas)[None, :]
+        mse = _holt(Y, grid, np.zeros_like(grid), 1.0)[0]
+        self.alpha_ = grid[0, _best(mse)]
+        mse, fitted, self.level_, _ = _holt(Y, self.alpha_[:, None], 0.0, 1.0, store=True)
+        return fitted
+
+    def _forecast(self, codes: np.ndarray, h: np.ndarray) -> np.ndarray:
+        return self.level_[codes]
+
+    def get_params(self) -> Dict:
+        return {"alphas": self.alphas, "period": self.period}
+
+
+# Holt's (optionally damped) linear trend; (alpha, beta) picked per series over the grid.
+class HoltLinear(MatrixForecastModel):
+    name = "holt"
+
+    def __init__(
+        self,
+        alphas: Sequence[float] = (0.1, 0.3, 0.5, 0.8),
+        betas: Sequence[float] = (0.01, 0.05, 0.1, 0.2),
+        phi: float = 0.98,
+        period: int = 7,
+    ):
+        super().__init__(period)
+        self.alphas = tuple(alphas)
+        self.betas = tuple(betas)
+        self.phi = phi
+        self.level_: np.ndarray | None = None
+        self.trend_: np.ndarray | None = None
+
+    def _fit_matrix(self, Y: np.ndarray) -> np.ndarray:
+        alpha, beta = (g.ravel()[None, :] for g in np.meshgrid(self.alphas, self.betas))
+        best = _best(_holt(Y, alpha, beta, self.phi)[0])
+        _, fitted, self.level_, self.trend_ = _holt(
+            Y, alpha[0, best][:, None], beta[0, best][:, None], self.phi, store=True
+        )
+        return fitted
+
+    def _forecast(self, codes: np.ndarray, h: np.ndarray) -> np.ndarray:
+        if self.phi == 1.0:
+            damped = h.astype(np.float64)
+        else:
+            damped = self.phi * (1 - self.phi**h) / (1 - self.phi)
+        return self.level_[codes] + damped * self.trend_[codes]
+
+    def get_params(self) -> Dict:
+        return {"alphas": self.alphas, "betas": self.betas, "phi": self.phi, "period": self.period}
+
+
+# Theta method as SES with drift (Hyndman & Billah): the SES level plus half the OLS slope of
+# y on time, y[T + h] = l_T + b / 2 * (h - 1 + (1 - (1 - alpha) ** n) / alpha).
+class Theta(SimpleExpSmoothing):
+    name = "theta"
+
+    def __init__(
+        self, alphas: Sequence[float] = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9), period: int = 7
+    ):
+        super().__init__(alphas, period)
+        self.slope_: np.ndarray | None = None
+        self.drift_: np.ndarray | None = None
+
+    def _fit_matrix(self, Y: np.ndarray) -> np.ndarray:
+        fitted = super()._fit_matrix(Y)
+        observed = np.isfinite(Y)
+        n = observed.sum(axis=1)
+        self.slope_ = _ols_slope(Y, observed, n)
+        self.drift_ = self.slope_ / 2 * (1 - (1 - self.alpha_) ** n) / self.alpha_
+        # the in-sample fit reuses the one-step drift of the full window.
+        return fitted + self.drift_[:, None]
+
+    def _forecast(self, codes: np.ndarray, h: np.ndarray) -> np.ndarray:
+        return self.level_[codes] + self.slope_[codes] / 2 * (h - 1) + self.drift_[codes]
+
+
+def statistical_bank(period: int = 7) -> List[MatrixForecastModel]:
+    return [
+        MatrixSeasonalNaive(period=period),
+        MovingAverage(period=period),
+        SimpleExpSmoothing(period=period),
+        HoltLinear(period=period),
+        Theta(period=period),
+    ]
+
+
+# error-correction Holt recursion over every series and grid column at once: Y is
+# (n_series, n_time), alpha/beta broadcast against (n_series, n_grid). A series starts at its
+# first observation (level = y, trend = 0); missing periods advance the state without an update.
+# Returns the per-column one-step MSE and, with store=True (n_grid == 1), the in-sample fit and
+# the final level and trend.
+def _holt(
+    Y: np.ndarray, alpha, beta, phi: float, store: bool = False
+) -> Tuple[np.ndarray, np.ndarray | None, np.ndarray | None, np.ndarray | None]:
+    n_series, n_time = Y.shape
+    shape = np.broadcast(np.empty((n_series, 1)), alpha, beta).shape
+    level = np.full(shape, np.nan)
+    trend = np.zeros(shape)
+    sse = np.zeros(shape)
+    count = np.zeros(shape)
+    fitted = np.full(Y.shape, np.nan) if store else None
+    for t in range(n_time):
+        y = Y[:, t, None]
+        pred = level + phi * trend
+        if store:
+            fitted[:, t] = pred[:, 0]
+        error = y - pred
+        ok = np.isfinite(error)
+        sse += np.where(ok, error * error, 0.0)
+        count += ok
+        step = np.where(ok, error, 0.0)
+        trend = phi * trend + alpha * beta * step
+        # first observation initialises the level; missing periods keep the prediction.
+        level = np.where(ok, pred + alpha * step, np.where(np.isfinite(y), y, pred))
+    mse = np.divide(sse, count, out=np.full(shape, np.inf), where=count > 0)
+    if not store:
+        return mse, None, None, None
+    return mse[:, 0], fitted, level[:, 0], trend[:, 0]
+
+
+def _mse(Y: np.ndarray, fitted: np.ndarray) -> np.ndarray:
+    error = Y - fitted
+    ok = np.isfinite(error)
+    count = ok.sum(axis=1)
+    sse = np.where(ok, error * error, 0.0).sum(axis=1)
+    return np.divide(sse, count, out=np.full(len(Y), np.inf), where=count > 0)
+
+
+# grid column with the lowest MSE per series (the first one when nothing was scored).
+def _best(mse: np.ndarray) -> np.ndarray:
+    return np.argmin(mse, axis=1)
+
+
+def _forward_fill(Y: np.ndarray) -> np.ndarray:
+    idx = np.where(np.isfinite(Y), np.arange(Y.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return Y[np.arange(len(Y))[:, None], idx]
+
+
+def _ols_slope(Y: np.ndarray, observed: np.ndarray, n: np.ndarray) -> np.ndarray:
+    t = np.where(observed, np.arange(Y.shape[1], dtype=np.float64), 0.0)
+    y = np.where(observed, Y, 0.0)
+    safe = np.maximum(n, 1)
+    t_mean, y_mean = t.sum(axis=1) / safe, y.sum(axis=1) / safe
+    cov = (t * y).sum(axis=1) / safe - t_mean * y_mean
+    var = (t * t).sum(axis=1) / safe - t_mean**2
+    return np.divide(cov, var, out=np.zeros(len(Y)), where=(n > 1) & (var > 1e-12))
+
+
+# per-series multiplicative phase indices (phase mean / series mean); 1 where undefined.
+def _seasonal_indices(Y: np.ndarray, phases: np.ndarray, period: int) -> np.ndarray:
+    observed = np.isfinite(Y)
+    values = np.where(observed, Y, 0.0)
+    sums = np.stack([values[:, phases == p].sum(axis=1) for p in range(period)], axis=1)
+    counts = np.stack([observed[:, phases == p].sum(axis=1) for p in range(period)], axis=1)
+    phase_mean = np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+    total = observed.sum(axis=1)
+    mean = np.divide(values.sum(axis=1), total, out=np.full(len(Y), np.nan), where=total > 0)
+    index = phase_mean / mean[:, None]
+    return np.where(np.isfinite(index) & (index > 0), index, 1.0)
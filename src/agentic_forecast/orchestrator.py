@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import argparse
+import pathlib
+from dataclasses import fields
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from .cache import ArtifactCache
+from .config import DataConfig, ModelConfig, SystemConfig
+from .critic import CriticAgent
+from .data_quality import DataQualityAgent
+from .decision import DecisionAgent
+from .model_portfolio import ModelPortfolioAgent, best_model_name
+from .models import MODEL_REGISTRY
+from .pipeline import Pipeline, Stage
+from .profiling import Profiler, span
+from .reconciliation import METHODS, RESIDUAL_METHODS, Reconciler
+from .signal import SignalAgent
+from .uncertainty import UncertaintyAgent
+from .utils.io import dimension_columns, load_sales
+
+# every DataConfig field except the horizon, which only the forecast-side stages read.
+DATA = tuple(f"data.{f.name}" for f in fields(DataConfig) if f.name != "horizon")
+FORECAST = DATA + ("data.horizon",)
+# model settings that change backtest results; selected_model only changes which one is served.
+MODEL = tuple(f"model.{f.name}" for f in fields(ModelConfig) if f.name != "selected_model")
+
+
+def run_pipeline(
+    data_path: str,
+    config: SystemConfig | None = None,
+    horizon: int | None = None,
+    dimensions_dir: str | None = None,
+    profiler: Profiler | None = None,
+    pipeline: Pipeline | None = None,
+) -> Dict:
+    config = config or SystemConfig()
+    if horizon:
+        config.data.horizon = horizon
+    if pipeline is None:
+        cache = None
+        if config.cache.directory:
+            cache = ArtifactCache(config.cache.directory, max_bytes=config.cache.max_bytes)
+        pipeline = build_pipeline(cache, max_workers=config.pipeline.max_workers)
+    profiler = profiler or Profiler()
+    with profiler.activate(), span("pipeline"):
+        out = pipeline.run(
+            config, pipeline_sources(data_path, dimensions_dir), outputs=ARTIFACT_STAGES
+        )
+
+    decisions, decision_info = out["decision"]
+    return {
+        "data_quality": out["validate"][1],
+        "signal": out["decompose"][1],
+        "backtest": {k: v.metrics for k, v in out["backtest"].items()},
+        "model": out["fit"].best_model.metadata(),
+        "selected_model": out["fit"].best_model.name,
+        "forecast": out["intervals"],
+        "reconciliation": out["reconcile"][1],
+        "decisions": decisions,
+        "decision_info": decision_info,
+        "interval_eval": out["interval_eval"],
+        "calibration": out["calibrate"].calibrator.table(),
+        "critic": out["critic"],
+        "cache": pipeline.cache.stats() if pipeline.cache is not None else None,
+        "stages": dict(pipeline.status),
+        "profile": profiler.summary(),
+    }
+
+
+ARTIFACT_STAGES = (
+    "validate",
+    "decompose",
+    "backtest",
+    "fit",
+    "calibrate",
+    "reconcile",
+    "intervals",
+    "interval_eval",
+    "decision",
+    "critic",
+)
+
+
+# DQ -> Signal -> Portfolio -> Reconciliation -> Uncertainty -> Decision -> Critic. "fit" and
+# "calibrate" both hang off the backtest and run side by side, as do "forecast" and
+# "interval_eval". Reuse one pipeline across runs to keep unchanged stages in memory; `cache`
+# also persists them on disk.
+def build_pipeline(
+    cache: ArtifactCache | None = None, max_workers: int = 1, memory_slots: int = 1
+) -> Pipeline:
+    stages = [
+        Stage("load", _load, ("data_path", "dimensions_dir", "files"), DATA, persist=False),
+        Stage("validate", _validate, ("load",), DATA),
+        Stage("decompose", _decompose, ("validate",), DATA),
+        Stage("features", _features, ("decompose",), DATA),
+        Stage(
+            "backtest",
+            partial(_backtest, cache=cache),
+            ("features", "dimensions_dir"),
+            DATA + ("backtest",) + MODEL,
+        ),
+        Stage(
+            "fit",
+            partial(_fit, cache=cache),
+            ("features", "backtest", "dimensions_dir"),
+            DATA + ("model",),
+        ),
+        Stage(
+            "calibrate", _calibrate, ("backtest",), ("uncertainty", "model.selected_model")
+        ),
+        Stage("forecast", _forecast, ("features", "fit"), FORECAST),
+        Stage(
+            "reconcile",
+            _reconcile,
+            ("features", "forecast", "backtest"),
+            FORECAST + ("backtest", "reconciliation", "model.selected_model"),
+        ),
+        Stage(
+            "intervals",
+            _intervals,
+            ("reconcile", "calibrate"),
+            ("data.time_col", "data.id_cols"),
+        ),
+        Stage(
+            "interval_eval",
+            _interval_eval,
+            ("backtest", "calibrate"),
+            ("uncertainty", "model.selected_model"),
+        ),
+        Stage("decision", _decision, ("intervals",), ("decision",)),
+        Stage(
+            "critic",
+            _critic,
+            ("backtest", "interval_eval", "decision"),
+            ("critic", "model.selected_model"),
+        ),
+    ]
+    return Pipeline(stages, cache=cache, max_workers=max_workers, memory_slots=memory_slots)
+
+
+# run() sources for build_pipeline(); file stamps make edited inputs invalidate "load".
+def pipeline_sources(data_path: str | pathlib.Path, dimensions_dir: str | None = None) -> Dict:
+    return {
+        "data_path": str(data_path),
+        "dimensions_dir": dimensions_dir,
+        "files": _file_stamps(data_path, dimensions_dir),
+    }
+
+
+# (path, size, mtime) of the input files: a cheap stand-in for hashing their contents.
+def _file_stamps(*paths: str | pathlib.Path | None) -> List:
+    stamps = []
+    for path in paths:
+        if path is None:
+            continue
+        path = pathlib.Path(path)
+        for file in sorted(path.iterdir()) if path.is_dir() else [path]:
+            stat = file.stat()
+            stamps.append((str(file), stat.st_size, stat.st_mtime_ns))
+    return stamps
+
+
+def _portfolio(
+    config: SystemConfig, cache: ArtifactCache | None, dimensions_dir: Optional[str] = None
+) -> ModelPortfolioAgent:
+    return ModelPortfolioAgent(
+        config.data,
+        config.backtest,
+        cache=cache,
+        model_config=config.model,
+        dimension_cols=dimension_columns(dimensions_dir, config.data),
+    )
+
+
+def _load(config: SystemConfig, inputs: Dict[str, Any]):
+    return load_sales(inputs["data_path"], config.data, dimensions_dir=inputs["dimensions_dir"])
+
+
+def _validate(config: SystemConfig, inputs: Dict[str, Any]):
+    return DataQualityAgent(config.data).validate(inputs["load"])
+
+
+def _decompose(config: SystemConfig, inputs: Dict[str, Any]):
+    return SignalAgent(config.data).decompose(inputs["validate"][0])
+
+
+def _features(config: SystemConfig, inputs: Dict[str, Any]):
+    return SignalAgent(config.data).build_features(inputs["decompose"][0])
+
+
+def _backtest(config: SystemConfig, inputs: Dict[str, Any], cache: ArtifactCache | None = None):
+    return _portfolio(config, cache, inputs["dimensions_dir"]).backtest(inputs["features"])
+
+
+def _fit(config: SystemConfig, inputs: Dict[str, Any], cache: ArtifactCache | None = None):
+    portfolio = _portfolio(config, cache, inputs["dimensions_dir"])
+    portfolio.last_backtest = inputs["backtest"]
+    portfolio.fit_best(inputs["features"])
+    return portfolio
+
+
+def _calibrate(config: SystemConfig, inputs: Dict[str, Any]):
+    backtest = inputs["backtest"]
+    best = backtest[best_model_name(backtest, config.model.selected_model)]
+    uncertainty = UncertaintyAgent(config=config.uncertainty)
+    uncertainty.fit_residuals(best.residuals, best.keys)
+    return uncertainty
+
+
+def _forecast(config: SystemConfig, inputs: Dict[str, Any]):
+    return inputs["fit"].forecast(inputs["features"], horizon=config.data.horizon)
+
+
+# coherent item/store/total forecasts between the portfolio and the interval stage.
+def _reconcile(config: SystemConfig, inputs: Dict[str, Any]):
+    features, backtest = inputs["features"], inputs["backtest"]
+    cutoffs = []
+    if config.reconciliation.method in RESIDUAL_METHODS:
+        cutoffs = _portfolio(config, None).plan_splits(features).cutoffs
+    return Reconciler(config.reconciliation, config.data).reconcile(
+        features,
+        inputs["forecast"],
+        backtest[best_model_name(backtest, config.model.selected_model)],
+        cutoffs,
+        config.backtest.val_size,
+    )
+
+
+def _intervals(config: SystemConfig, inputs: Dict[str, Any]):
+    future = inputs["reconcile"][0]
+    point_preds = future["forecast"].to_numpy()
+    lower, upper = inputs["calibrate"].intervals_from_point(point_preds, future)
+    forecast_df = future[[config.data.time_col] + config.data.id_cols + ["step"]].copy()
+    forecast_df["forecast"] = point_preds
+    forecast_df["lower"] = lower
+    forecast_df["upper"] = upper
+    return forecast_df
+
+
+# intervals are scored out of sample on the selected model's last backtest split: its residuals
+# come from a model that never saw those rows, and the bands come from a calibrator fit on the
+# other splits only (the "calibrate" one when there is a single split).
+def _interval_eval(config: SystemConfig, inputs: Dict[str, Any]):
+    backtest = inputs["backtest"]
+    best = backtest[best_model_name(backtest, config.model.selected_model)]
+    split = best.keys["split"].to_numpy()
+    last = split == split.max()
+    uncertainty = inputs["calibrate"]
+    if not last.all():
+        uncertainty = UncertaintyAgent(config=config.uncertainty)
+        uncertainty.fit_residuals(best.residuals[~last], best.keys[~last])
+    keys = best.keys[last].reset_index(drop=True)
+    preds = keys["forecast"].to_numpy()
+    lower, upper = uncertainty.intervals_from_point(preds, keys)
+    return uncertainty.evaluate_intervals(
+        y_true=preds + best.residuals[last],
+        lower=lower,
+        upper=upper,
+        nominal=1 - config.uncertainty.alpha,
+    )
+
+
+def _decision(config: SystemConfig, inputs: Dict[str, Any]):
+    return DecisionAgent(config.decision).propose(inputs["intervals"])
+
+
+def _critic(config: SystemConfig, inputs: Dict[str, Any]):
+    backtest = inputs["backtest"]
+    critic = CriticAgent(config.critic.wape_threshold, config.critic.coverage_tolerance)
+    return critic.assess(
+        forecast_metrics=backtest[best_model_name(backtest, config.model.selected_model)].metrics,
+        interval_eval=inputs["interval_eval"],
+        decision_info=inputs["decision"][1],
+    )
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Agentic forecasting pipeline")
+    parser.add_argument("--data", required=True, help="Path to csv/parquet/arrow data.")
+    parser.add_argument("--horizon", type=int, default=None, help="Forecast horizon.")
+    parser.add_argument(
+        "--dimensions-dir",
+        default=None,
+        help="Directory with dates.csv/stores.csv/categories.csv to join at load time.",
+    )
+    parser.add_argument(
+        "--cache-dir", default=None, help="Reuse stage outputs and fitted models across runs."
+    )
+    parser.add_argument(
+        "--training-mode",
+        choices=["pooled", "global", "partitioned"],
+        default="pooled",
+        help="How models see multiple series.",
+    )
+    parser.add_argument(
+        "--partition-col", default=None, help="Column to partition on (partitioned mode)."
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=sorted(MODEL_REGISTRY),
+        default=ModelConfig().models,
+        help="Portfolio models; only their backends are imported.",
+    )
+    parser.add_argument(
+        "--statistical-baselines",
+        action="store_true",
+        help="Add seasonal naive/MA/SES/Holt/Theta matrix baselines to the portfolio.",
+    )
+    parser.add_argument(
+        "--reconcile",
+        default="none",
+        choices=METHODS,
+        help="Hierarchical reconciliation across ReconciliationConfig.levels.",
+    )
+    parser.add_argument("--profile-json", default=None, help="Write stage timings as JSON.")
+    parser.add_argument(
+        "--chrome-trace", default=None, help="Write stage timings in Chrome trace format."
+    )
+    parser.add_argument(
+        "--cprofile",
+        action="append",
+        default=[],
+        help="Stage to run under cProfile (repeatable, e.g. --cprofile backtest).",
+    )
+    parser.add_argument(
+        "--cprofile-dir", default=None, help="Directory for per-stage .prof files."
+    )
+    args = parser.parse_args()
+
+    config = SystemConfig()
+    config.cache.directory = args.cache_dir
+    config.model.training_mode = args.training_mode
+    config.model.partition_col = args.partition_col
+    config.model.models = args.models
+    config.model.statistical_baselines = args.statistical_baselines
+    config.reconciliation.method = args.reconcile
+    profiler = Profiler(cprofile_stages=args.cprofile, cprofile_dir=args.cprofile_dir)
+    artifacts = run_pipeline(
+        data_path=args.data,
+        config=config,
+        horizon=args.horizon,
+        dimensions_dir=args.dimensions_dir,
+        profiler=profiler,
+    )
+    if args.profile_json:
+        profiler.to_json(args.profile_json)
+    if args.chrome_trace:
+        profiler.to_chrome_trace(args.chrome_trace)
+    print("Backtest:", artifacts["backtest"])
+    print("Model:", artifacts["model"])
+    print("Interval eval:", artifacts["interval_eval"])
+    print(
+        "Reconciliation:",
+        {k: v for k, v in artifacts["reconciliation"].items() if k != "levels"},
+    )
+    print("Decision summary:", artifacts["decision_info"])
+    print("Critic:", artifacts["critic"])
+    if artifacts["cache"] is not None:
+        print("Cache:", artifacts["cache"])
+    print("Stages:", artifacts["stages"])
+    print("Profile:")
+    print(artifacts["profile"].to_string(index=False))
+    for stage, text in profiler.profiles.items():
+        print(f"cProfile [{stage}]:")
+        print(text)
+
+
+if __name__ == "__main__":
+    cli()
+
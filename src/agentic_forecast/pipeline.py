@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import pandas as pd
+
+from .cache import ArtifactCache, fingerprint
+from .profiling import span
+
+_MISSING = object()
+
+
+# one node of the pipeline DAG: fn(config, inputs) -> output, where inputs maps every name in
+# `inputs` (an upstream stage or a run() source) to its value. `config` lists the dotted
+# SystemConfig paths the stage reads ("decision", "data.horizon"); the cache key covers exactly
+# those, so a stage must declare everything it reads. Stages must not mutate their inputs.
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Any, Dict[str, Any]], Any]
+    inputs: Tuple[str, ...] = ()
+    config: Tuple[str, ...] = ()
+    # also persist the output in the artifact cache; in-memory reuse is always on
+    persist: bool = True
+
+
+def config_value(config: Any, path: str) -> Any:
+    value = config
+    for part in path.split("."):
+        value = getattr(value, part)
+    return asdict(value) if is_dataclass(value) else value
+
+
+# Runs stages in dependency order and reuses every output whose Merkle key (stage name, config
+# slice, upstream keys) is unchanged: first the last output held in memory, then the artifact
+# cache. Planning walks the DAG backwards, so only requested stages and the inputs of stages
+# that must recompute are resolved; stages whose inputs are ready run concurrently.
+class Pipeline:
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        cache: ArtifactCache | None = None,
+        max_workers: int = 1,
+        memory_slots: int = 1,
+    ):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        self.cache = cache
+        self.max_workers = max_workers
+        # latest `memory_slots` outputs per stage by key, so memory stays bounded
+        self.memory_slots = memory_slots
+        self.memory: Dict[str, OrderedDict] = {name: OrderedDict() for name in self.stages}
+        # per stage of the last run: "memory", "cache" or "run"
+        self.status: Dict[str, str] = {}
+
+    # stages must be listed after their inputs; sources are hashed by value.
+    def keys(self, config: Any, sources: Dict[str, Any]) -> Dict[str, str]:
+        keys = {name: fingerprint("source", name, value) for name, value in sources.items()}
+        for stage in self.stages.values():
+            unknown = [name for name in stage.inputs if name not in keys]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} has unknown or later inputs: {unknown}")
+            keys[stage.name] = fingerprint(
+                "stage",
+                stage.name,
+                [(path, config_value(config, path)) for path in stage.config],
+                [keys[name] for name in stage.inputs],
+            )
+        return keys
+
+    def run(
+        self,
+        config: Any,
+        sources: Dict[str, Any],
+        outputs: Iterable[str] | None = None,
+    ) -> Dict[str, Any]:
+        keys = self.keys(config, sources)
+        values = dict(sources)
+        self.status = {}
+        needed = set(outputs if outputs is not None else self.stages)
+        todo: List[str] = []
+        for name in reversed(list(self.stages)):
+            if name not in needed:
+                continue
+            value = self._lookup(name, keys[name])
+            if value is _MISSING:
+                todo.append(name)
+                needed.update(self.stages[name].inputs)
+            else:
+                values[name] = value
+        self._execute(todo[::-1], keys, config, values)
+        self.status = {name: self.status[name] for name in self.stages if name in self.status}
+        return {name: values[name] for name in self.stages if name in values}
+
+    def _lookup(self, name: str, key: str) -> Any:
+        held = self.memory[name]
+        if key in held:
+            held.move_to_end(key)
+            self.status[name] = "memory"
+            return held[key]
+        if self.cache is None or not self.stages[name].persist:
+            return _MISSING
+        with span("pipeline.cache_get", stage=name):
+            value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._remember(name, key, value)
+            self.status[name] = "cache"
+        return value
+
+    def _remember(self, name: str, key: str, value: Any) -> None:
+        held = self.memory[name]
+        held[key] = value
+        held.move_to_end(key)
+        while len(held) > self.memory_slots:
+            held.popitem(last=False)
+
+    def _execute(self, todo: List[str], keys: Dict[str, str], config: Any, values: Dict) -> None:
+        if self.max_workers <= 1:
+            for name in todo:
+                values[name] = self._compute(name, keys[name], config, self._inputs(name, values))
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while todo or running:
+                for name in [n for n in todo if all(i in values for i in self.stages[n].inputs)]:
+                    todo.remove(name)
+                    # each stage runs in a copy of this context so profiling spans nest under it.
+                    future = pool.submit(
+                        contextvars.copy_context().run,
+                        self._compute,
+                        name,
+                        keys[name],
+                        config,
+                        self._inputs(name, values),
+                    )
+                    running[future] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    values[running.pop(future)] = future.result()
+
+    def _inputs(self, name: str, values: Dict) -> Dict[str, Any]:
+        return {i: values[i] for i in self.stages[name].inputs}
+
+    def _compute(self, name: str, key: str, config: Any, inputs: Dict[str, Any]) -> Any:
+        stage = self.stages[name]
+        with span(name) as record:
+            value = stage.fn(config, inputs)
+            if record is not None and isinstance(value, pd.DataFrame):
+                record.rows = len(value)
+        self._remember(name, key, value)
+        if self.cache is not None and stage.persist:
+            self.cache.put(key, value)
+        self.status[name] = "run"
+        return value
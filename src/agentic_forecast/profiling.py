@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import io
+import json
+import math
+import os
+import pathlib
+import pstats
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+_ACTIVE: contextvars.ContextVar[Optional["Profiler"]] = contextvars.ContextVar(
+    "agentic_forecast_profiler", default=None
+)
+_PARENT: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "agentic_forecast_span", default=None
+)
+
+
+@dataclass
+class Span:
+    id: int
+    name: str
+    parent: Optional[int]
+    start: float
+    wall: float = 0.0
+    cpu: float = 0.0
+    rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    rows: Optional[int] = None
+    thread: int = 0
+    attrs: Dict = field(default_factory=dict)
+
+
+# (current, peak) resident set size in MB; the peak is process-wide since start.
+def memory_mb() -> Tuple[float, float]:
+    try:
+        with open("/proc/self/status") as fh:
+            fields = dict(
+                line.split(":", 1) for line in fh if line.startswith(("VmRSS", "VmHWM"))
+            )
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return peak, peak
+
+
+# nested wall/CPU/memory spans for pipeline stages and inner loops. Spans opened through the
+# module-level span() attach to the profiler activated with profiler.activate(), so library
+# code stays free of profiler plumbing and is a no-op when nothing is active.
+class Profiler:
+
+    def __init__(
+        self,
+        cprofile_stages: Sequence[str] = (),
+        cprofile_dir: str | pathlib.Path | None = None,
+    ):
+        self.spans: List[Span] = []
+        self.cprofile_stages = set(cprofile_stages)
+        self.cprofile_dir = pathlib.Path(cprofile_dir) if cprofile_dir else None
+        self.profiles: Dict[str, str] = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._cprofile_busy = False
+
+    @contextmanager
+    def activate(self) -> Iterator["Profiler"]:
+        token = _ACTIVE.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE.reset(token)
+
+    def _new_span(self, name: str, rows: Optional[int], attrs: Dict) -> Span:
+        with self._lock:
+            span = Span(
+                id=len(self.spans),
+                name=name,
+                parent=_PARENT.get(),
+                start=time.perf_counter() - self._origin,
+                rows=rows,
+                thread=threading.get_ident(),
+                attrs=attrs,
+            )
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, rows: Optional[int] = None, **attrs) -> Iterator[Span]:
+        record = self._new_span(name, rows, attrs)
+        token = _PARENT.set(record.id)
+        profile = self._start_cprofile(name)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall = time.perf_counter() - wall
+            record.cpu = time.process_time() - cpu
+            record.rss_mb, record.peak_rss_mb = memory_mb()
+            if profile is not None:
+                self._stop_cprofile(name, profile)
+            _PARENT.reset(token)
+
+    # durations measured elsewhere (e.g. inside a worker process) recorded as finished spans.
+    def record(self, name: str, wall: float, rows: Optional[int] = None, **attrs) -> None:
+        span = self._new_span(name, rows, attrs)
+        span.start -= wall
+        span.wall = wall
+        span.cpu = span.rss_mb = span.peak_rss_mb = float("nan")
+
+    def _start_cprofile(self, name: str) -> Optional[cProfile.Profile]:
+        if name not in self.cprofile_stages or self._cprofile_busy:
+            return None
+        self._cprofile_busy = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def _stop_cprofile(self, name: str, profile: cProfile.Profile) -> None:
+        profile.disable()
+        self._cprofile_busy = False
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(30)
+        self.profiles[name] = out.getvalue()
+        if self.cprofile_dir is not None:
+            self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(str(self.cprofile_dir / f"{name}.prof"))
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame([asdict(s) for s in self.spans])
+
+    # one row per span name: call count, total/max wall, CPU, peak RSS and rows processed.
+    def summary(self) -> pd.DataFrame:
+        frame = self.to_frame()
+        if frame.empty:
+            return frame
+        summary = frame.groupby("name", sort=False).agg(
+            calls=("id", "size"),
+            wall_s=("wall", "sum"),
+            max_wall_s=("wall", "max"),
+            cpu_s=("cpu", "sum"),
+            peak_rss_mb=("peak_rss_mb", "max"),
+            rows=("rows", lambda r: r.sum(min_count=1)),
+        )
+        return summary.reset_index()
+
+    def to_json(self, path: str | pathlib.Path | None = None) -> str:
+        text = json.dumps(
+            {"spans": [asdict(s) for s in self.spans], "profiles": self.profiles},
+            default=str,
+            indent=2,
+        )
+        if path is not None:
+            pathlib.Path(path).write_text(text)
+        return text
+
+    # Chrome trace event format (chrome://tracing, Perfetto): one complete event per span.
+    def to_chrome_trace(self, path: str | pathlib.Path | None = None) -> Dict:
+        pid = os.getpid()
+        events = [
+            {
+                "name": s.name,
+                "ph": "X",
+                "ts": s.start * 1e6,
+                "dur": s.wall * 1e6,
+                "pid": pid,
+                "tid": s.thread,
+                "args": {
+                    "cpu_s": _finite(s.cpu),
+                    "rss_mb": _finite(s.rss_mb),
+                    "peak_rss_mb": _finite(s.peak_rss_mb),
+                    "rows": s.rows,
+                    **{k: str(v) for k, v in s.attrs.items()},
+                },
+            }
+            for s in self.spans
+        ]
+        trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+        if path is not None:
+            pathlib.Path(path).write_text(json.dumps(trace))
+        return trace
+
+
+def _finite(value: float) -> Optional[float]:
+    return value if math.isfinite(value) else None
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _ACTIVE.get()
+
+
+@contextmanager
+def span(name: str, rows: Optional[int] = None, **attrs) -> Iterator[Optional[Span]]:
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        yield None
+        return
+    with profiler.span(name, rows, **attrs) as record:
+        yield record
+
+
+def record_span(name: str, wall: float, rows: Optional[int] = None, **attrs) -> None:
+    profiler = _ACTIVE.get()
+    if profiler is not None:
+        profiler.record(name, wall, rows, **attrs)
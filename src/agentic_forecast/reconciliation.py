@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtest import BacktestResult
+from .config import DataConfig, ReconciliationConfig
+from .models.statistical import MatrixForecastModel, statistical_bank, time_index
+from .profiling import span
+from .utils.data import level_codes, series_codes, series_index
+
+# scipy is imported where it is used, so method="none" runs and the CLI never load it.
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+METHODS = ("none", "bottom_up", "top_down", "ols", "wls", "mint_shrink")
+# methods that need base-forecast errors lined up across nodes
+RESIDUAL_METHODS = ("wls", "mint_shrink")
+
+
+# aggregate nodes over the bottom series: `aggregation` is the sparse 0/1 matrix C with one row
+# per aggregate node, so the summing matrix is S = [C; I] and a coherent forecast is S @ bottom.
+@dataclass
+class Hierarchy:
+    aggregation: sp.csr_matrix
+    levels: np.ndarray
+    nodes: np.ndarray
+
+    @property
+    def n_aggregate(self) -> int:
+        return self.aggregation.shape[0]
+
+    @property
+    def n_bottom(self) -> int:
+        return self.aggregation.shape[1]
+
+    def summing_matrix(self) -> sp.csr_matrix:
+        import scipy.sparse as sp
+
+        return sp.vstack(
+            [self.aggregation, sp.identity(self.n_bottom, format="csr")], format="csr"
+        )
+
+    # (n_aggregate + n_bottom, ...) node values for bottom values, aggregate rows first.
+    def aggregate(self, bottom: np.ndarray) -> np.ndarray:
+        return np.vstack([self.aggregation @ bottom, bottom])
+
+
+# attrs has one row per bottom series, in bottom order, with every column the levels use.
+def build_hierarchy(attrs: pd.DataFrame, levels: Sequence[List[str]]) -> Hierarchy:
+    rows, names, labels = [], [], []
+    offset = 0
+    for name, codes, nodes in level_codes(attrs, levels):
+        if (codes < 0).any():
+            raise ValueError(f"Hierarchy level {name} has series with missing values.")
+        rows.append(codes + offset)
+        names.append(np.full(len(nodes), name, dtype=object))
+        labels.append(nodes.astype(object))
+        offset += len(nodes)
+    if not rows:
+        raise ValueError("Reconciliation needs at least one aggregate level.")
+    import scipy.sparse as sp
+
+    n_bottom = len(attrs)
+    aggregation = sp.csr_matrix(
+        (
+            np.ones(n_bottom * len(rows)),
+            (np.concatenate(rows), np.tile(np.arange(n_bottom), len(rows))),
+        ),
+        shape=(offset, n_bottom),
+    )
+    return Hierarchy(aggregation, np.concatenate(names), np.concatenate(labels))
+
+
+# coherent forecasts for every node. `base` is (n_aggregate + n_bottom, n_steps) with the
+# aggregate rows first and every horizon step a column, so all steps share one solve.
+# `residuals` (n_samples, n_nodes) are base-forecast errors lined up by sample (wls,
+# mint_shrink); `proportions` (n_bottom,) split the total for top_down.
+def reconcile(
+    base: np.ndarray,
+    hierarchy: Hierarchy,
+    method: str,
+    residuals: np.ndarray | None = None,
+    proportions: np.ndarray | None = None,
+) -> Tuple[np.ndarray, Dict]:
+    n_aggregate = hierarchy.n_aggregate
+    if method == "bottom_up":
+        return hierarchy.aggregate(base[n_aggregate:]), {}
+    if method == "top_down":
+        total = np.flatnonzero(hierarchy.levels == "total")
+        if not len(total) or proportions is None:
+            raise ValueError("Top-down reconciliation needs a total level and proportions.")
+        return hierarchy.aggregate(proportions[:, None] * base[total[0]][None, :]), {}
+    if method == "ols":
+        return _project(base, hierarchy.aggregation, np.ones(len(base)), None), {}
+    if method not in RESIDUAL_METHODS:
+        raise ValueError(f"Unknown reconciliation method: {method}")
+    if residuals is None or residuals.shape[1] != len(base):
+        raise ValueError(f"{method} reconciliation needs residuals for every node.")
+    variance = _floor(np.mean(residuals * residuals, axis=0))
+    if method == "wls":
+        return _project(base, hierarchy.aggregation, variance, None), {}
+    # W = lambda * diag(S) + (1 - lambda) * S with S = R'R / n: a diagonal plus rank-n part.
+    shrinkage = shrinkage_intensity(residuals)
+    low_rank = residuals.T * np.sqrt((1 - shrinkage) / len(residuals))
+    diag = _floor(shrinkage * variance, scale=variance)
+    return _project(base, hierarchy.aggregation, diag, low_rank), {"shrinkage": shrinkage}
+
+
+# MinT as a projection onto coherent forecasts: y~ = y^ - W U (U' W U)^-1 U' y^ with
+# U' = [I, -C] and W = diag(d) + V V'. U' W U is the sparse n_aggregate x n_aggregate matrix
+# D_a + C D_b C' plus the rank-n term (U'V)(U'V)', solved by Woodbury on one sparse LU, so
+# nothing of size n_nodes x n_nodes is ever formed.
+def _project(
+    base: np.ndarray, C: sp.csr_matrix, diag: np.ndarray, low_rank: np.ndarray | None
+) -> np.ndarray:
+    import scipy.sparse as sp
+    from scipy.sparse.linalg import splu
+
+    n_aggregate = C.shape[0]
+    gap = np.ascontiguousarray(base[:n_aggregate] - C @ base[n_aggregate:])
+    system = sp.diags(diag[:n_aggregate]) + C @ sp.diags(diag[n_aggregate:]) @ C.T
+    lu = splu(sp.csc_matrix(system))
+    solved = lu.solve(gap)
+    if low_rank is not None:
+        B = np.ascontiguousarray(low_rank[:n_aggregate] - C @ low_rank[n_aggregate:])
+        solved_B = lu.solve(B)
+        inner = np.eye(B.shape[1]) + B.T @ solved_B
+        solved = solved - solved_B @ np.linalg.solve(inner, B.T @ solved)
+    ux = np.vstack([solved, -(C.T @ solved)])
+    correction = diag[:, None] * ux
+    if low_rank is not None:
+        correction += low_rank @ (low_rank.T @ ux)
+    return base - correction
+
+
+# Schafer-Strimmer intensity (scaled as in hts shrink.estim) for shrinking the residual
+# correlations toward zero. The sums over node pairs come from (n_samples x n_samples) Gram
+# matrices, never the n_nodes^2 pairs.
+def shrinkage_intensity(residuals: np.ndarray) -> float:
+    n = len(residuals)
+    if n < 3:
+        return 1.0
+    centered = residuals - residuals.mean(axis=0)
+    sd = centered.std(axis=0, ddof=1)
+    xs = np.divide(centered, sd, out=np.zeros_like(centered), where=sd > 0)
+    sq = xs * xs
+    gram = xs @ xs.T
+    # sum over i != j of (sum_t x_ti x_tj)^2 and of sum_t x_ti^2 x_tj^2
+    cross = (gram * gram).sum() - (sq.sum(axis=0) ** 2).sum()
+    fourth = (sq.sum(axis=1) ** 2).sum() - (sq * sq).sum()
+    variance = (fourth - cross / n) / (n * (n - 1))
+    correlation = cross / (n - 1) ** 2
+    if correlation <= 0:
+        return 1.0
+    return float(np.clip(variance / correlation, 0.0, 1.0))
+
+
+def _floor(values: np.ndarray, scale: np.ndarray | None = None) -> np.ndarray:
+    reference = values if scale is None else scale
+    positive = reference[reference > 0]
+    eps = 1e-8 * (positive.mean() if len(positive) else 1.0)
+    return np.maximum(values, eps)
+
+
+# Makes the per-series portfolio forecasts coherent across ReconciliationConfig.levels. Each
+# aggregate node gets its own base forecast from a statistical baseline fit on the summed
+# history. wls / mint_shrink weigh nodes by base-forecast errors at the backtest cutoffs:
+# portfolio residuals for the bottom, the same baseline refit at every cutoff for the aggregates,
+# lined up by (split, step).
+class Reconciler:
+
+    def __init__(self, config: ReconciliationConfig, data_config: DataConfig):
+        if config.method not in METHODS:
+            raise ValueError(f"Unknown reconciliation method: {config.method}")
+        self.config = config
+        self.data_config = data_config
+
+    def _aggregate_model(self) -> MatrixForecastModel:
+        period = 7 if self.data_config.freq == "D" else 1
+        bank = {m.name: m for m in statistical_bank(period=period)}
+        if self.config.aggregate_model not in bank:
+            raise ValueError(f"Unknown aggregate model: {self.config.aggregate_model}")
+        return bank[self.config.aggregate_model]
+
+    # forecast: portfolio output (ids, time, step, forecast). Returns it with reconciled
+    # "forecast" and the original in "base_forecast", plus info with the aggregate "levels".
+    def reconcile(
+        self,
+        history: pd.DataFrame,
+        forecast: pd.DataFrame,
+        backtest: BacktestResult | None = None,
+        cutoffs: Sequence[pd.Timestamp] = (),
+        val_size: int = 0,
+    ) -> Tuple[pd.DataFrame, Dict]:
+        cfg, data = self.config, self.data_config
+        if cfg.method == "none":
+            return forecast, {"method": "none"}
+        import scipy.sparse as sp
+
+        # bottom series are the history's series; only one row per series is indexed by id.
+        _, first, hist_codes = np.unique(
+            series_codes(history, data.id_cols), return_index=True, return_inverse=True
+        )
+        attrs = history.iloc[first].reset_index(drop=True)
+        bottom = series_index(attrs, data.id_cols)
+        rows = bottom.get_indexer(series_index(forecast, data.id_cols))
+        if (rows < 0).any():
+            raise ValueError("Every forecast series needs history to be reconciled.")
+        hierarchy = build_hierarchy(attrs, cfg.levels)
+        n_aggregate = hierarchy.n_aggregate
+
+        # history as a sparse (n_bottom, n_time) matrix; missing periods count as zero.
+        times = time_index(history[data.time_col], data.freq)
+        start = int(times.min())
+        Y = sp.csr_matrix(
+            (
+                np.nan_to_num(history[data.target_col].to_numpy(dtype=np.float64)),
+                (hist_codes, times - start),
+            ),
+            shape=(len(bottom), int(times.max()) - start + 1),
+        )
+        Y_aggregate = (hierarchy.aggregation @ Y).toarray()
+
+        steps = forecast["step"].to_numpy(dtype=np.int64)
+        base_bottom = np.zeros((len(bottom), int(steps.max())))
+        base_bottom[rows, steps - 1] = forecast["forecast"].to_numpy(dtype=np.float64)
+        model = self._aggregate_model().fit_matrix(Y_aggregate, start)
+        base = np.vstack([model.forecast_matrix(base_bottom.shape[1]), base_bottom])
+
+        residuals = None
+        if cfg.method in RESIDUAL_METHODS:
+            if backtest is None or backtest.keys is None or not len(cutoffs):
+                raise ValueError(f"{cfg.method} reconciliation needs backtest residuals.")
+            residuals = self._residuals(
+                Y_aggregate, start, backtest, bottom, cutoffs, val_size, n_aggregate
+            )
+        totals = np.asarray(Y.sum(axis=1)).ravel()
+        proportions = totals / totals.sum() if totals.sum() > 0 else None
+
+        with span("reconcile.solve", rows=base.size, method=cfg.method):
+            coherent, info = reconcile(base, hierarchy, cfg.method, residuals, proportions)
+        if cfg.nonnegative:
+            coherent = hierarchy.aggregate(np.maximum(coherent[n_aggregate:], 0.0))
+
+        out = forecast.assign(
+            base_forecast=forecast["forecast"].to_numpy(),
+            forecast=coherent[n_aggregate:][rows, steps - 1],
+        )
+        n_steps = base.shape[1]
+        levels = pd.DataFrame(
+            {
+                "level": np.repeat(hierarchy.levels, n_steps),
+                "node": np.repeat(hierarchy.nodes, n_steps),
+                "step": np.tile(np.arange(1, n_steps + 1), n_aggregate),
+                "base_forecast": base[:n_aggregate].ravel(),
+                "forecast": coherent[:n_aggregate].ravel(),
+            }
+        )
+        gap = base[:n_aggregate] - hierarchy.aggregation @ base[n_aggregate:]
+        info = {
+            "method": cfg.method,
+            "n_bottom": len(bottom),
+            "n_aggregate": n_aggregate,
+            # mean |aggregate base - sum of bottom base| relative to the aggregate base level
+            "base_incoherence": float(
+                np.abs(gap).mean() / (np.abs(base[:n_aggregate]).mean() + 1e-8)
+            ),
+            **info,
+            "levels": levels,
+        }
+        return out, info
+
+    # (n_splits * val_size, n_nodes) errors by (split, step): the aggregate baseline refit at
+    # each cutoff for the aggregate nodes, portfolio backtest residuals for the bottom.
+    def _residuals(
+        self,
+        Y_aggregate: np.ndarray,
+        start: int,
+        backtest: BacktestResult,
+        bottom: pd.Index,
+        cutoffs: Sequence[pd.Timestamp],
+        val_size: int,
+        n_aggregate: int,
+    ) -> np.ndarray:
+        n_samples = len(cutoffs) * val_size
+        residuals = np.zeros((n_samples, n_aggregate + len(bottom)))
+        ends = time_index(pd.DatetimeIndex(cutoffs), self.data_config.freq) - start + 1
+        for split_idx, end in enumerate(ends):
+            actual = Y_aggregate[:, end:end + val_size]
+            if end <= 0 or not actual.shape[1]:
+                continue
+            model = self._aggregate_model().fit_matrix(Y_aggregate[:, :end], start)
+            rows = split_idx * val_size + np.arange(actual.shape[1])
+            residuals[rows, :n_aggregate] = (actual - model.forecast_matrix(actual.shape[1])).T
+
+        keys = backtest.keys
+        codes = bottom.get_indexer(series_index(keys, self.data_config.id_cols))
+        split = keys["split"].to_numpy(dtype=np.int64)
+        step = keys["step"].to_numpy(dtype=np.int64)
+        ok = (codes >= 0) & (split < len(cutoffs)) & (step <= val_size)
+        sample = split[ok] * val_size + step[ok] - 1
+        residuals[sample, n_aggregate + codes[ok]] = backtest.residuals[ok]
+        return residuals
@@ -0,0 +1,460 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import pathlib
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cache import ArtifactCache
+from .config import SystemConfig
+from .decision import DecisionAgent
+from .model_portfolio import ModelPortfolioAgent
+from .orchestrator import build_pipeline, pipeline_sources
+from .pipeline import Pipeline
+from .state import last_rows
+from .uncertainty import UncertaintyAgent
+from .utils.data import segment_bounds, series_index, sort_by_series
+from .utils.sketch import QuantileSketch
+
+BUNDLE_FILE = "bundle.pkl"
+LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+# what a serving process keeps warm: the portfolio with its fitted best model, the calibrated
+# UncertaintyAgent (conformal band table), the config (DecisionConfig included) and the last
+# DataConfig.state_context feature rows per series, enough context for recursive forecasts.
+@dataclass
+class ServingBundle:
+    config: SystemConfig
+    portfolio: ModelPortfolioAgent
+    uncertainty: UncertaintyAgent
+    history: pd.DataFrame
+
+    def save(self, directory: str | pathlib.Path) -> pathlib.Path:
+        path = pathlib.Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        pd.to_pickle(self, path / BUNDLE_FILE)
+        return path / BUNDLE_FILE
+
+    @classmethod
+    def load(cls, directory: str | pathlib.Path) -> "ServingBundle":
+        return pd.read_pickle(pathlib.Path(directory) / BUNDLE_FILE)
+
+
+# runs the pipeline up to "fit" and "calibrate" (reusing cached stages) and packs the results.
+# Bundles serve unreconciled bottom-level forecasts, so a reconciling config is rejected rather
+# than silently served incoherent.
+def build_bundle(
+    data_path: str,
+    config: SystemConfig | None = None,
+    dimensions_dir: str | None = None,
+    pipeline: Pipeline | None = None,
+) -> ServingBundle:
+    config = copy.deepcopy(config) if config is not None else SystemConfig()
+    if config.reconciliation.method != "none":
+        raise ValueError(
+            f"Serving bundles do not reconcile forecasts (ReconciliationConfig.method is "
+            f"{config.reconciliation.method!r}); build with method 'none'."
+        )
+    if pipeline is None:
+        cache = None
+        if config.cache.directory:
+            cache = ArtifactCache(config.cache.directory, max_bytes=config.cache.max_bytes)
+        pipeline = build_pipeline(cache, max_workers=config.pipeline.max_workers)
+    out = pipeline.run(
+        config,
+        pipeline_sources(data_path, dimensions_dir),
+        outputs=("features", "fit", "calibrate"),
+    )
+    data = config.data
+    features = sort_by_series(out["features"], data.id_cols, data.time_col)
+    bounds = segment_bounds(features, data.id_cols)
+    portfolio = copy.copy(out["fit"])
+    # the server never writes to the artifact cache.
+    portfolio.cache = None
+    return ServingBundle(
+        config=config,
+        portfolio=portfolio,
+        uncertainty=out["calibrate"],
+        history=last_rows(features, bounds, data.state_context),
+    )
+
+
+# forecasts with intervals for any subset of the bundle's series: one recursive forecast, i.e.
+# one vectorized predict per horizon step, over all requested series at once.
+class BundleForecaster:
+
+    def __init__(self, bundle: ServingBundle):
+        self.bundle = bundle
+        data = bundle.config.data
+        self.bounds = segment_bounds(bundle.history, data.id_cols)
+        self.index = series_index(bundle.history.iloc[self.bounds[:-1]], data.id_cols)
+
+    # series codes for a list of {id_col: value} dicts; None means every series.
+    def codes(self, series: List[Dict] | None) -> np.ndarray:
+        if series is None:
+            return np.arange(len(self.index))
+        id_cols = self.bundle.config.data.id_cols
+        frame = pd.DataFrame(series)
+        missing = [c for c in id_cols if c not in frame.columns]
+        if missing:
+            raise ValueError(f"Series entries need every id column, missing: {missing}")
+        # cast like the stored ids so e.g. numeric ids sent as strings still match
+        for col in id_cols:
+            frame[col] = frame[col].astype(self.bundle.history[col].dtype)
+        codes = self.index.get_indexer(series_index(frame, id_cols))
+        if (codes < 0).any():
+            unknown = [series[i] for i in np.flatnonzero(codes < 0)[:10]]
+            raise ValueError(f"Unknown series: {unknown}")
+        return codes
+
+    def forecast(self, codes: np.ndarray, horizon: int) -> pd.DataFrame:
+        data = self.bundle.config.data
+        starts, lengths = self.bounds[codes], np.diff(self.bounds)[codes]
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+        future = self.bundle.portfolio.forecast(self.bundle.history.take(positions), horizon)
+        point = future["forecast"].to_numpy()
+        lower, upper = self.bundle.uncertainty.intervals_from_point(point, future)
+        forecast_df = future[[data.time_col] + data.id_cols + ["step"]].copy()
+        forecast_df["forecast"] = point
+        forecast_df["lower"] = lower
+        forecast_df["upper"] = upper
+        forecast_df["series"] = self.index.get_indexer(series_index(future, data.id_cols))
+        return forecast_df
+
+
+# latency sketches per endpoint plus micro-batch and queue-depth counters; thread-safe.
+class ServingMetrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.latency: Dict[str, QuantileSketch] = {}
+        self.requests: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_series = 0
+        self.max_batch_requests = 0
+        self.max_queue_depth = 0
+
+    def observe(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latency.setdefault(endpoint, QuantileSketch()).update(np.array([seconds]))
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def record_batch(self, requests: int, series: int, queue_depth: int) -> None:
+        with self._lock:
+            self.batches += 1
+            self.batched_requests += requests
+            self.batched_series += series
+            self.max_batch_requests = max(self.max_batch_requests, requests)
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    def snapshot(self, queue_depth: int) -> Dict:
+        with self._lock:
+            endpoints = {
+                name: {
+                    "requests": self.requests[name],
+                    "errors": self.errors.get(name, 0),
+                    **{
+                        f"p{round(q * 100)}_ms": sketch.quantile(q) * 1e3
+                        for q in LATENCY_QUANTILES
+                    },
+                }
+                for name, sketch in self.latency.items()
+            }
+            batches = max(self.batches, 1)
+            return {
+                "uptime_s": time.time() - self.started,
+                "endpoints": endpoints,
+                "batches": {
+                    "count": self.batches,
+                    "mean_requests": self.batched_requests / batches,
+                    "mean_series": self.batched_series / batches,
+                    "max_requests": self.max_batch_requests,
+                },
+                "queue": {"depth": queue_depth, "max_depth": self.max_queue_depth},
+            }
+
+
+@dataclass
+class _Pending:
+    codes: np.ndarray
+    horizon: int
+    future: Future
+
+
+# Coalesces concurrent forecast requests. A single worker takes the first queued request, keeps
+# collecting until max_wait_ms have passed or max_batch_series series are queued, answers the
+# union of series with one forecast at the longest horizon and hands each request its rows.
+class MicroBatcher:
+
+    def __init__(
+        self,
+        forecaster: BundleForecaster,
+        metrics: ServingMetrics,
+        max_wait_ms: float = 5.0,
+        max_batch_series: int = 10_000,
+    ):
+        self.forecaster = forecaster
+        self.metrics = metrics
+        self.max_wait = max_wait_ms / 1e3
+        self.max_batch_series = max_batch_series
+        self.queue: "queue.Queue[_Pending | None]" = queue.Queue()
+        self.worker = threading.Thread(target=self._loop, name="af-batcher", daemon=True)
+        self.worker.start()
+
+    def submit(self, codes: np.ndarray, horizon: int) -> pd.DataFrame:
+        pending = _Pending(codes, horizon, Future())
+        self.queue.put(pending)
+        return pending.future.result()
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.worker.join()
+
+    def _loop(self) -> None:
+        while True:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch, stop = [first], False
+            series = len(first.codes)
+            deadline = time.perf_counter() + self.max_wait
+            while series < self.max_batch_series:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                series += len(item.codes)
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch: List[_Pending]) -> None:
+        codes = np.unique(np.concatenate([p.codes for p in batch]))
+        self.metrics.record_batch(len(batch), len(codes), self.queue.qsize() + len(batch))
+        try:
+            future = self.forecaster.forecast(codes, max(p.horizon for p in batch))
+        except Exception as exc:  # every waiting request gets the failure
+            for pending in batch:
+                pending.future.set_exception(exc)
+            return
+        rows, steps = future["series"].to_numpy(), future["step"].to_numpy()
+        for pending in batch:
+            mask = np.isin(rows, pending.codes) & (steps <= pending.horizon)
+            pending.future.set_result(future[mask].drop(columns="series").reset_index(drop=True))
+
+
+# transport-agnostic request handling: (method, path, JSON body) -> (status, JSON payload).
+#   GET  /health, GET /metrics
+#   POST /forecast {"series": [{id_col: value, ...}], "horizon": 14}  (series omitted = all)
+#   POST /allocate {... as /forecast, "decision": {DecisionConfig overrides}}
+class ForecastService:
+
+    def __init__(self, bundle: ServingBundle):
+        self.bundle = bundle
+        self.forecaster = BundleForecaster(bundle)
+        self.metrics = ServingMetrics()
+        serving = bundle.config.serving
+        self.batcher = MicroBatcher(
+            self.forecaster, self.metrics, serving.max_wait_ms, serving.max_batch_series
+        )
+
+    # first request pays for lazy imports and model warm-up, not a client.
+    def warm_up(self) -> None:
+        self.batcher.submit(np.arange(min(1, len(self.forecaster.index))), 1)
+
+    def close(self) -> None:
+        self.batcher.close()
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        start = time.perf_counter()
+        route = path.split("?", 1)[0].rstrip("/") or "/"
+        try:
+            status, payload = self._route(method, route, body)
+        except (ValueError, TypeError, KeyError) as exc:
+            status, payload = 400, {"error": str(exc)}
+        except Exception as exc:
+            status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+        # unknown paths stay out of the metrics so they cannot grow without bound
+        if route != "/metrics" and status != 404:
+            self.metrics.observe(route, time.perf_counter() - start, status < 400)
+        return status, payload
+
+    def _route(self, method: str, route: str, body: bytes) -> Tuple[int, Dict]:
+        if method == "GET" and route == "/health":
+            return 200, {"status": "ok", "model": self.bundle.portfolio.best_model.name}
+        if method == "GET" and route == "/metrics":
+            return 200, self.metrics.snapshot(self.batcher.queue.qsize())
+        if method == "POST" and route in ("/forecast", "/allocate"):
+            request = json.loads(body or b"{}")
+            forecast = self._forecast(request)
+            if route == "/forecast":
+                return 200, {"forecast": _records(forecast)}
+            return 200, self._allocate(forecast, request.get("decision") or {})
+        return 404, {"error": f"No route for {method} {route}"}
+
+    def _forecast(self, request: Dict) -> pd.DataFrame:
+        horizon = int(request.get("horizon") or self.bundle.config.data.horizon)
+        if horizon < 1:
+            raise ValueError("horizon must be positive.")
+        return self.batcher.submit(self.forecaster.codes(request.get("series")), horizon)
+
+    def _allocate(self, forecast: pd.DataFrame, overrides: Dict) -> Dict:
+        config = replace(self.bundle.config.decision, **overrides)
+        decisions, info = DecisionAgent(config).propose(forecast)
+        return {"allocations": _records(decisions), "decision_info": _plain(info)}
+
+
+def _records(df: pd.DataFrame) -> List[Dict]:
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def _plain(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, pd.DataFrame):
+        return _records(value)
+    return str(value)
+
+
+def make_handler(service: ForecastService) -> type:
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def _dispatch(self, method: str) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            status, payload = service.handle(method, self.path, self.rfile.read(length))
+            data = json.dumps(payload, default=_json_default).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+# the stdlib listen backlog of 5 resets connections under bursts of concurrent clients.
+REQUEST_QUEUE_SIZE = 1024
+
+
+class TCPHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    # BaseHTTPRequestHandler expects (host, port) client addresses.
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(service: ForecastService, serving=None) -> socketserver.BaseServer:
+    serving = serving or service.bundle.config.serving
+    handler = make_handler(service)
+    if serving.socket_path:
+        path = pathlib.Path(serving.socket_path)
+        if path.exists():
+            path.unlink()
+        return UnixHTTPServer(str(path), handler)
+    return TCPHTTPServer((serving.host, serving.port), handler)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Warm-model forecast serving")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Fit the pipeline and write a serving bundle.")
+    build.add_argument("--data", required=True, help="Path to csv/parquet/arrow data.")
+    build.add_argument("--out", required=True, help="Bundle directory.")
+    build.add_argument("--dimensions-dir", default=None)
+    build.add_argument("--cache-dir", default=None, help="Reuse stage outputs across runs.")
+    build.add_argument("--horizon", type=int, default=None, help="Default request horizon.")
+    serve = commands.add_parser("serve", help="Answer requests from a bundle.")
+    serve.add_argument("--bundle", required=True, help="Bundle directory.")
+    serve.add_argument("--host", default=None)
+    serve.add_argument("--port", type=int, default=None)
+    serve.add_argument("--socket", default=None, help="Unix socket path instead of TCP.")
+    serve.add_argument("--max-wait-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        config = SystemConfig()
+        config.cache.directory = args.cache_dir
+        if args.horizon:
+            config.data.horizon = args.horizon
+        path = build_bundle(args.data, config, dimensions_dir=args.dimensions_dir).save(args.out)
+        print("Bundle:", path)
+        return
+
+    bundle = ServingBundle.load(args.bundle)
+    serving = bundle.config.serving
+    overrides = {
+        "host": args.host,
+        "port": args.port,
+        "socket_path": args.socket,
+        "max_wait_ms": args.max_wait_ms,
+    }
+    bundle.config.serving = replace(
+        serving, **{k: v for k, v in overrides.items() if v is not None}
+    )
+    service = ForecastService(bundle)
+    service.warm_up()
+    server = make_server(service)
+    serving = bundle.config.serving
+    where = serving.socket_path or f"http://{serving.host}:{serving.port}"
+    print(f"Serving {bundle.portfolio.best_model.name} on {where}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import copy
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import DataConfig
+from .decomposition import decompose_panel, regime_shift_flag, summarize_methods
+from .features import add_lag_features, grouped_lag, segment_positions
+from .state import (
+    SeriesStateStore,
+    last_rows,
+    merge_moments,
+    regime_flags_from_moments,
+    regime_roll,
+    roll_moments,
+)
+from .utils.data import (
+    add_time_features,
+    ensure_datetime,
+    segment_bounds,
+    series_index,
+    sort_by_series,
+)
+
+DECOMPOSITION_COLS = ["trend", "seasonal", "remainder", "regime_shift"]
+
+
+# decomposing seasonality, detecting regime shifts and create features.
+class SignalAgent:
+
+    def __init__(self, config: DataConfig):
+        self.config = config
+
+    def decompose(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+        df = ensure_datetime(df, self.config.time_col)
+        df = sort_by_series(df, self.config.id_cols, self.config.time_col)
+        bounds = segment_bounds(df, self.config.id_cols)
+        period = 7 if self.config.freq == "D" else None
+
+        out, methods, shifts = decompose_panel(
+            df[self.config.target_col].to_numpy(dtype=np.float64),
+            bounds,
+            period,
+            n_workers=self.config.decompose_workers,
+            chunk_size=self.config.decompose_chunk_size,
+        )
+        df["trend"] = out[0]
+        df["seasonal"] = out[1]
+        df["remainder"] = out[2]
+        df["regime_shift"] = out[3].astype(int)
+
+        per_series = df[self.config.id_cols].iloc[bounds[:-1]].reset_index(drop=True)
+        per_series["method"] = methods
+        per_series["regime_shifts"] = shifts
+        info = {
+            **summarize_methods(methods),
+            "series": len(methods),
+            "regime_shifts": int(sum(shifts)),
+            "per_series": per_series,
+        }
+        return df, info
+
+    def build_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        ordered = sort_by_series(df, self.config.id_cols, self.config.time_col)
+        # sort_by_series hands back its input when it is already sorted; copy once so the
+        # in-place writes below never reach the caller's (e.g. the cached decompose) frame.
+        df = ordered.copy() if ordered is df else ordered
+        bounds = segment_bounds(df, self.config.id_cols)
+        df = add_time_features(df, self.config.time_col, copy=False)
+        add_lag_features(
+            df,
+            self.config.target_col,
+            bounds,
+            self.config.lags,
+            self.config.rolling_windows,
+        )
+        df["regime_shift_lag"] = np.nan_to_num(
+            grouped_lag(
+                df["regime_shift"].to_numpy(dtype=np.float32),
+                segment_positions(bounds),
+                1,
+            )
+        )
+        df = df.dropna()
+        return df
+
+    def _context_length(self) -> int:
+        return max(
+            [self.config.state_context, 15]
+            + list(self.config.lags)
+            + list(self.config.rolling_windows)
+        )
+
+    # snapshot trailing windows and regime moments from a full decompose() output.
+    def init_state(self, decomposed: pd.DataFrame) -> SeriesStateStore:
+        df = sort_by_series(decomposed, self.config.id_cols, self.config.time_col)
+        return SeriesStateStore.from_decomposed(
+            df,
+            segment_bounds(df, self.config.id_cols),
+            self.config.id_cols,
+            self.config.time_col,
+            self._context_length(),
+        )
+
+    # extends decomposition and features for appended rows using only each series' stored tail.
+    def update(
+        self, new_rows: pd.DataFrame, store: SeriesStateStore
+    ) -> Tuple[pd.DataFrame, Dict]:
+        cfg = self.config
+        new = ensure_datetime(new_rows, cfg.time_col)
+        last = store.last_times().reindex(series_index(new, cfg.id_cols)).to_numpy()
+        fresh = pd.isna(last) | (new[cfg.time_col].to_numpy() > last)
+        new = new[fresh].copy()
+        new["_is_new"] = True
+
+        touched = series_index(new, cfg.id_cols).unique()
+        context = store.tail[series_index(store.tail, cfg.id_cols).isin(touched)]
+        base_cols: List[str] = [c for c in store.tail.columns if c in new.columns]
+        context = context[base_cols + DECOMPOSITION_COLS].copy()
+        context["_is_new"] = False
+        combined = pd.concat([context, new], ignore_index=True)
+        combined = sort_by_series(combined, cfg.id_cols, cfg.time_col).reset_index(drop=True)
+        bounds = segment_bounds(combined, cfg.id_cols)
+        is_new = combined["_is_new"].to_numpy(dtype=bool)
+
+        out, methods, _ = decompose_panel(
+            combined[cfg.target_col].to_numpy(dtype=np.float64),
+            bounds,
+            7 if cfg.freq == "D" else None,
+            n_workers=cfg.decompose_workers,
+            chunk_size=cfg.decompose_chunk_size,
+        )
+        for i, col in enumerate(["trend", "seasonal", "remainder"]):
+            combined[col] = np.where(is_new, out[i], combined[col].to_numpy(dtype=np.float64))
+
+        codes = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds))
+        keys = series_index(combined.iloc[bounds[:-1]], cfg.id_cols)
+        roll = regime_roll(combined["trend"].to_numpy(dtype=np.float64), bounds)
+        added = roll_moments(np.where(is_new, roll, np.nan), bounds)
+        added.index = keys
+        prior = store.moments.reindex(keys).fillna(0.0)
+        moments = merge_moments(prior, added)
+        flags = regime_flags_from_moments(roll, codes, moments)
+        combined["regime_shift"] = np.where(
+            is_new, flags, combined["regime_shift"].fillna(0).to_numpy()
+        ).astype(int)
+
+        store.replace(
+            last_rows(combined[base_cols + DECOMPOSITION_COLS], bounds, store.context),
+            moments,
+        )
+
+        features = self.build_features(combined)
+        features = features[features["_is_new"]].drop(columns="_is_new")
+        info = {
+            **summarize_methods(methods),
+            "new_rows": int(is_new.sum()),
+            "stale_rows": int((~fresh).sum()),
+            "series_updated": len(touched),
+        }
+        return features, info
+
+    # runs update() on a copy of the store and diffs it against a full recompute over history +
+    # new rows; "passed" reports every compared column, and "ok" needs all of them.
+    def verify_update(
+        self,
+        history: pd.DataFrame,
+        new_rows: pd.DataFrame,
+        store: SeriesStateStore,
+        atol: float = 1e-3,
+        decomposition_rtol: float = 0.05,
+        regime_mismatch_tol: float = 0.05,
+        decomposition_floor: float = 0.01,
+    ) -> Dict:
+        cfg = self.config
+        incremental, _ = self.update(new_rows, copy.deepcopy(store))
+        full_decomposed, _ = self.decompose(pd.concat([history, new_rows], ignore_index=True))
+        full = self.build_features(full_decomposed)
+
+        keys = cfg.id_cols + [cfg.time_col]
+        merged = incremental.merge(full, on=keys, suffixes=("", "_full"))
+        # update() refits STL on the last state_context rows only, and robust STL reweights on
+        # the whole fit window, so decomposition columns are compared relative to each series'
+        # mean |y| over its history (not the appended rows: one zero-sales day would make that
+        # ~0), floored at decomposition_floor of the median series level.
+        level = history[cfg.target_col].abs().groupby(
+            series_index(history, cfg.id_cols), observed=True
+        ).mean()
+        floor = max(decomposition_floor * float(np.nan_to_num(level.median())), 1e-8)
+        scale = np.maximum(
+            level.reindex(series_index(merged, cfg.id_cols)).to_numpy(dtype=np.float64), floor
+        )
+        scale = np.where(np.isnan(scale), floor, scale)
+        diffs: Dict[str, float] = {}
+        passed: Dict[str, bool] = {"rows": len(merged) == len(incremental)}
+        for col in incremental.columns:
+            other = f"{col}_full"
+            if col in keys or other not in merged or col in ("regime_shift", "regime_shift_lag"):
+                continue
+            if not pd.api.types.is_numeric_dtype(merged[col]) or not len(merged):
+                continue
+            abs_diff = np.abs(
+                merged[col].to_numpy(dtype=np.float64) - merged[other].to_numpy(dtype=np.float64)
+            )
+            diffs[col] = float(np.nanmax(abs_diff))
+            if col in DECOMPOSITION_COLS:
+                passed[col] = float(np.nanmax(abs_diff / scale)) <= decomposition_rtol
+            else:
+                passed[col] = diffs[col] <= atol
+
+        regime_mismatch = float(
+            (merged["regime_shift"] != merged["regime_shift_full"]).mean()
+        ) if len(merged) else 0.0
+        passed["regime_shift"] = regime_mismatch <= regime_mismatch_tol
+        return {
+            "rows_incremental": len(incremental),
+            "rows_compared": len(merged),
+            "max_abs_diff": diffs,
+            "regime_mismatch_rate": regime_mismatch,
+            "passed": passed,
+            "failed": [col for col, good in passed.items() if not good],
+            "ok": all(passed.values()),
+        }
+
+    @staticmethod
+    def _regime_shift_flag(trend: pd.Series, window: int = 14, threshold: float = 2.0):
+        return regime_shift_flag(trend, window=window, threshold=threshold)
+
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import pathlib
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .features import grouped_lag, grouped_rolling_mean, segment_positions
+from .utils.data import series_index
+
+REGIME_WINDOW = 14
+REGIME_MIN_PERIODS = 5
+REGIME_THRESHOLD = 2.0
+
+
+# trend.diff().rolling(14, min_periods=5).mean() per series, as used by the regime-shift flag.
+def regime_roll(trend: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    positions = segment_positions(bounds)
+    diff = trend - grouped_lag(trend, positions, 1, dtype=np.float64)
+    return grouped_rolling_mean(
+        diff, positions, REGIME_WINDOW, REGIME_MIN_PERIODS, dtype=np.float64
+    )
+
+
+# per-series count/mean/M2 of the regime roll so the z-score can be extended without history.
+def roll_moments(roll: np.ndarray, bounds: np.ndarray) -> pd.DataFrame:
+    codes = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds))
+    valid = ~np.isnan(roll)
+    n_series = len(bounds) - 1
+    count = np.bincount(codes[valid], minlength=n_series).astype(np.float64)
+    total = np.bincount(codes[valid], weights=roll[valid], minlength=n_series)
+    mean = np.divide(total, count, out=np.zeros(n_series), where=count > 0)
+    m2 = np.bincount(
+        codes[valid], weights=(roll[valid] - mean[codes[valid]]) ** 2, minlength=n_series
+    )
+    return pd.DataFrame({"count": count, "mean": mean, "m2": m2})
+
+
+# Chan et al. parallel merge of two sets of Welford moments.
+def merge_moments(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    count = a["count"] + b["count"]
+    delta = b["mean"] - a["mean"]
+    safe = count.where(count > 0, 1.0)
+    mean = a["mean"] + delta * b["count"] / safe
+    m2 = a["m2"] + b["m2"] + delta**2 * a["count"] * b["count"] / safe
+    return pd.DataFrame({"count": count, "mean": mean, "m2": m2})
+
+
+# persisted per-series context for incremental SignalAgent updates.
+class SeriesStateStore:
+
+    def __init__(
+        self,
+        tail: pd.DataFrame,
+        moments: pd.DataFrame,
+        id_cols: List[str],
+        time_col: str,
+        context: int,
+    ):
+        self.tail = tail
+        self.moments = moments
+        self.id_cols = id_cols
+        self.time_col = time_col
+        self.context = context
+
+    @classmethod
+    def from_decomposed(
+        cls,
+        df: pd.DataFrame,
+        bounds: np.ndarray,
+        id_cols: List[str],
+        time_col: str,
+        context: int,
+    ) -> "SeriesStateStore":
+        roll = regime_roll(df["trend"].to_numpy(dtype=np.float64), bounds)
+        moments = roll_moments(roll, bounds)
+        moments.index = series_index(df.iloc[bounds[:-1]], id_cols)
+        return cls(
+            tail=last_rows(df, bounds, context),
+            moments=moments,
+            id_cols=id_cols,
+            time_col=time_col,
+            context=context,
+        )
+
+    def last_times(self) -> pd.Series:
+        last = self.tail.groupby(self.id_cols, sort=False, observed=True)[self.time_col].max()
+        last.index = series_index(last.reset_index(), self.id_cols)
+        return last
+
+    def replace(
+        self, tail: pd.DataFrame, moments: pd.DataFrame
+    ) -> None:
+        keys = series_index(tail, self.id_cols)
+        keep = ~series_index(self.tail, self.id_cols).isin(keys.unique())
+        self.tail = pd.concat([self.tail[keep], tail], ignore_index=True)
+        self.moments = pd.concat(
+            [self.moments[~self.moments.index.isin(moments.index)], moments]
+        )
+
+    def save(self, path: str | pathlib.Path) -> None:
+        pd.to_pickle(
+            {
+                "tail": self.tail,
+                "moments": self.moments,
+                "id_cols": self.id_cols,
+                "time_col": self.time_col,
+                "context": self.context,
+            },
+            path,
+        )
+
+    @classmethod
+    def load(cls, path: str | pathlib.Path) -> "SeriesStateStore":
+        return cls(**pd.read_pickle(path))
+
+
+def regime_flags_from_moments(roll: np.ndarray, codes: np.ndarray, moments: pd.DataFrame) -> np.ndarray:
+    count = moments["count"].to_numpy()
+    std = np.sqrt(
+        np.divide(moments["m2"].to_numpy(), count - 1, out=np.full(len(count), np.nan), where=count > 1)
+    )
+    z = (roll - moments["mean"].to_numpy()[codes]) / (std[codes] + 1e-8)
+    return (np.abs(z) > REGIME_THRESHOLD).astype(int)
+
+
+def last_rows(df: pd.DataFrame, bounds: np.ndarray, context: int) -> pd.DataFrame:
+    positions = segment_positions(bounds)
+    lengths = np.repeat(np.diff(bounds), np.diff(bounds))
+    return df[positions >= lengths - context].reset_index(drop=True)
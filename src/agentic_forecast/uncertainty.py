@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .calibration import ConformalCalibrator
+from .config import UncertaintyConfig
+from .evaluation import coverage
+from .models import QUANTILE_REGISTRY, model_class
+
+
+# produces calibrated prediction intervals via quantile and conformal.
+
+class UncertaintyAgent:
+
+    def __init__(self, alpha: float = 0.1, config: UncertaintyConfig | None = None):
+        self.config = config or UncertaintyConfig(alpha=alpha)
+        self.alpha = self.config.alpha
+        self.calibrator = self._new_calibrator()
+        if self.config.quantile_mode not in QUANTILE_REGISTRY:
+            raise ValueError(f"Unknown quantile mode: {self.config.quantile_mode}")
+        self._quantile_model = None
+
+    # built on first use: conformal-only runs never import the quantile backends.
+    @property
+    def quantile_model(self):
+        if getattr(self, "_quantile_model", None) is None:
+            cls = model_class(self.config.quantile_mode, QUANTILE_REGISTRY)
+            self._quantile_model = cls(quantiles=self.config.quantiles)
+        return self._quantile_model
+
+    def _new_calibrator(self) -> ConformalCalibrator:
+        return ConformalCalibrator(
+            alpha=self.config.alpha,
+            segment_by=self.config.segment_by,
+            window=self.config.window,
+            min_count=self.config.min_count,
+            volume_buckets=self.config.volume_buckets,
+            band_scale=self.config.band_scale,
+        )
+
+    # replaces the calibration set; keys (ids/"step"/"forecast") enable per-segment bands.
+    def fit_residuals(self, residuals: np.ndarray, keys: pd.DataFrame | None = None):
+        self.calibrator = self._new_calibrator()
+        self.calibrator.update(residuals, keys)
+
+    # adds new residuals (e.g. from the latest backtest) to the bounded per-segment reservoirs.
+    def update_residuals(self, residuals: np.ndarray, keys: pd.DataFrame | None = None):
+        self.calibrator.update(residuals, keys)
+
+    # series/times (row-aligned ids and dates) let the joint model hold out each series' tail.
+    def fit_quantile(self, X: pd.DataFrame, y: pd.Series, series=None, times=None):
+        self.quantile_model.fit(X, y, series=series, times=times)
+
+    def intervals_from_point(
+        self, point_preds: np.ndarray, keys: pd.DataFrame | None = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.calibrator.fitted:
+            band = np.quantile(np.abs(point_preds), 1 - self.alpha)
+            return point_preds - band, point_preds + band
+        return self.calibrator.intervals(point_preds, point_preds, keys)
+
+    def intervals_from_quantiles(
+        self, X_future: pd.DataFrame, keys: pd.DataFrame | None = None
+    ) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        preds = self.quantile_model.predict(X_future)
+        lower = preds[min(self.quantile_model.quantiles)]
+        upper = preds[max(self.quantile_model.quantiles)]
+        info = {"quantiles": self.quantile_model.quantiles}
+        if self.calibrator.fitted:
+            lower, upper = self.calibrator.intervals(lower, upper, keys)
+            info["conformal"] = True
+        else:
+            info["conformal"] = False
+        return lower, upper, info
+
+    def evaluate_intervals(
+        self,
+        y_true: np.ndarray,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        nominal: float,
+    ) -> Dict:
+        cov = coverage(y_true, lower, upper)
+        width = float(np.mean(upper - lower))
+        return {"coverage": cov, "nominal": nominal, "avg_width": width}
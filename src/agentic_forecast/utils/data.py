@@ -1,19 +1,156 @@
 from __future__ import annotations
 
-from typing import Iterable, Tuple
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 
-def ensure_datetime(df: pd.DataFrame, time_col: str) -> pd.DataFrame:
-    out = df.copy()
-    out[time_col] = pd.to_datetime(out[time_col])
-    return out.sort_values(time_col)
+def ensure_datetime(df: pd.DataFrame, time_col: str, copy: bool = True) -> pd.DataFrame:
+    out = df.copy() if copy else df
+    if not pd.api.types.is_datetime64_any_dtype(out[time_col]):
+        out[time_col] = pd.to_datetime(out[time_col])
+    if out[time_col].is_monotonic_increasing:
+        return out
+    return out.sort_values(time_col, kind="stable")
 
 
-def add_time_features(df: pd.DataFrame, time_col: str) -> pd.DataFrame:
-    out = df.copy()
+def series_codes(df: pd.DataFrame, id_cols: List[str]) -> np.ndarray:
+    if not id_cols:
+        return np.zeros(len(df), dtype=np.int64)
+    codes = np.zeros(len(df), dtype=np.int64)
+    for col in id_cols:
+        col_codes, uniques = pd.factorize(df[col], sort=True)
+        codes = codes * (len(uniques) + 1) + (col_codes + 1)
+    return codes
+
+
+def series_index(df: pd.DataFrame, id_cols: List[str]) -> pd.Index:
+    if len(id_cols) == 1:
+        return pd.Index(df[id_cols[0]].to_numpy(), name=id_cols[0])
+    return pd.MultiIndex.from_frame(df[id_cols].astype(object))
+
+
+# stable sort by series then time; returns the frame untouched when already ordered.
+def sort_by_series(
+    df: pd.DataFrame, id_cols: List[str], time_col: str
+) -> pd.DataFrame:
+    times = df[time_col].to_numpy()
+    order = np.lexsort((times, series_codes(df, id_cols)))
+    if np.array_equal(order, np.arange(len(df))):
+        return df
+    return df.take(order)
+
+
+# start offsets of each series in an id-sorted frame, with len(df) appended.
+def segment_bounds(df: pd.DataFrame, id_cols: List[str]) -> np.ndarray:
+    return bounds_from_codes(series_codes(df, id_cols))
+
+
+def bounds_from_codes(codes: np.ndarray) -> np.ndarray:
+    n = len(codes)
+    if n == 0:
+        return np.zeros(1, dtype=np.int64)
+    change = np.zeros(n, dtype=bool)
+    change[0] = True
+    change[1:] = codes[1:] != codes[:-1]
+    return np.append(np.flatnonzero(change), n).astype(np.int64)
+
+
+# integer period number of each timestamp for `freq`; consecutive periods differ by one.
+def period_ordinals(times: np.ndarray, freq: str) -> np.ndarray:
+    offset = pd.tseries.frequencies.to_offset(freq)
+    try:
+        return times.astype("datetime64[ns]").astype(np.int64) // offset.nanos
+    except ValueError:
+        pass
+    # calendar offsets (month/week starts, ...): position on the shared grid of the whole range.
+    grid = pd.date_range(times.min(), times.max(), freq=offset).to_numpy()
+    return np.searchsorted(grid, times).astype(np.int64)
+
+
+def is_series_sorted(codes: np.ndarray, times: np.ndarray) -> bool:
+    if len(codes) < 2:
+        return True
+    step = np.diff(codes)
+    same = step == 0
+    return bool((step >= 0).all() and (times[1:][same] >= times[:-1][same]).all())
+
+
+# stable (series, time) order from integer series codes and period ordinals; when both fit
+# into one int64 key a single argsort replaces the much slower two-key lexsort.
+def series_time_order(codes: np.ndarray, times: np.ndarray, ordinals: np.ndarray) -> np.ndarray:
+    if is_series_sorted(codes, times):
+        return np.arange(len(codes))
+    if len(codes):
+        base = ordinals.min()
+        span_bits = int(ordinals.max() - base).bit_length()
+        if int(codes.max()).bit_length() + span_bits <= 62:
+            key = (codes.astype(np.int64) << span_bits) | (ordinals - base)
+            order = np.argsort(key)
+            # equal keys (duplicates) are rare: restore input order within those runs only.
+            ranked = key[order]
+            tied = np.zeros(len(order), dtype=bool)
+            tied[1:] = ranked[1:] == ranked[:-1]
+            tied[:-1] |= tied[1:]
+            if tied.any():
+                order[tied] = order[tied][np.lexsort((order[tied], ranked[tied]))]
+            # off-grid timestamps can share an ordinal; fall back if that broke time order.
+            if is_series_sorted(codes[order], times[order]):
+                return order
+    return np.lexsort((times, codes))
+
+
+# (level name, node code per row, node labels) for each list of columns in `levels`; an empty
+# list is the grand total and multi-column nodes are labelled "a/b".
+def level_codes(
+    attrs: pd.DataFrame, levels: Iterable[List[str]]
+) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+    out = []
+    for cols in levels:
+        if not cols:
+            out.append(("total", np.zeros(len(attrs), dtype=np.int64), np.array(["total"])))
+            continue
+        missing = [c for c in cols if c not in attrs.columns]
+        if missing:
+            raise ValueError(f"Level columns missing from the frame: {missing}")
+        codes, uniques = pd.factorize(series_index(attrs, cols))
+        if isinstance(uniques, pd.MultiIndex):
+            labels = pd.Series(uniques.get_level_values(0).astype(str))
+            for i in range(1, uniques.nlevels):
+                labels = labels + "/" + uniques.get_level_values(i).astype(str)
+        else:
+            labels = pd.Series(uniques.astype(str))
+        out.append(("/".join(cols), codes.astype(np.int64), labels.to_numpy()))
+    return out
+
+
+# (n_groups, n_quantiles) linear-interpolated quantiles of values per group code; a single
+# sort serves every group and quantile, and rows come out non-decreasing. Empty groups are NaN.
+def grouped_quantiles(
+    values: np.ndarray, codes: np.ndarray, n_groups: int, quantiles: Iterable[float]
+) -> np.ndarray:
+    order = np.lexsort((values, codes))
+    ranked = values[order]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    last = np.maximum(counts[:, None] - 1, 0)
+    pos = last * np.asarray(list(quantiles))[None, :]
+    below = np.floor(pos).astype(np.int64)
+    above = np.minimum(below + 1, last)
+    frac = pos - below
+    if not len(ranked):
+        return np.full(pos.shape, np.nan)
+    low = ranked[np.minimum(starts[:, None] + below, len(ranked) - 1)]
+    high = ranked[np.minimum(starts[:, None] + above, len(ranked) - 1)]
+    table = np.maximum.accumulate(low + frac * (high - low), axis=1)
+    table[counts == 0] = np.nan
+    return table
+
+
+def add_time_features(df: pd.DataFrame, time_col: str, copy: bool = True) -> pd.DataFrame:
+    out = df.copy() if copy else df
     dt = out[time_col].dt
     out["dow"] = dt.dayofweek
     out["week"] = dt.isocalendar().week.astype(int)
@@ -32,26 +169,61 @@ def train_test_split_time(
     return train, test
 
 
-def rolling_origin_splits(
+# integer positions of each (train, val) window over a frame sorted once by time.
+@dataclass
+class SplitPlan:
+    order: Optional[np.ndarray]
+    splits: List[Tuple[slice, slice]]
+    cutoffs: List[pd.Timestamp]
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df if self.order is None else df.take(self.order)
+
+
+def plan_rolling_origin(
     df: pd.DataFrame,
     time_col: str,
     val_size: int,
     step_size: int,
     min_train: int,
     n_splits: int,
-) -> Iterable[Tuple[pd.DataFrame, pd.DataFrame]]:
-    unique_times = (
-        df[[time_col]].drop_duplicates().sort_values(time_col)[time_col].tolist()
-    )
-    start_idx = min_train
+) -> SplitPlan:
+    times = df[time_col].to_numpy()
+    order = None
+    if not df[time_col].is_monotonic_increasing:
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+    change = np.ones(len(times), dtype=bool)
+    change[1:] = times[1:] != times[:-1]
+    unique_times = times[change]
+
+    splits: List[Tuple[slice, slice]] = []
+    cutoffs: List[pd.Timestamp] = []
     for split_idx in range(n_splits):
-        train_end_idx = start_idx + split_idx * step_size
+        train_end_idx = min_train + split_idx * step_size
         if train_end_idx + val_size > len(unique_times):
             break
-        cutoff = unique_times[train_end_idx]
-        train, val = train_test_split_time(df, time_col, cutoff)
-        val = val[val[time_col] <= cutoff + pd.Timedelta(days=val_size)]
-        yield train, val
+        cutoff = pd.Timestamp(unique_times[train_end_idx])
+        val_end = (cutoff + pd.Timedelta(days=val_size)).to_datetime64()
+        train_stop = int(np.searchsorted(times, unique_times[train_end_idx], side="right"))
+        val_stop = int(np.searchsorted(times, val_end, side="right"))
+        splits.append((slice(0, train_stop), slice(train_stop, val_stop)))
+        cutoffs.append(cutoff)
+    return SplitPlan(order=order, splits=splits, cutoffs=cutoffs)
+
+
+def rolling_origin_splits(
+    df: pd.DataFrame,
+    time_col: str,
+    val_size: int,
+    step_size: int,
+    min_train: int,
+    n_splits: int,
+) -> Iterable[Tuple[pd.DataFrame, pd.DataFrame]]:
+    plan = plan_rolling_origin(df, time_col, val_size, step_size, min_train, n_splits)
+    ordered = plan.apply(df)
+    for train_slice, val_slice in plan.splits:
+        yield ordered.iloc[train_slice], ordered.iloc[val_slice]
 def wape(y_true: np.ndarray, y_pred: np.ndarray) -> float:
     denom = np.sum(np.abs(y_true)) + 1e-8
     return float(np.sum(np.abs(y_true - y_pred)) / denom)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import pathlib
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from ..config import DataConfig
+
+DIMENSION_FILES = ("dates.csv", "stores.csv", "categories.csv")
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+ARROW_SUFFIXES = {".arrow", ".feather", ".ipc"}
+
+
+def csv_schema(config: DataConfig) -> Dict[str, str]:
+    schema = {col: "category" for col in config.id_cols}
+    schema[config.target_col] = "float32"
+    return schema
+
+
+def _filter_rows(
+    df: pd.DataFrame,
+    config: DataConfig,
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+    ids: Optional[Dict[str, Sequence]],
+) -> pd.DataFrame:
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= (df[config.time_col] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (df[config.time_col] <= pd.Timestamp(end)).to_numpy()
+    for col, values in (ids or {}).items():
+        mask &= df[col].isin(values).to_numpy()
+    return df if mask.all() else df[mask]
+
+
+# yields typed, filtered chunks; only `columns` (plus keys) are parsed.
+def iter_csv_chunks(
+    path: str | pathlib.Path,
+    config: DataConfig,
+    chunksize: int = 1_000_000,
+    columns: Optional[List[str]] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    ids: Optional[Dict[str, Sequence]] = None,
+) -> Iterator[pd.DataFrame]:
+    usecols = None
+    if columns is not None:
+        keys = [config.time_col, *config.id_cols, config.target_col]
+        usecols = list(dict.fromkeys(keys + list(columns)))
+    schema = csv_schema(config)
+    if usecols is not None:
+        schema = {k: v for k, v in schema.items() if k in usecols}
+    reader = pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype=schema,
+        parse_dates=[config.time_col],
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        chunk = _filter_rows(chunk, config, start, end, ids)
+        if len(chunk):
+            yield chunk
+
+
+def concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    if not chunks:
+        raise ValueError("No rows matched the requested filters.")
+    categorical = [
+        col for col in chunks[0].columns
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype)
+    ]
+    for col in categorical:
+        categories = union_categoricals([c[col] for c in chunks]).categories
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_csv_chunked(
+    path: str | pathlib.Path,
+    config: DataConfig,
+    chunksize: int = 1_000_000,
+    columns: Optional[List[str]] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    ids: Optional[Dict[str, Sequence]] = None,
+) -> pd.DataFrame:
+    return concat_chunks(
+        list(iter_csv_chunks(path, config, chunksize, columns, start, end, ids))
+    )
+
+
+# writes time-sorted row groups so date filters can skip groups via column statistics.
+def write_parquet(
+    df: pd.DataFrame,
+    path: str | pathlib.Path,
+    config: DataConfig,
+    row_group_size: int = 1_000_000,
+) -> None:
+    if not df[config.time_col].is_monotonic_increasing:
+        df = df.sort_values(config.time_col, kind="stable")
+    df.to_parquet(path, index=False, row_group_size=row_group_size)
+
+
+def read_columnar(
+    path: str | pathlib.Path,
+    config: DataConfig,
+    columns: Optional[List[str]] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    ids: Optional[Dict[str, Sequence]] = None,
+) -> pd.DataFrame:
+    path = pathlib.Path(path)
+    if columns is not None:
+        keys = [config.time_col, *config.id_cols, config.target_col]
+        columns = list(dict.fromkeys(keys + list(columns)))
+
+    if path.suffix in ARROW_SUFFIXES:
+        df = pd.read_feather(path, columns=columns)
+        df = _filter_rows(df, config, start, end, ids)
+    else:
+        filters = []
+        if start is not None:
+            filters.append((config.time_col, ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append((config.time_col, "<=", pd.Timestamp(end)))
+        for col, values in (ids or {}).items():
+            filters.append((col, "in", list(values)))
+        df = pd.read_parquet(path, columns=columns, filters=filters or None)
+
+    for col in config.id_cols:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    if df[config.target_col].dtype != np.float32:
+        df[config.target_col] = df[config.target_col].astype(np.float32)
+    return df
+
+
+def _key_positions(fact_key: pd.Series, dim_key: pd.Series) -> np.ndarray:
+    if isinstance(fact_key.dtype, pd.CategoricalDtype):
+        categories = fact_key.cat.categories
+        if categories.dtype == object or pd.api.types.is_string_dtype(categories):
+            dim_key = dim_key.astype(str)
+        by_category = pd.Index(dim_key).get_indexer(categories)
+        codes = fact_key.cat.codes.to_numpy()
+        return np.where(codes >= 0, by_category[codes], -1)
+    return pd.Index(dim_key).get_indexer(fact_key)
+
+
+# left-joins dimension tables on whatever key columns they share with the fact table.
+def join_dimensions(
+    df: pd.DataFrame, dimensions: List[pd.DataFrame]
+) -> pd.DataFrame:
+    for dim in dimensions:
+        keys = [c for c in dim.columns if c in df.columns]
+        if not keys:
+            continue
+        dim = dim.drop_duplicates(subset=keys).reset_index(drop=True)
+        if len(keys) > 1:
+            df = df.merge(dim, on=keys, how="left")
+            continue
+        # single-key joins gather attribute columns by position instead of copying the fact table.
+        positions = _key_positions(df[keys[0]], dim[keys[0]])
+        for col in dim.columns.drop(keys):
+            attr = dim[col]
+            if pd.api.types.is_string_dtype(attr) or attr.dtype == object:
+                attr = attr.astype("category")
+            df[col] = attr.reindex(positions).array
+    return df
+
+
+# attribute columns the dimension tables add to the fact table (all but the time/id keys).
+def dimension_columns(
+    directory: Optional[str | pathlib.Path], config: DataConfig
+) -> List[str]:
+    if directory is None:
+        return []
+    keys = {config.time_col, *config.id_cols}
+    columns: List[str] = []
+    for name in DIMENSION_FILES:
+        path = pathlib.Path(directory) / name
+        if path.exists():
+            columns += [c for c in pd.read_csv(path, nrows=0).columns if c not in keys]
+    return list(dict.fromkeys(columns))
+
+
+def read_dimensions(directory: str | pathlib.Path, config: DataConfig) -> List[pd.DataFrame]:
+    directory = pathlib.Path(directory)
+    tables = []
+    for name in DIMENSION_FILES:
+        path = directory / name
+        if not path.exists():
+            continue
+        table = pd.read_csv(path)
+        if config.time_col in table.columns:
+            table[config.time_col] = pd.to_datetime(table[config.time_col])
+        tables.append(table)
+    return tables
+
+
+# single entry point for run_pipeline and the app: csv (chunked) or parquet/arrow, plus dimensions.
+def load_sales(
+    path: str | pathlib.Path,
+    config: DataConfig,
+    columns: Optional[List[str]] = None,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    ids: Optional[Dict[str, Sequence]] = None,
+    dimensions_dir: Optional[str | pathlib.Path] = None,
+    chunksize: int = 1_000_000,
+) -> pd.DataFrame:
+    path = pathlib.Path(path)
+    if path.suffix in PARQUET_SUFFIXES | ARROW_SUFFIXES:
+        df = read_columnar(path, config, columns, start, end, ids)
+    else:
+        df = read_csv_chunked(path, config, chunksize, columns, start, end, ids)
+
+    if dimensions_dir is not None:
+        df = join_dimensions(df, read_dimensions(dimensions_dir, config))
+    return df
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+
+
+# KLL-style mergeable quantile sketch: exact up to `capacity` items, then each full
+# level is sorted and every other item is promoted with doubled weight.
+class QuantileSketch:
+
+    def __init__(self, capacity: int = 4096, seed: int = 0):
+        self.capacity = capacity
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.count += other.count
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity:
+                items = np.sort(items)
+                carry = items[len(items) - len(items) % 2:]
+                items = items[: len(items) - len(items) % 2]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level] = carry
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q: float) -> float:
+        values = np.concatenate(self.levels)
+        if not len(values):
+            return float("nan")
+        weights = np.concatenate(
+            [np.full(len(items), 2.0**level) for level, items in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(values[order][min(idx, len(values) - 1)])
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: a second, independent-looking hash derived from the first.
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+# Bloom filter over 64-bit key hashes (k probes by double hashing); memory is fixed by
+# capacity and error_rate, at the price of rare false "already seen" answers.
+class BloomFilter:
+
+    def __init__(self, capacity: int, error_rate: float = 1e-3):
+        self.n_bits = int(np.ceil(-capacity * np.log(error_rate) / np.log(2) ** 2))
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * np.log(2))))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        h1 = hashes.astype(np.uint64)
+        h2 = _mix(h1) | np.uint64(1)
+        probes = np.arange(self.n_hashes, dtype=np.uint64)[:, None]
+        with np.errstate(over="ignore"):
+            return (h1[None, :] + probes * h2[None, :]) % np.uint64(self.n_bits)
+
+    # True where a hash was (probably) added before; all hashes are added afterwards.
+    def check_and_add(self, hashes: np.ndarray) -> np.ndarray:
+        pos = self._positions(hashes)
+        byte, bit = pos >> np.uint64(3), (pos & np.uint64(7)).astype(np.uint8)
+        seen = ((self.bits[byte] >> bit) & 1).astype(bool).all(axis=0)
+        # OR the new bits in per byte: sort the probes once, reduce runs of equal bytes.
+        pos = np.sort(pos.ravel())
+        byte = pos >> np.uint64(3)
+        starts = np.flatnonzero(np.append(True, byte[1:] != byte[:-1]))
+        masks = np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)
+        self.bits[byte[starts]] |= np.bitwise_or.reduceat(masks, starts)
+        return seen
+
+
+# exact counterpart of BloomFilter: a sorted array of every hash added so far.
+class ExactKeySet:
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def check_and_add(self, hashes: np.ndarray) -> np.ndarray:
+        hashes = hashes.astype(np.uint64)
+        pos = np.searchsorted(self.hashes, hashes)
+        seen = np.zeros(len(hashes), dtype=bool)
+        inside = pos < len(self.hashes)
+        seen[inside] = self.hashes[pos[inside]] == hashes[inside]
+        new = np.sort(hashes[~seen])
+        new = new[np.append(True, new[1:] != new[:-1])] if len(new) else new
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, new), new)
+        return seen